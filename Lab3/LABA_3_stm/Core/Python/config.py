@@ -5,6 +5,17 @@ UART_PORT = 'COM5'
 UART_BAUDRATE = 115200
 UART_TIMEOUT = 0.001
 
+# Разметка кадров (frame_parser): 'end' - конец по первому END (как в прошивке),
+# 'length' - START | TYPE | LEN | данные | CRC | END, байт 0x55 в float не рвёт кадр.
+# Режим 'length' включать вместе с такой же разметкой в protocol.c.
+UART_FRAMING = 'end'
+
+# Диагностика приёма GAME_STATE: 0 - выкл., 1 - ошибки, 2 - строка на пакет,
+# 3 - полный разбор с hex-дампом (каждый N-й пакет и пакеты с ошибкой CRC)
+UART_DIAG_LEVEL = 1
+UART_DIAG_SAMPLE_EVERY = 60
+UART_DIAG_DUMP_INTERVAL = 1.0   # полный разбор не чаще раза в столько секунд
+
 # ============ ЭКРАН ============
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
@@ -34,6 +45,22 @@ MAX_ENEMIES_IN_PACKET = 6
 MAX_PROJECTILES_IN_PACKET = 20
 MAX_WHIRLPOOLS_IN_PACKET = 3
 
+# Кольцевой буфер приёма и границы размера кадра START..END
+# (заголовок START | TYPE | LEN - 4 байта, с запасом для режима 'length')
+UART_RX_BUFFER_SIZE = 4096
+UART_MIN_PACKET_SIZE = 10
+UART_KEYFRAME_MAX_SIZE = (4 + 10 + 18 + 6 + 11 * MAX_ENEMIES_IN_PACKET + 9 * MAX_PROJECTILES_IN_PACKET
+                          + 9 * MAX_WHIRLPOOLS_IN_PACKET + 2)
+UART_MAX_PACKET_SIZE = max(4 + 18 + 1 + 11 * MAX_ENEMIES_IN_PACKET + 1 + 9 * MAX_PROJECTILES_IN_PACKET
+                           + 1 + 9 * MAX_WHIRLPOOLS_IN_PACKET + 8 + 2, UART_KEYFRAME_MAX_SIZE)
+
+# Ключевые и дельта-кадры состояния: координаты в дельтах - int16 в долях
+# пикселя (DELTA_COORD_SCALE), y - относительно camera_y
+DELTA_KEYFRAME_INTERVAL = 30           # дельт между ключевыми кадрами (энкодер)
+DELTA_COORD_SCALE = 4                  # 1/4 px, диапазон ±8192 px
+DELTA_ANGLE_SCALE = 50                 # 1/50 градуса, диапазон ±655°
+DELTA_KEYFRAME_REQUEST_INTERVAL = 0.1  # запрос ключевого кадра не чаще, с
+
 # ============ ГЕНЕРАЦИЯ МИРА ============
 WORLD_SEGMENT_HEIGHT = 2000
 WORLD_GENERATION_AHEAD = 1500
@@ -68,6 +95,9 @@ PKT_INIT_GAME = 0x05
 PKT_ADD_WHIRLPOOL = 0x06
 PKT_DEBUG = 0x07
 PKT_ADD_SHORE = 0x08
+PKT_GAME_KEYFRAME = 0x09     # STM32 -> PC, полное состояние по слотам
+PKT_GAME_DELTA = 0x0A        # STM32 -> PC, только изменённые слоты
+PKT_REQUEST_KEYFRAME = 0x0B  # PC -> STM32, после потери дельта-кадра
 
 START_BYTE = 0xAA
 END_BYTE = 0x55
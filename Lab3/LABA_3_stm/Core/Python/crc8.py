@@ -0,0 +1,87 @@
+# crc8.py - CRC-8 (полином 0x07, начальное значение 0) по таблице на 256 значений
+#
+# Общий модуль для всех вариантов протокола (v4_final, LABA_3, Lab3, v2):
+# вместо восьми сдвигов на каждый байт - один поиск в таблице.
+
+CRC8_POLY = 0x07
+
+
+def _build_table(poly=CRC8_POLY):
+    """Таблица CRC для всех 256 значений байта"""
+    table = []
+    for value in range(256):
+        crc = value
+        for _ in range(8):
+            if crc & 0x80:
+                crc = ((crc << 1) ^ poly) & 0xFF
+            else:
+                crc = (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _build_table()
+
+
+def update(crc, chunk):
+    """Продолжение расчёта CRC по очередному куску (bytes, bytearray, memoryview)"""
+    table = CRC8_TABLE
+    for byte in chunk:
+        crc = table[crc ^ byte]
+    return crc
+
+
+def crc8(data):
+    """CRC8 всего буфера"""
+    return update(0, data)
+
+
+def verify(data, crc=None):
+    """Проверка буфера.
+
+    Без crc - буфер заканчивается своим CRC: у CRC-8 без инверсии CRC
+    от «данные + их CRC» равен нулю, поэтому отдельно CRC не вырезается.
+    С crc - сравнение CRC данных с принятым значением.
+    """
+    if crc is None:
+        return update(0, data) == 0
+    return update(0, data) == crc
+
+
+def crc8_bitwise(data):
+    """Прежняя побитовая реализация (эталон для самопроверки и бенчмарка)"""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x80:
+                crc = (crc << 1) ^ CRC8_POLY
+            else:
+                crc <<= 1
+            crc &= 0xFF
+    return crc
+
+
+def benchmark(iterations=20000):
+    """Стоимость одного пакета: таблица против побитового цикла"""
+    import os
+    import timeit
+
+    # Размеры пакетов протоколов: кнопки/мили, команды, GAME_STATE
+    sizes = (4, 16, 64, 256)
+
+    print("\n===== CRC8: ТАБЛИЦА ПРОТИВ ЦИКЛА =====")
+    print(f"{'байт':>6} {'цикл, мкс':>11} {'таблица, мкс':>14} {'ускорение':>10}")
+    for size in sizes:
+        packet = os.urandom(size)
+        assert crc8(packet) == crc8_bitwise(packet)
+        assert verify(packet + bytes([crc8(packet)]))
+
+        old = timeit.timeit(lambda: crc8_bitwise(packet), number=iterations) / iterations * 1e6
+        new = timeit.timeit(lambda: crc8(memoryview(packet)), number=iterations) / iterations * 1e6
+        print(f"{size:>6} {old:>11.2f} {new:>14.2f} {old / new:>9.1f}x")
+    print("======================================\n")
+
+
+if __name__ == "__main__":
+    benchmark()
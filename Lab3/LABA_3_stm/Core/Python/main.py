@@ -20,7 +20,7 @@ class Game:
         self.clock = pygame.time.Clock()
         
         # UART протокол
-        self.uart = UARTProtocol(UART_PORT, UART_BAUDRATE, debug=True)
+        self.uart = UARTProtocol(UART_PORT, UART_BAUDRATE, debug=True, diag_level=UART_DIAG_LEVEL)
         
         # Рендерер
         self.renderer = GameRenderer(self.screen)
@@ -177,10 +177,7 @@ class Game:
             pygame.display.flip()
             return
         
-        # Море
-        self.screen.fill(WATER_BLUE)
-        
-        # Волны
+        # Море и волны (кадр непрозрачный, заливка не нужна)
         self.renderer.draw_waves()
         
         camera_y = self.game_state.camera_y
@@ -258,8 +255,7 @@ class Game:
         
         # Завершение работы
         pygame.quit()
-        if self.uart.ser:
-            self.uart.ser.close()
+        self.uart.close()
         sys.exit()
 
 
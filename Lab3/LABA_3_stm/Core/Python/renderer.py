@@ -2,7 +2,9 @@
 
 import pygame
 import math
+import numpy as np
 from config import *
+from wave_field import WaveField
 
 
 class GameRenderer:
@@ -15,8 +17,21 @@ class GameRenderer:
         self.big_font = pygame.font.Font(None, 48)
         self.wave_offset = 0
         
+        # Кадры волн для всех 20 фаз wave_offset
+        self.wave_field = WaveField(
+            SCREEN_WIDTH, SCREEN_HEIGHT, WATER_BLUE,
+            layer_colors=[(10 + d, 95 + d, 170) for d in (0, 5, 10)],
+            period=40, step=2
+        )
+        self.wave_field.warm_up()
+        
         # Загрузка спрайтов
         self._load_sprites()
+        self._enemy_sprites = {}
+        self.projectile_sprites = {
+            is_player: self._create_projectile_sprite(PROJECTILE_COLOR_PLAYER if is_player else PROJECTILE_COLOR_ENEMY)
+            for is_player in (False, True)
+        }
     
     def _load_sprites(self):
         """Загрузка спрайтов"""
@@ -56,34 +71,28 @@ class GameRenderer:
         ])
         return surf
     
+    def _create_projectile_sprite(self, color):
+        """Кружок снаряда (рисуется один раз, в кадре - blit)"""
+        size = PROJECTILE_RADIUS * 2 + 1
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(surf, color, (PROJECTILE_RADIUS, PROJECTILE_RADIUS), PROJECTILE_RADIUS)
+        return surf
+    
     def draw_waves(self):
-        """Рисуем волны на море"""
-        for layer in range(-2, SCREEN_HEIGHT // 35 + 3):
-            base_y = layer * 35 + self.wave_offset
-            color = (10 + (layer % 3) * 5, 95 + (layer % 3) * 5, 170)
-            
-            points = []
-            for x in range(0, SCREEN_WIDTH + 80, 5):
-                y = base_y + 12 * math.sin((2 * math.pi * x / 80) + (self.wave_offset * 0.03))
-                y += 12 * 0.3 * math.sin((4 * math.pi * x / 80) + (self.wave_offset * 0.045))
-                points.append((x, y))
-            
-            if len(points) > 1:
-                pygame.draw.lines(self.screen, color, False, points, 2)
-        
+        """Рисуем море с волнами (запечённый кадр текущей фазы, один blit)"""
+        self.wave_field.draw(self.screen, self.wave_offset, self.wave_offset)
         self.wave_offset = (self.wave_offset + 2) % 40
     
     def draw_whirlpools(self, whirlpools, camera_y):
-        """Рисуем водовороты из данных STM32"""
+        """Рисуем водовороты из данных STM32 (структурный массив WHIRLPOOL_DTYPE)"""
         rotation = (pygame.time.get_ticks() / 10) % 360
         
-        for whirlpool in whirlpools:
-            x = int(whirlpool['x'])
-            y_screen = int(whirlpool['y'] - camera_y)
-            
-            if y_screen < -150 or y_screen > SCREEN_HEIGHT + 150:
-                continue
-            
+        ys = whirlpools['y'] - camera_y
+        visible = (ys >= -150) & (ys <= SCREEN_HEIGHT + 150)
+        
+        for x, y_screen, used in zip(whirlpools['x'][visible].astype(int).tolist(),
+                                     ys[visible].astype(int).tolist(),
+                                     whirlpools['used'][visible].tolist()):
             for i in range(4):
                 r = WHIRLPOOL_RADIUS - i * 10
                 for j in range(8):
@@ -96,46 +105,46 @@ class GameRenderer:
                     color = (60 + i * 40, 60 + i * 40, 255)
                     pygame.draw.line(self.screen, color, (x1, y1), (x2, y2), 3)
             
-            center_color = (100, 100, 100) if whirlpool['used'] else (30, 30, 150)
+            center_color = (100, 100, 100) if used else (30, 30, 150)
             pygame.draw.circle(self.screen, center_color, (x, y_screen), 12)
     
+    def _enemy_sprite(self, enemy_type, direction):
+        """Спрайт врага, повёрнутый по направлению (поворот делается один раз)"""
+        key = (enemy_type, direction)
+        sprite = self._enemy_sprites.get(key)
+        if sprite is None:
+            base_sprite = self.enemy_simple_sprite if enemy_type == 0 else self.enemy_hard_sprite
+            # up, right, down (базовое), left; неизвестное направление - базовый спрайт
+            angle = {0: 0, 1: -90, 3: 90}.get(direction)
+            sprite = base_sprite if angle is None else pygame.transform.rotate(base_sprite, angle)
+            self._enemy_sprites[key] = sprite
+        return sprite
+    
     def draw_enemies(self, enemies, camera_y):
-        """Рисуем врагов из данных STM32"""
-        for enemy in enemies:
-            x = int(enemy['x'])
-            y_screen = int(enemy['y'] - camera_y)
-            
-            if y_screen < -100 or y_screen > SCREEN_HEIGHT + 100:
-                continue
-            
-            # Выбираем базовый спрайт
-            base_sprite = self.enemy_simple_sprite if enemy['type'] == 0 else self.enemy_hard_sprite
-            
-            # Поворачиваем спрайт в зависимости от направления
-            direction = enemy.get('direction', 2)
-            
-            if direction == 0:  # up
-                sprite = pygame.transform.rotate(base_sprite, 0)
-            elif direction == 1:  # right
-                sprite = pygame.transform.rotate(base_sprite, -90)
-            elif direction == 2:  # down (базовое)
-                sprite = base_sprite
-            elif direction == 3:  # left
-                sprite = pygame.transform.rotate(base_sprite, 90)
-            else:
-                sprite = base_sprite
-            
-            rect = sprite.get_rect(center=(x, y_screen))
-            self.screen.blit(sprite, rect.topleft)
+        """Рисуем врагов из данных STM32 (структурный массив ENEMY_DTYPE)"""
+        ys = enemies['y'] - camera_y
+        visible = (ys >= -100) & (ys <= SCREEN_HEIGHT + 100)
+        
+        blits = []
+        for x, y_screen, enemy_type, direction in zip(enemies['x'][visible].astype(int).tolist(),
+                                                       ys[visible].astype(int).tolist(),
+                                                       enemies['type'][visible].tolist(),
+                                                       enemies['direction'][visible].tolist()):
+            sprite = self._enemy_sprite(enemy_type, direction)
+            blits.append((sprite, sprite.get_rect(center=(x, y_screen))))
+        self.screen.blits(blits, doreturn=False)
     
     def draw_projectiles(self, projectiles, camera_y):
-        """Рисуем снаряды"""
-        for proj in projectiles:
-            x = int(proj['x'])
-            y_screen = int(proj['y'] - camera_y)
-            
-            color = PROJECTILE_COLOR_PLAYER if proj['is_player_shot'] else PROJECTILE_COLOR_ENEMY
-            pygame.draw.circle(self.screen, color, (x, y_screen), PROJECTILE_RADIUS)
+        """Рисуем снаряды (структурный массив PROJECTILE_DTYPE)"""
+        radius = PROJECTILE_RADIUS
+        xs = projectiles['x'].astype(int).tolist()
+        ys = (projectiles['y'] - camera_y).astype(int).tolist()
+        owners = projectiles['is_player_shot'].tolist()
+        
+        self.screen.blits([
+            (self.projectile_sprites[owner != 0], (x - radius, y - radius))
+            for x, y, owner in zip(xs, ys, owners)
+        ], doreturn=False)
     
     def draw_player(self, player_x, player_y, player_angle, camera_y):
         """Рисуем игрока"""
@@ -221,7 +230,7 @@ class GameRenderer:
         self.screen.blit(stats_text, (UI_PADDING, SCREEN_HEIGHT - 40))
         
         # Информация о водоворотах
-        active_whirlpools = sum(1 for w in game_state.whirlpools if not w['used'])
+        active_whirlpools = int(np.count_nonzero(game_state.whirlpools['used'] == 0))
         if whirlpool_count > 0:
             whirlpool_info = self.small_font.render(
                 f"🌀 Активных водоворотов: {active_whirlpools}/{whirlpool_count}", 
@@ -229,8 +238,8 @@ class GameRenderer:
             self.screen.blit(whirlpool_info, (UI_PADDING, SCREEN_HEIGHT - 70))
         
         # Информация о врагах
-        simple_enemies = sum(1 for e in game_state.enemies if e['type'] == 0)
-        hard_enemies = sum(1 for e in game_state.enemies if e['type'] == 1)
+        simple_enemies = int(np.count_nonzero(game_state.enemies['type'] == 0))
+        hard_enemies = int(np.count_nonzero(game_state.enemies['type'] == 1))
         if enemy_count > 0:
             enemy_info = self.small_font.render(
                 f"⚔️ Враги: {simple_enemies} простых | {hard_enemies} серьезных", 
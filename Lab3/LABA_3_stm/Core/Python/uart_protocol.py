@@ -2,70 +2,431 @@
 
 import serial
 import struct
+import numpy as np
+from crc8 import crc8
+from frame_parser import FrameParser, encode_frame, FRAMING_END, FRAMING_LENGTH
+from tx_queue import TxQueue, TX_PRIORITY_HIGH, TX_PRIORITY_LOW
 import pygame
-from typing import Optional, List
+from typing import Optional
 from dataclasses import dataclass
 from config import *
 
 
 import logging
-import struct
+import logging.handlers
+import queue
+import time
+
+# Уровни диагностики приёма (UART_DIAG_LEVEL в config.py)
+DIAG_OFF = 0       # ничего не форматируется и не пишется
+DIAG_ERRORS = 1    # ошибки CRC/разбора, мусор, переполнение буфера
+DIAG_PACKETS = 2   # + строка на каждый пакет
+DIAG_FULL = 3      # + полный разбор с hex-дампом: каждый N-й пакет и пакеты с ошибкой,
+                   #   не чаще UART_DIAG_DUMP_INTERVAL
 
-# Настройка логгеров
 logger = logging.getLogger("game_comm")
 logger.setLevel(logging.DEBUG)
+logger.propagate = False
+
+_log_listener = None
+
+
+def start_logging():
+    """Асинхронный лог: в потоке игры запись только кладётся в очередь.
+
+    Файлы game_info.log/game_errors.log и консоль обслуживает QueueListener
+    в своём потоке; файлы открываются здесь, а не при импорте модуля.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    # INFO логгер (успешные пакеты)
+    info_handler = logging.FileHandler('game_info.log', delay=True)
+    info_handler.setLevel(logging.INFO)
+    info_handler.setFormatter(formatter)
+
+    # ERROR логгер (полный разбор ошибок)
+    error_handler = logging.FileHandler('game_errors.log', delay=True)
+    error_handler.setLevel(logging.ERROR)
+    error_handler.setFormatter(formatter)
+
+    # Консольный логгер для критических ошибок
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+    console_handler.setFormatter(formatter)
 
-# Форматтер
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, info_handler, error_handler, console_handler, respect_handler_level=True
+    )
+    _log_listener.start()
 
-# INFO логгер (успешные пакеты)
-info_handler = logging.FileHandler('game_info.log')
-info_handler.setLevel(logging.INFO)
-info_handler.setFormatter(formatter)
 
-# ERROR логгер (полный разбор ошибок)
-error_handler = logging.FileHandler('game_errors.log')
-error_handler.setLevel(logging.ERROR)
-error_handler.setFormatter(formatter)
+def stop_logging():
+    """Дописать очередь и закрыть файлы"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    _log_listener = None
 
-# Консольный логгер для критических ошибок
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.WARNING)
-console_handler.setFormatter(formatter)
 
-logger.addHandler(info_handler)
-logger.addHandler(error_handler)
-logger.addHandler(console_handler)
+def _hex_dump(data, limit=100):
+    """Строки hex-дампа первых limit байт"""
+    lines = []
+    for i in range(0, min(limit, len(data)), 16):
+        chunk = bytes(data[i:i+16])
+        hex_str = ' '.join(f'{b:02X}' for b in chunk)
+        ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in chunk)
+        lines.append(f"  {i:04X}: {hex_str:<48} | {ascii_str}")
+    return lines
+
+
+# === Кодеки GAME_STATE ===
+# Заголовок и хвост - заранее собранные struct.Struct, массивы объектов
+# лежат в пакете подряд и читаются одним np.frombuffer в структурный массив
+PLAYER_STRUCT = struct.Struct('<fffhHH')   # x, y, angle, health, score, cooldown
+TAIL_STRUCT = struct.Struct('<fI')         # camera_y, frame_counter
+
+ENEMY_DTYPE = np.dtype([('type', 'u1'), ('x', '<f4'), ('y', '<f4'), ('health', 'u1'), ('direction', 'u1')])
+PROJECTILE_DTYPE = np.dtype([('x', '<f4'), ('y', '<f4'), ('is_player_shot', 'u1')])
+WHIRLPOOL_DTYPE = np.dtype([('x', '<f4'), ('y', '<f4'), ('used', 'u1')])
+
+
+def _unpack_entities(packet_data, offset, dtype, limit):
+    """Байт количества + массив записей dtype; возвращает (массив, количество из пакета, новый offset)"""
+    count = packet_data[offset]
+    offset += 1
+    n = min(count, limit)
+    end = offset + n * dtype.itemsize
+    if end > len(packet_data):
+        raise struct.error(f"нужно {end} байт, в пакете {len(packet_data)}")
+    # copy(): кадр - окно в кольцевой буфер приёма, который будет перезаписан
+    entities = np.frombuffer(packet_data, dtype=dtype, count=n, offset=offset).copy()
+    return entities, count, end
 
 
 @dataclass
 class GameStateFromSTM32:
-    """Структура состояния игры от STM32"""
+    """Структура состояния игры от STM32.
+
+    enemies, projectiles, whirlpools - структурные массивы NumPy
+    (ENEMY_DTYPE, PROJECTILE_DTYPE, WHIRLPOOL_DTYPE), поля - столбцы:
+    state.enemies['x'], state.whirlpools['used'].
+    """
     player_x: float
     player_y: float
     player_angle: float
     player_health: int
     player_score: int
     player_shoot_cooldown: int
-    enemies: List[dict]
-    projectiles: List[dict]
-    whirlpools: List[dict]
+    enemies: np.ndarray
+    projectiles: np.ndarray
+    whirlpools: np.ndarray
     camera_y: float
     frame_counter: int
 
 
+def decode_game_state(packet_data, offset):
+    """Разбор данных GAME_STATE с offset; возвращает (состояние, offset после данных).
+
+    При нехватке байт - struct.error.
+    """
+    (player_x, player_y, player_angle, player_health, player_score,
+     player_shoot_cooldown) = PLAYER_STRUCT.unpack_from(packet_data, offset)
+    offset += PLAYER_STRUCT.size
+
+    enemies, _, offset = _unpack_entities(packet_data, offset, ENEMY_DTYPE, MAX_ENEMIES_IN_PACKET)
+    projectiles, _, offset = _unpack_entities(packet_data, offset, PROJECTILE_DTYPE, MAX_PROJECTILES_IN_PACKET)
+    whirlpools, _, offset = _unpack_entities(packet_data, offset, WHIRLPOOL_DTYPE, MAX_WHIRLPOOLS_IN_PACKET)
+
+    camera_y, frame_counter = TAIL_STRUCT.unpack_from(packet_data, offset)
+    offset += TAIL_STRUCT.size
+
+    state = GameStateFromSTM32(
+        player_x, player_y, player_angle, player_health, player_score, player_shoot_cooldown,
+        enemies, projectiles, whirlpools, camera_y, frame_counter
+    )
+    return state, offset
+
+
+
+# === Ключевые и дельта-кадры ===
+# Оба кадра начинаются с DELTA_HEADER_STRUCT (seq, camera_y, frame_counter).
+# KEYFRAME: игрок как в GAME_STATE, маски занятых слотов, затем записи
+#   ENEMY/PROJECTILE/WHIRLPOOL_DTYPE занятых слотов по возрастанию номера.
+# DELTA: игрок в int16, пары масок (занятые, изменённые) по видам, затем
+#   записи Q_*_DTYPE только изменённых слотов; x и y - в 1/DELTA_COORD_SCALE
+#   пикселя, y относительно camera_y. Слот, пропавший из маски занятых,
+#   освобождён. Дельта применяется только к кадру seq - 1.
+DELTA_HEADER_STRUCT = struct.Struct('<HfI')      # seq, camera_y, frame_counter
+KEYFRAME_MASKS_STRUCT = struct.Struct('<BIB')    # слоты врагов, снарядов, водоворотов
+DELTA_PLAYER_STRUCT = struct.Struct('<hhhhHH')   # x, y - camera_y, angle, health, score, cooldown
+DELTA_MASKS_STRUCT = struct.Struct('<BBIIBB')    # (занятые, изменённые) по каждому виду
+
+Q_ENEMY_DTYPE = np.dtype([('type', 'u1'), ('x', '<i2'), ('y', '<i2'), ('health', 'u1'), ('direction', 'u1')])
+Q_PROJECTILE_DTYPE = np.dtype([('x', '<i2'), ('y', '<i2'), ('is_player_shot', 'u1')])
+Q_WHIRLPOOL_DTYPE = np.dtype([('x', '<i2'), ('y', '<i2'), ('used', 'u1')])
+
+# (полный dtype, квантованный dtype, число слотов) в порядке пакета
+ENTITY_KINDS = (
+    (ENEMY_DTYPE, Q_ENEMY_DTYPE, MAX_ENEMIES_IN_PACKET),
+    (PROJECTILE_DTYPE, Q_PROJECTILE_DTYPE, MAX_PROJECTILES_IN_PACKET),
+    (WHIRLPOOL_DTYPE, Q_WHIRLPOOL_DTYPE, MAX_WHIRLPOOLS_IN_PACKET),
+)
+
+_SLOT_BITS = 1 << np.arange(32, dtype=np.uint32)
+_INT16_MAX = 32767
+
+
+def _mask_slots(mask, slots):
+    """Битовая маска -> булев массив слотов"""
+    return (mask & _SLOT_BITS[:slots]) != 0
+
+
+def _slots_mask(flags):
+    """Булев массив слотов -> битовая маска"""
+    return int(_SLOT_BITS[:len(flags)][flags].sum())
+
+
+def _quantize(records, camera_y, q_dtype):
+    """Записи полного dtype -> Q_*_DTYPE; None, если координата не влезает в int16"""
+    x = np.rint(records['x'] * DELTA_COORD_SCALE)
+    y = np.rint((records['y'] - camera_y) * DELTA_COORD_SCALE)
+    if len(records) and max(np.abs(x).max(), np.abs(y).max()) > _INT16_MAX:
+        return None
+    q = np.empty(len(records), q_dtype)
+    for name in q_dtype.names:
+        q[name] = records[name] if name not in ('x', 'y') else 0
+    q['x'] = x
+    q['y'] = y
+    return q
+
+
+def _dequantize(q, camera_y, dtype):
+    """Q_*_DTYPE -> записи полного dtype (ровно так же в приёмнике и в энкодере)"""
+    records = np.empty(len(q), dtype)
+    for name in dtype.names:
+        records[name] = q[name]
+    records['x'] = q['x'] / DELTA_COORD_SCALE
+    records['y'] = q['y'] / DELTA_COORD_SCALE + camera_y
+    return records
+
+
+class GameStateDeltaDecoder:
+    """Сборка GameStateFromSTM32 из ключевых и дельта-кадров.
+
+    Держит таблицы слотов (полные dtype) и маски занятости: дельта
+    переписывает только свои слоты, состояние - копия занятых записей.
+    После пропуска seq дельты отбрасываются (need_keyframe), пока не
+    придёт ключевой кадр.
+    """
+    
+    def __init__(self):
+        self.tables = [np.zeros(slots, dtype) for dtype, _, slots in ENTITY_KINDS]
+        self.active = [np.zeros(slots, bool) for _, _, slots in ENTITY_KINDS]
+        self.player = None
+        self.seq = None
+        self.need_keyframe = True
+        
+        # Статистика
+        self.keyframes = 0
+        self.deltas = 0
+        self.lost_frames = 0
+        self.dropped_deltas = 0
+    
+    def apply(self, packet_type, packet_data, offset):
+        """Применение кадра; возвращает (состояние или None, offset после данных).
+
+        При нехватке байт - struct.error, таблицы не меняются.
+        """
+        seq, camera_y, frame_counter = DELTA_HEADER_STRUCT.unpack_from(packet_data, offset)
+        offset += DELTA_HEADER_STRUCT.size
+        
+        if packet_type == PKT_GAME_KEYFRAME:
+            offset = self._apply_keyframe(packet_data, offset)
+            self.keyframes += 1
+            self.need_keyframe = False
+        else:
+            if self.need_keyframe or seq != (self.seq + 1) & 0xFFFF:
+                if not self.need_keyframe:
+                    self.lost_frames += (seq - self.seq - 1) & 0xFFFF
+                    self.need_keyframe = True
+                self.dropped_deltas += 1
+                return None, offset
+            offset = self._apply_delta(packet_data, offset, camera_y)
+            self.deltas += 1
+        
+        self.seq = seq
+        enemies, projectiles, whirlpools = (table[active] for table, active in zip(self.tables, self.active))
+        state = GameStateFromSTM32(*self.player, enemies, projectiles, whirlpools, camera_y, frame_counter)
+        return state, offset
+    
+    def _apply_keyframe(self, packet_data, offset):
+        player = PLAYER_STRUCT.unpack_from(packet_data, offset)
+        offset += PLAYER_STRUCT.size
+        masks = KEYFRAME_MASKS_STRUCT.unpack_from(packet_data, offset)
+        offset += KEYFRAME_MASKS_STRUCT.size
+        
+        masks = [mask & ((1 << slots) - 1) for mask, (_, _, slots) in zip(masks, ENTITY_KINDS)]
+        end = offset + sum(mask.bit_count() * dtype.itemsize for mask, (dtype, _, _) in zip(masks, ENTITY_KINDS))
+        if end > len(packet_data):
+            raise struct.error(f"KEYFRAME: нужно {end} байт, в пакете {len(packet_data)}")
+        
+        self.player = player
+        for table, active, mask, (dtype, _, slots) in zip(self.tables, self.active, masks, ENTITY_KINDS):
+            active[:] = _mask_slots(mask, slots)
+            n = mask.bit_count()
+            table[active] = np.frombuffer(packet_data, dtype=dtype, count=n, offset=offset)
+            offset += n * dtype.itemsize
+        return offset
+    
+    def _apply_delta(self, packet_data, offset, camera_y):
+        qx, qy, qangle, health, score, cooldown = DELTA_PLAYER_STRUCT.unpack_from(packet_data, offset)
+        offset += DELTA_PLAYER_STRUCT.size
+        masks = DELTA_MASKS_STRUCT.unpack_from(packet_data, offset)
+        offset += DELTA_MASKS_STRUCT.size
+        
+        pairs = []
+        end = offset
+        for i, (_, q_dtype, slots) in enumerate(ENTITY_KINDS):
+            active_mask = masks[2 * i] & ((1 << slots) - 1)
+            changed_mask = masks[2 * i + 1] & active_mask
+            pairs.append((active_mask, changed_mask))
+            end += changed_mask.bit_count() * q_dtype.itemsize
+        if end > len(packet_data):
+            raise struct.error(f"DELTA: нужно {end} байт, в пакете {len(packet_data)}")
+        
+        self.player = (qx / DELTA_COORD_SCALE, qy / DELTA_COORD_SCALE + camera_y, qangle / DELTA_ANGLE_SCALE,
+                       health, score, cooldown)
+        for table, active, (active_mask, changed_mask), (dtype, q_dtype, slots) in zip(
+                self.tables, self.active, pairs, ENTITY_KINDS):
+            active[:] = _mask_slots(active_mask, slots)
+            n = changed_mask.bit_count()
+            q = np.frombuffer(packet_data, dtype=q_dtype, count=n, offset=offset)
+            table[_mask_slots(changed_mask, slots)] = _dequantize(q, camera_y, dtype)
+            offset += n * q_dtype.itemsize
+        return offset
+
+
+class GameStateDeltaEncoder:
+    """Эталонный энкодер ключевых и дельта-кадров (для проверки приёмника
+    и как образец для protocol.c).
+
+    На входе - таблицы слотов прошивки (массивы полного dtype на все слоты)
+    и булевы маски занятости. sent - таблицы в том виде, в каком их
+    восстановил приёмник: слот уходит в дельту, только если разошёлся с ними
+    больше чем на квант, поэтому неподвижные объекты не шлются при движении камеры.
+    """
+    
+    def __init__(self, keyframe_interval=DELTA_KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.since_keyframe = None   # None - следующий кадр ключевой
+        self.sent = [np.zeros(slots, dtype) for dtype, _, slots in ENTITY_KINDS]
+        self.sent_active = [np.zeros(slots, bool) for _, _, slots in ENTITY_KINDS]
+    
+    def request_keyframe(self):
+        """Реакция на PKT_REQUEST_KEYFRAME"""
+        self.since_keyframe = None
+    
+    def encode(self, player, camera_y, frame_counter, tables, active):
+        """Кадр текущего состояния; возвращает (тип пакета, данные пакета).
+
+        player - (x, y, angle, health, score, cooldown) как в PLAYER_STRUCT.
+        """
+        camera_y = float(np.float32(camera_y))   # приёмник видит camera_y после float32
+        header = DELTA_HEADER_STRUCT.pack(self.seq, camera_y, frame_counter)
+        self.seq = (self.seq + 1) & 0xFFFF
+        
+        payload = None
+        if self.since_keyframe is not None and self.since_keyframe < self.keyframe_interval:
+            payload = self._encode_delta(player, camera_y, tables, active)
+        
+        if payload is None:
+            self.since_keyframe = 0
+            return PKT_GAME_KEYFRAME, header + self._encode_keyframe(player, tables, active)
+        self.since_keyframe += 1
+        return PKT_GAME_DELTA, header + payload
+    
+    def _encode_keyframe(self, player, tables, active):
+        masks = []
+        records = []
+        for table, flags, sent, sent_active in zip(tables, active, self.sent, self.sent_active):
+            masks.append(_slots_mask(flags))
+            records.append(table[flags].tobytes())
+            sent[:] = table
+            sent_active[:] = flags
+        return PLAYER_STRUCT.pack(*player) + KEYFRAME_MASKS_STRUCT.pack(*masks) + b''.join(records)
+    
+    def _encode_delta(self, player, camera_y, tables, active):
+        """Дельта к прошлому кадру; None - не влезает в int16, нужен ключевой"""
+        x, y, angle, health, score, cooldown = player
+        q_player = (round(x * DELTA_COORD_SCALE), round((y - camera_y) * DELTA_COORD_SCALE),
+                    round(angle * DELTA_ANGLE_SCALE))
+        if max(abs(v) for v in q_player) > _INT16_MAX:
+            return None
+        
+        tolerance = 1.0 / DELTA_COORD_SCALE
+        masks = []
+        records = []
+        updates = []
+        for table, flags, sent, sent_active, (dtype, q_dtype, _) in zip(
+                tables, active, self.sent, self.sent_active, ENTITY_KINDS):
+            differs = (np.abs(table['x'] - sent['x']) > tolerance) | (np.abs(table['y'] - sent['y']) > tolerance)
+            for name in dtype.names:
+                if name not in ('x', 'y'):
+                    differs |= table[name] != sent[name]
+            changed = flags & (~sent_active | differs)
+            
+            q = _quantize(table[changed], camera_y, q_dtype)
+            if q is None:
+                return None
+            masks += [_slots_mask(flags), _slots_mask(changed)]
+            records.append(q.tobytes())
+            updates.append((changed, _dequantize(q, camera_y, dtype)))
+        
+        # Кадр собран целиком - только теперь запоминаем, что знает приёмник
+        for sent, sent_active, flags, (changed, values) in zip(self.sent, self.sent_active, active, updates):
+            sent[changed] = values
+            sent_active[:] = flags
+        
+        return (DELTA_PLAYER_STRUCT.pack(*q_player, health, score, cooldown)
+                + DELTA_MASKS_STRUCT.pack(*masks) + b''.join(records))
+
 class UARTProtocol:
     """Класс для работы с UART протоколом"""
     
-    def __init__(self, port, baudrate, debug=False):
+    def __init__(self, port, baudrate, debug=False, diag_level=UART_DIAG_LEVEL):
         self.debug = debug
-        self.packet_buffer = b''
+        self.diag_level = diag_level
+        self._last_dump_time = float('-inf')
+        if diag_level > DIAG_OFF:
+            start_logging()
+        self.parser = FrameParser(START_BYTE, END_BYTE,
+                                  min_length=UART_MIN_PACKET_SIZE,
+                                  max_length=UART_MAX_PACKET_SIZE,
+                                  capacity=UART_RX_BUFFER_SIZE,
+                                  framing=UART_FRAMING)
         self.sent_packets = 0
         self.received_packets = 0
         self.error_packets = 0
         self.last_packet_time = 0
         self.crc_error_count = 0
         
+        # Сборка состояния из ключевых и дельта-кадров
+        self.delta_decoder = GameStateDeltaDecoder()
+        self._last_keyframe_request = float('-inf')
+        self._end_framing_warned = False
+        
         # НОВОЕ: Статистика бенчмарка
         self.last_benchmark_stats = None
         
@@ -77,19 +438,9 @@ class UARTProtocol:
         except Exception as e:
             print(f"✗ Ошибка подключения UART: {e}")
             self.ser = None
-    
-    def calculate_crc(self, data):
-        """Вычисление CRC8"""
-        crc = 0
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ 0x07
-                else:
-                    crc <<= 1
-                crc &= 0xFF
-        return crc
+        
+        # Передача через очередь: send_* не ждут порт
+        self.tx = TxQueue(self.ser, baudrate) if self.ser else None
     
     def _log_packet(self, direction, packet_type, details=""):
         """Логирование пакетов"""
@@ -110,6 +461,9 @@ class UARTProtocol:
             PKT_INIT_GAME: "INIT_GAME",
             PKT_ADD_SHORE: "ADD_SHORE",
             PKT_DEBUG: "DEBUG",
+            PKT_GAME_KEYFRAME: "GAME_KEYFRAME",
+            PKT_GAME_DELTA: "GAME_DELTA",
+            PKT_REQUEST_KEYFRAME: "REQUEST_KEYFRAME",
             0xFF: "BENCHMARK"
         }
         return names.get(packet_type, f"UNKNOWN_{packet_type:02X}")
@@ -119,12 +473,12 @@ class UARTProtocol:
         if not self.ser:
             return
         
-        packet = struct.pack('<BBfff', PKT_ADD_OBSTACLE, obstacle_type, x, y, radius)
-        crc = self.calculate_crc(packet)
-        full_packet = struct.pack('<B', START_BYTE) + packet + struct.pack('<BB', crc, END_BYTE)
+        payload = struct.pack('<Bfff', obstacle_type, x, y, radius)
+        full_packet = encode_frame(PKT_ADD_OBSTACLE, payload, UART_FRAMING)
         
         try:
-            self.ser.write(full_packet)
+            if not self.tx.put(full_packet, TX_PRIORITY_LOW):
+                raise BufferError("очередь передачи переполнена")
             self.sent_packets += 1
             
             if self.debug:
@@ -142,12 +496,12 @@ class UARTProtocol:
             return
         
         side_byte = 0 if side == 'left' else 1
-        packet = struct.pack('<BBff', PKT_ADD_SHORE, side_byte, start_y, end_y)
-        crc = self.calculate_crc(packet)
-        full_packet = struct.pack('<B', START_BYTE) + packet + struct.pack('<BB', crc, END_BYTE)
+        payload = struct.pack('<Bff', side_byte, start_y, end_y)
+        full_packet = encode_frame(PKT_ADD_SHORE, payload, UART_FRAMING)
         
         try:
-            self.ser.write(full_packet)
+            if not self.tx.put(full_packet, TX_PRIORITY_LOW):
+                raise BufferError("очередь передачи переполнена")
             self.sent_packets += 1
             
             if self.debug:
@@ -162,12 +516,13 @@ class UARTProtocol:
         if not self.ser:
             return
         
-        packet = struct.pack('<B', PKT_INIT_GAME)
-        crc = self.calculate_crc(packet)
-        full_packet = struct.pack('<B', START_BYTE) + packet + struct.pack('<BB', crc, END_BYTE)
+        full_packet = encode_frame(PKT_INIT_GAME, b'', UART_FRAMING)
         
         try:
-            self.ser.write(full_packet)
+            # Неотправленные данные старого мира после INIT_GAME не нужны
+            self.tx.discard(TX_PRIORITY_LOW)
+            if not self.tx.put(full_packet, TX_PRIORITY_HIGH):
+                raise BufferError("очередь передачи переполнена")
             self.sent_packets += 1
             
             if self.debug:
@@ -178,49 +533,47 @@ class UARTProtocol:
             self.error_packets += 1
             print(f"✗ Ошибка отправки init: {e}")
     
+    def send_request_keyframe(self):
+        """Запрос ключевого кадра состояния"""
+        if not self.ser:
+            return
+        
+        full_packet = encode_frame(PKT_REQUEST_KEYFRAME, b'', UART_FRAMING)
+        
+        try:
+            if not self.tx.put(full_packet, TX_PRIORITY_HIGH):
+                raise BufferError("очередь передачи переполнена")
+            self.sent_packets += 1
+            
+            if self.debug:
+                self._log_packet("out", PKT_REQUEST_KEYFRAME, f"(после seq {self.delta_decoder.seq})")
+        except Exception as e:
+            self.error_packets += 1
+            print(f"✗ Ошибка отправки запроса ключевого кадра: {e}")
+    
     def receive_debug_packet(self) -> Optional[dict]:
         """Получение debug-пакета (включая бенчмарк)"""
         if not self.ser:
             return None
         
         try:
-            if self.ser.in_waiting > 0:
-                self.packet_buffer += self.ser.read(self.ser.in_waiting)
+            self.parser.read_serial(self.ser)
             
-            while len(self.packet_buffer) > 0:
-                start_pos = self.packet_buffer.find(bytes([START_BYTE]))
-                if start_pos == -1:
-                    if len(self.packet_buffer) > 100:
-                        self.packet_buffer = self.packet_buffer[-100:]
-                    return None
-                
-                self.packet_buffer = self.packet_buffer[start_pos:]
-                
-                if len(self.packet_buffer) < 10:
-                    return None
-                
-                if self.packet_buffer[1] != PKT_DEBUG:
-                    self.packet_buffer = self.packet_buffer[1:]
+            for packet_data in self.parser.frames():
+                if packet_data[1] != PKT_DEBUG:
                     continue
                 
-                end_pos = self.packet_buffer.find(bytes([END_BYTE]))
-                if end_pos == -1:
-                    return None
-                
-                packet_data = self.packet_buffer[:end_pos + 1]
-                self.packet_buffer = self.packet_buffer[end_pos + 1:]
-                
                 if len(packet_data) < 20:
                     continue
                 
-                offset = 2
+                offset = self.parser.header_size
                 
                 packet_type = packet_data[offset]
                 
                 # Проверка: это бенчмарк-пакет?
                 if packet_type == 0xFF:
                     # Парсим бенчмарк-сообщение
-                    message_bytes = packet_data[offset + 6:offset + 38]
+                    message_bytes = bytes(packet_data[offset + 6:offset + 38])
                     try:
                         message = message_bytes.decode('utf-8', errors='ignore').rstrip('\x00')
                         self.last_benchmark_stats = message
@@ -236,7 +589,7 @@ class UARTProtocol:
                 crc_calc = packet_data[offset + 4]
                 success = packet_data[offset + 5]
                 
-                message_bytes = packet_data[offset + 6:offset + 38]
+                message_bytes = bytes(packet_data[offset + 6:offset + 38])
                 try:
                     message = message_bytes.decode('utf-8', errors='ignore').rstrip('\x00')
                 except:
@@ -257,228 +610,183 @@ class UARTProtocol:
             return None
     
     def receive_game_state(self) -> Optional[GameStateFromSTM32]:
-        """Получение состояния игры от STM32 с детальной диагностикой (включая парсинг при ошибках CRC)"""
+        """Получение состояния игры от STM32.
+
+        Пакет с ошибкой CRC всё равно разбирается (для отладки прошивки).
+        Диагностика - по self.diag_level (DIAG_*); при DIAG_OFF строки
+        не форматируются вовсе.
+        """
         if not self.ser:
             return None
         
+        diag = self.diag_level
+        
         try:
             if self.ser.in_waiting > 0:
                 bytes_to_read = min(self.ser.in_waiting, 256)
-                self.packet_buffer += self.ser.read(bytes_to_read)
+                dropped = self.parser.feed(self.ser.read(bytes_to_read))
                 
-                if len(self.packet_buffer) > 4096:
-                    print(f"⚠️ Буфер переполнен! Размер: {len(self.packet_buffer)} байт")
-                    self.packet_buffer = self.packet_buffer[-2048:]
+                if dropped:
                     self.error_packets += 1
+                    if diag >= DIAG_ERRORS:
+                        logger.warning("Буфер приёма переполнен, затёрто %d байт", dropped)
             
-            packets_processed = 0
-            max_packets_per_frame = 3
+            skipped = self.parser.skipped_bytes
             
-            while len(self.packet_buffer) > 0 and packets_processed < max_packets_per_frame:
-                start_pos = self.packet_buffer.find(bytes([START_BYTE]))
-                
-                if start_pos == -1:
-                    if self.debug and len(self.packet_buffer) > 0:
-                        print(f"⚠️ START_BYTE не найден. Буфер размер: {len(self.packet_buffer)}")
-                        print(f"   Первые 20 байт: {self.packet_buffer[:20].hex()}")
-                    
-                    if self.crc_error_count > 5:
-                        self.packet_buffer = b''
-                        self.crc_error_count = 0
-                        if self.debug:
-                            print("⚠️ Много ошибок CRC, буфер полностью сброшен")
-                    return None
-                
-                # Пропускаем мусор до START_BYTE
-                if start_pos > 0 and self.debug:
-                    print(f"⚠️ Пропущено {start_pos} байт мусора до START_BYTE")
-                    print(f"   Мусор: {self.packet_buffer[:start_pos].hex()}")
-                
-                self.packet_buffer = self.packet_buffer[start_pos:]
-                
-                if len(self.packet_buffer) < 10:
-                    return None
-                
-                end_pos = self.packet_buffer.find(bytes([END_BYTE]))
-                
-                if end_pos == -1:
-                    if self.debug and len(self.packet_buffer) > 100:
-                        print(f"⚠️ END_BYTE не найден. Буфер: {len(self.packet_buffer)} байт")
-                        print(f"   Начало пакета: {self.packet_buffer[:50].hex()}")
-                    return None
-                
-                packet_data = self.packet_buffer[:end_pos + 1]
-                self.packet_buffer = self.packet_buffer[end_pos + 1:]
-                
-                if len(packet_data) < 10:
-                    if self.debug:
-                        print(f"⚠️ Пакет слишком маленький: {len(packet_data)} байт")
-                        print(f"   Данные: {packet_data.hex()}")
-                    continue
-                
-                # === ДЕТАЛЬНЫЙ АНАЛИЗ ПАКЕТА ===
-                print(f"\n{'='*80}")
-                print(f"[PACKET ANALYSIS] Размер: {len(packet_data)} байт (CRC может быть неверным!)")
-                print(f"{'='*80}")
-                
-                # Показываем структуру пакета
-                print(f"START_BYTE: 0x{packet_data[0]:02X} (ожидается 0x{START_BYTE:02X})")
-                print(f"PACKET_TYPE: 0x{packet_data[1]:02X} (ожидается 0x{PKT_GAME_STATE:02X})")
-                print(f"END_BYTE: 0x{packet_data[-1]:02X} (ожидается 0x{END_BYTE:02X})")
+            # Кадры START..END из кольцевого буфера (memoryview, без копий);
+            # незаконченный кадр остаётся в буфере до следующего вызова
+            for packet_data in self.parser.frames():
+                if diag >= DIAG_ERRORS and self.parser.skipped_bytes > skipped:
+                    logger.warning("Пропущено %d байт мусора до START_BYTE", self.parser.skipped_bytes - skipped)
+                skipped = self.parser.skipped_bytes
                 
                 crc_received = packet_data[-2]
-                crc_calculated = self.calculate_crc(packet_data[1:-2])
-                
-                print(f"CRC: received=0x{crc_received:02X}, calculated=0x{crc_calculated:02X}", end="")
-                if crc_received == crc_calculated:
-                    print(" ✓ OK")
-                else:
-                    print(" ✗ MISMATCH (ПРОДОЛЖАЕМ ПАРСИНГ ДЛЯ ОТЛАДКИ!)")
-                
-                # Hex dump первых 100 байт
-                print(f"\nHex dump (первые 100 байт):")
-                for i in range(0, min(100, len(packet_data)), 16):
-                    hex_str = ' '.join(f'{b:02X}' for b in packet_data[i:i+16])
-                    ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in packet_data[i:i+16])
-                    print(f"  {i:04X}: {hex_str:<48} | {ascii_str}")
+                crc_calculated = crc8(packet_data[1:-2])
+                crc_ok = crc_received == crc_calculated
                 
-                # === КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: УБРАН CONTINUE ПОСЛЕ ОШИБКИ CRC ===
-                if crc_received != crc_calculated:
+                if not crc_ok:
                     self.crc_error_count += 1
                     self.error_packets += 1
-                    
-                    print(f"\n❌ CRC ОШИБКА #{self.crc_error_count} (НО ПРОДОЛЖАЕМ ПАРСИНГ!)")
-                    print(f"   Размер данных для CRC: {len(packet_data[1:-2])} байт")
-                    print(f"   Полный пакет: {packet_data.hex()}")
+                    if diag >= DIAG_ERRORS:
+                        logger.error("CRC ошибка #%d: received=0x%02X, calculated=0x%02X, размер %d байт",
+                                     self.crc_error_count, crc_received, crc_calculated, len(packet_data))
                     
                     if self.crc_error_count > 10:
-                        self.packet_buffer = b''
+                        self.parser.reset()
                         self.crc_error_count = 0
-                        print("⚠️ Критическое количество ошибок CRC, полный сброс буфера")
-                    
-                    # УБРАНО: continue  <-- ЭТО БЫЛО ПРЕПЯТСТВИЕМ ДЛЯ ПАРСИНГА
-                    print(f"{'='*80}\n")
+                        if diag >= DIAG_ERRORS:
+                            logger.warning("Критическое количество ошибок CRC, полный сброс буфера")
                 else:
                     self.crc_error_count = max(0, self.crc_error_count - 1)
                 
-                # === ПРОДОЛЖАЕМ ПАРСИНГ ВСЕГДА (ДАЖЕ ПРИ ОШИБКЕ CRC) ===
-                if packet_data[1] != PKT_GAME_STATE:
-                    print(f"⚠️ Неожиданный тип пакета: 0x{packet_data[1]:02X} (НО ПРОБУЕМ ПАРСИНГ)")
-                    print(f"{'='*80}\n")
-                
-                # === ПАРСИНГ ДАННЫХ С ДЕТАЛЬНЫМ ВЫВОДОМ (ВСЕГДА!) ===
-                offset = 2
+                packet_type = packet_data[1]
+                if packet_type == PKT_GAME_KEYFRAME or packet_type == PKT_GAME_DELTA:
+                    if not self._end_framing_warned and self.parser.framing == FRAMING_END:
+                        self._warn_end_framing()
+                    # Битый кадр не применяем: следующая дельта увидит пропуск seq
+                    if not crc_ok:
+                        continue
+                    decode = self.delta_decoder.apply
+                else:
+                    if packet_type != PKT_GAME_STATE and diag >= DIAG_ERRORS:
+                        logger.warning("Неожиданный тип пакета: 0x%02X (пробуем разбор)", packet_type)
+                    decode = None
                 
                 try:
-                    print(f"\n[ПАРСИНГ ДАННЫХ] (Даже при ошибке CRC)")
-                    
-                    # Player data
-                    player_x, player_y, player_angle, player_health, player_score, player_shoot_cooldown = struct.unpack(
-                        '<fffhHH', packet_data[offset:offset+18]
-                    )
-                    print(f"Player: x={player_x:.1f}, y={player_y:.1f}, angle={player_angle:.1f}°")
-                    print(f"        health={player_health}/{PLAYER_MAX_HEALTH}, score={player_score}, cooldown={player_shoot_cooldown}")
-                    offset += 18
-                    
-                    # Enemies
-                    enemy_count = packet_data[offset]
-                    print(f"Enemies: count={enemy_count} (max={MAX_ENEMIES_IN_PACKET})")
-                    offset += 1
-                    
-                    enemies = []
-                    for i in range(min(enemy_count, MAX_ENEMIES_IN_PACKET)):
-                        enemy_type, ex, ey, ehealth, direction = struct.unpack('<BffBB', packet_data[offset:offset+11])
-                        enemy_name = "Simple" if enemy_type == 0 else "Hard"
-                        dir_name = ['up', 'right', 'down', 'left'][direction] if direction < 4 else 'unknown'
-                        print(f"  Enemy {i+1}: type={enemy_name}, pos=({ex:.1f}, {ey:.1f}), hp={ehealth}, dir={dir_name}")
-                        enemies.append({
-                            'type': enemy_type, 
-                            'x': ex, 
-                            'y': ey, 
-                            'health': ehealth,
-                            'direction': direction
-                        })
-                        offset += 11
-                    
-                    # Projectiles
-                    proj_count = packet_data[offset]
-                    print(f"Projectiles: count={proj_count} (max={MAX_PROJECTILES_IN_PACKET})")
-                    offset += 1
-                    
-                    projectiles = []
-                    for i in range(min(proj_count, MAX_PROJECTILES_IN_PACKET)):
-                        px, py, is_player = struct.unpack('<ffB', packet_data[offset:offset+9])
-                        owner = "Player" if is_player else "Enemy"
-                        print(f"  Proj {i+1}: pos=({px:.1f}, {py:.1f}), owner={owner}")
-                        projectiles.append({'x': px, 'y': py, 'is_player_shot': bool(is_player)})
-                        offset += 9
-                    
-                    # Whirlpools
-                    whirlpool_count = packet_data[offset]
-                    print(f"Whirlpools: count={whirlpool_count} (max={MAX_WHIRLPOOLS_IN_PACKET})")
-                    offset += 1
-                    
-                    whirlpools = []
-                    for i in range(min(whirlpool_count, MAX_WHIRLPOOLS_IN_PACKET)):
-                        wx, wy, used = struct.unpack('<ffB', packet_data[offset:offset+9])
-                        status = "USED" if used else "active"
-                        print(f"  Whirlpool {i+1}: pos=({wx:.1f}, {wy:.1f}), status={status}")
-                        whirlpools.append({'x': wx, 'y': wy, 'used': bool(used)})
-                        offset += 9
-                    
-                    # Camera & frame
-                    camera_y, frame_counter = struct.unpack('<fI', packet_data[offset:offset+8])
-                    print(f"Camera Y: {camera_y:.1f}")
-                    print(f"Frame: {frame_counter}")
-                    offset += 8
-                    
-                    # Проверка размера
-                    expected_size = offset + 2  # +2 для CRC и END_BYTE
-                    actual_size = len(packet_data)
-                    print(f"\nPacket size check: expected={expected_size}, actual={actual_size}", end="")
-                    if expected_size == actual_size:
-                        print(" ✓")
+                    if decode is None:
+                        state, end = decode_game_state(packet_data, self.parser.header_size)
                     else:
-                        print(f" ✗ MISMATCH (diff={actual_size - expected_size})")
-                    
-                    self.received_packets += 1
-                    packets_processed += 1
-                    
-                    print(f"{'='*80}")
-                    print(f"✅ ПАКЕТ ОБРАБОТАН (даже с ошибкой CRC) #{self.received_packets}")
-                    print(f"{'='*80}\n")
-                    
-                    return GameStateFromSTM32(
-                        player_x, player_y, player_angle, player_health, player_score, player_shoot_cooldown,
-                        enemies, projectiles, whirlpools, camera_y, frame_counter
-                    )
-                
+                        state, end = decode(packet_type, packet_data, self.parser.header_size)
                 except struct.error as e:
                     self.error_packets += 1
-                    print(f"\n❌ STRUCT UNPACK ERROR: {e}")
-                    print(f"   Offset: {offset}, осталось байт: {len(packet_data) - offset}")
-                    print(f"   Данные на offset: {packet_data[offset:offset+20].hex()}")
-                    print(f"{'='*80}\n")
+                    if diag >= DIAG_ERRORS:
+                        logger.error("Ошибка разбора GAME_STATE: %s, пакет %d байт: %s",
+                                     e, len(packet_data), packet_data.hex())
                     continue
                 
-                except Exception as e:
-                    self.error_packets += 1
-                    print(f"\n❌ PARSING ERROR: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    print(f"{'='*80}\n")
+                if state is None:
+                    # Пропущен дельта-кадр: ждём ключевой
+                    self._request_keyframe()
                     continue
+                
+                self.received_packets += 1
+                
+                if diag >= DIAG_FULL and self._dump_due(crc_ok):
+                    self._log_analysis(packet_data, state, end, crc_received, crc_calculated)
+                elif diag >= DIAG_PACKETS:
+                    logger.info("GAME_STATE #%d: frame=%d, player=(%.1f, %.1f), hp=%d, врагов %d, снарядов %d, водоворотов %d",
+                                self.received_packets, state.frame_counter, state.player_x, state.player_y,
+                                state.player_health, len(state.enemies), len(state.projectiles), len(state.whirlpools))
+                
+                return state
             
             return None
         
-        except Exception as e:
+        except Exception:
             self.error_packets += 1
-            self.packet_buffer = b''
+            self.parser.reset()
             self.crc_error_count = 0
-            print(f"\n❌ КРИТИЧЕСКАЯ ОШИБКА ПРИЁМА: {e}")
-            import traceback
-            traceback.print_exc()
+            if diag >= DIAG_ERRORS:
+                logger.exception("Критическая ошибка приёма")
             return None
+    
+    def _warn_end_framing(self):
+        """KEYFRAME/DELTA под FRAMING_END: байт 0x55 в int16/float32 обрезает кадр"""
+        self._end_framing_warned = True
+        message = ("Ключевые и дельта-кадры при UART_FRAMING = 'end': кадры с байтом 0x55 "
+                   "в данных обрезаются и теряются, нужен режим 'length' (и в protocol.c)")
+        print(f"⚠ {message}")
+        if self.diag_level >= DIAG_ERRORS:
+            logger.warning(message)
+    
+    def _request_keyframe(self):
+        """Запрос ключевого кадра после потери дельты (не чаще DELTA_KEYFRAME_REQUEST_INTERVAL)"""
+        now = time.perf_counter()
+        if now - self._last_keyframe_request < DELTA_KEYFRAME_REQUEST_INTERVAL:
+            return
+        self._last_keyframe_request = now
+        if self.diag_level >= DIAG_ERRORS:
+            logger.warning("Потеря дельта-кадра после seq %s, запрос ключевого кадра", self.delta_decoder.seq)
+        self.send_request_keyframe()
+    
+    def _dump_due(self, crc_ok):
+        """Полный разбор: каждый UART_DIAG_SAMPLE_EVERY-й пакет и пакеты с ошибкой CRC,
+        но не чаще одного раза в UART_DIAG_DUMP_INTERVAL секунд"""
+        if crc_ok and self.received_packets % UART_DIAG_SAMPLE_EVERY:
+            return False
+        now = time.perf_counter()
+        if now - self._last_dump_time < UART_DIAG_DUMP_INTERVAL:
+            return False
+        self._last_dump_time = now
+        return True
+    
+    def _log_analysis(self, packet_data, state, end, crc_received, crc_calculated):
+        """Полный разбор пакета одной записью лога (форматируется только здесь)"""
+        crc_status = "OK" if crc_received == crc_calculated else "MISMATCH"
+        expected_size = end + 2  # +2 для CRC и END_BYTE
+        lines = [
+            f"[PACKET ANALYSIS] #{self.received_packets}, размер {len(packet_data)} байт",
+            f"START_BYTE: 0x{packet_data[0]:02X}, PACKET_TYPE: 0x{packet_data[1]:02X}, END_BYTE: 0x{packet_data[-1]:02X}",
+            f"CRC: received=0x{crc_received:02X}, calculated=0x{crc_calculated:02X} {crc_status}",
+            "Hex dump (первые 100 байт):",
+            *_hex_dump(packet_data),
+            f"Player: x={state.player_x:.1f}, y={state.player_y:.1f}, angle={state.player_angle:.1f}°, "
+            f"health={state.player_health}/{PLAYER_MAX_HEALTH}, score={state.player_score}, "
+            f"cooldown={state.player_shoot_cooldown}",
+            f"Enemies: {len(state.enemies)} (max={MAX_ENEMIES_IN_PACKET})",
+        ]
+        for i, (enemy_type, ex, ey, ehealth, direction) in enumerate(state.enemies.tolist()):
+            enemy_name = "Simple" if enemy_type == 0 else "Hard"
+            dir_name = ['up', 'right', 'down', 'left'][direction] if direction < 4 else 'unknown'
+            lines.append(f"  Enemy {i+1}: type={enemy_name}, pos=({ex:.1f}, {ey:.1f}), hp={ehealth}, dir={dir_name}")
+        
+        lines.append(f"Projectiles: {len(state.projectiles)} (max={MAX_PROJECTILES_IN_PACKET})")
+        for i, (px, py, is_player) in enumerate(state.projectiles.tolist()):
+            owner = "Player" if is_player else "Enemy"
+            lines.append(f"  Proj {i+1}: pos=({px:.1f}, {py:.1f}), owner={owner}")
+        
+        lines.append(f"Whirlpools: {len(state.whirlpools)} (max={MAX_WHIRLPOOLS_IN_PACKET})")
+        for i, (wx, wy, used) in enumerate(state.whirlpools.tolist()):
+            status = "USED" if used else "active"
+            lines.append(f"  Whirlpool {i+1}: pos=({wx:.1f}, {wy:.1f}), status={status}")
+        
+        lines.append(f"Camera Y: {state.camera_y:.1f}, Frame: {state.frame_counter}")
+        size_status = "OK" if expected_size == len(packet_data) else f"MISMATCH (diff={len(packet_data) - expected_size})"
+        lines.append(f"Packet size check: expected={expected_size}, actual={len(packet_data)} {size_status}")
+        
+        level = logging.INFO if crc_received == crc_calculated else logging.ERROR
+        logger.log(level, "\n".join(lines))
+    
+    def close(self):
+        """Дописать очередь передачи, закрыть порт и остановить поток логов"""
+        if self.tx:
+            self.tx.close()
+            self.tx = None
+        if self.ser:
+            self.ser.close()
+            self.ser = None
+        stop_logging()
+    
     def get_benchmark_stats(self):
         """Получить последнюю статистику бенчмарка"""
         return self.last_benchmark_stats
@@ -517,4 +825,141 @@ class UARTProtocol:
         if self.sent_packets > 0:
             success_rate = (self.received_packets / self.sent_packets) * 100
             print(f"Успешных ответов: {success_rate:.1f}%")
-        print("==================================\n")
\ No newline at end of file
+        if self.tx:
+            self.tx.print_statistics()
+        decoder = self.delta_decoder
+        if decoder.keyframes:
+            print(f"Ключевых кадров: {decoder.keyframes}, дельт: {decoder.deltas}")
+            print(f"Потеряно кадров: {decoder.lost_frames}, отброшено дельт: {decoder.dropped_deltas}")
+        print("==================================\n")
+
+def _state_matches(state, tables, active):
+    """Собранное состояние совпадает с исходными таблицами с точностью до кванта"""
+    for got, table, flags in zip((state.enemies, state.projectiles, state.whirlpools), tables, active):
+        expected = table[flags]
+        if len(got) != len(expected):
+            return False
+        for name in got.dtype.names:
+            if name in ('x', 'y'):
+                if not np.all(np.abs(got[name] - expected[name]) <= 1.0 / DELTA_COORD_SCALE + 1e-3):
+                    return False
+            elif not np.array_equal(got[name], expected[name]):
+                return False
+    return True
+
+
+def _run_delta(framing, frames, loss, seed):
+    """Синтетическая игра через encode_frame и FrameParser в режиме framing.
+
+    Парсер настроен как в UARTProtocol; кадры с неверным CRC и обрезанные
+    не применяются, как в receive_game_state. Возвращает статистику.
+    """
+    rng = np.random.default_rng(seed)
+    tables = [np.zeros(slots, dtype) for dtype, _, slots in ENTITY_KINDS]
+    active = [np.zeros(slots, bool) for _, _, slots in ENTITY_KINDS]
+    enemies, projectiles, whirlpools = tables
+    speeds = rng.uniform(-1.5, 1.5, size=(MAX_PROJECTILES_IN_PACKET, 2)).astype(np.float32)
+    
+    encoder = GameStateDeltaEncoder()
+    decoder = GameStateDeltaDecoder()
+    parser = FrameParser(START_BYTE, END_BYTE,
+                         min_length=UART_MIN_PACKET_SIZE,
+                         max_length=UART_MAX_PACKET_SIZE,
+                         capacity=UART_RX_BUFFER_SIZE,
+                         framing=framing)
+    header_size = parser.header_size
+    stats = {'full_bytes': 0, 'delta_bytes': 0, 'lost': 0, 'cut': 0, 'states': 0, 'wrong': 0}
+    
+    for frame in range(frames):
+        camera_y = -2.0 * frame
+        player = (600.0 + 200 * np.sin(frame / 40), camera_y + 600, float(frame % 360), 100, frame // 10, 0)
+        
+        # Враги плывут, снаряды летят и живут ~60 кадров, водовороты неподвижны
+        for flags, table, chance in ((active[0], enemies, 0.02), (active[1], projectiles, 0.2), (active[2], whirlpools, 0.01)):
+            free = np.flatnonzero(~flags)
+            if len(free) and rng.random() < chance * 5:
+                slot = free[0]
+                flags[slot] = True
+                table[slot]['x'] = rng.uniform(100, 1100)
+                table[slot]['y'] = camera_y + rng.uniform(-200, 800)
+        enemies['y'][active[0]] += 1.0
+        enemies['x'][active[0]] += np.float32(0.5 * np.sin(frame / 20))
+        enemies['direction'][active[0]] = (frame // 50) % 4
+        projectiles['x'] += speeds[:, 0]
+        projectiles['y'] += speeds[:, 1] * 4
+        for flags, chance in ((active[0], 0.004), (active[1], 0.016), (active[2], 0.002)):
+            flags &= rng.random(len(flags)) > chance
+        
+        # Прежний GAME_STATE: всё состояние в float32
+        counts = [int(np.count_nonzero(flags)) for flags in active]
+        stats['full_bytes'] += (header_size + PLAYER_STRUCT.size + 3 + sum(n * dtype.itemsize for n, (dtype, _, _)
+                                in zip(counts, ENTITY_KINDS)) + TAIL_STRUCT.size + 2)
+        
+        packet_type, payload = encoder.encode(player, camera_y, frame, tables, active)
+        packet = encode_frame(packet_type, payload, framing)
+        stats['delta_bytes'] += len(packet)
+        if rng.random() < loss:
+            stats['lost'] += 1
+            continue
+        
+        # Приём как в receive_game_state: кадр из парсера, CRC, разбор
+        parser.feed(packet)
+        intact = False
+        for packet_data in parser.frames():
+            intact = intact or packet_data == packet
+            if crc8(packet_data[1:-2]) != packet_data[-2]:
+                continue
+            received_type = packet_data[1]
+            if received_type != PKT_GAME_KEYFRAME and received_type != PKT_GAME_DELTA:
+                continue
+            try:
+                state, _ = decoder.apply(received_type, packet_data, header_size)
+            except struct.error:
+                continue
+            if state is None:
+                encoder.request_keyframe()
+                continue
+            stats['states'] += 1
+            if not _state_matches(state, tables, active):
+                stats['wrong'] += 1
+        if not intact:
+            stats['cut'] += 1
+    
+    stats['decoder'] = decoder
+    return stats
+
+
+def benchmark_delta(frames=1200, loss=0.02, seed=1):
+    """Байт на кадр: GAME_STATE против ключевых и дельта-кадров.
+
+    Эталонный энкодер гоняет синтетическую игру (камера едет, враги и снаряды
+    двигаются, появляются и исчезают, водовороты стоят), часть кадров теряется,
+    приёмник запрашивает ключевой кадр. Кадры идут через FrameParser в обоих
+    режимах разметки: в FRAMING_END байт 0x55 в данных обрезает кадр, такие
+    кадры считаются отдельно. Каждое собранное состояние сверяется с исходным
+    с точностью до кванта.
+    """
+    bits_per_byte = 10   # старт + 8 бит + стоп
+    print("\n===== GAME_STATE: КЛЮЧЕВЫЕ + ДЕЛЬТА-КАДРЫ =====")
+    print(f"Кадров: {frames}, потеряно на линии {loss:.0%}, UART_FRAMING = '{UART_FRAMING}'")
+    for framing in (FRAMING_END, FRAMING_LENGTH):
+        stats = _run_delta(framing, frames, loss, seed)
+        decoder = stats['decoder']
+        print(f"--- разметка '{framing}' ---")
+        for name, total in (("GAME_STATE", stats['full_bytes']), ("KEYFRAME+DELTA", stats['delta_bytes'])):
+            per_frame = total / frames
+            print(f"{name:>15}: {per_frame:6.1f} байт/кадр, до {UART_BAUDRATE / bits_per_byte / per_frame:5.1f} кадров/с "
+                  f"на {UART_BAUDRATE}")
+        received = frames - stats['lost']
+        useful = UART_BAUDRATE / bits_per_byte / (stats['delta_bytes'] / frames) * stats['states'] / frames
+        print(f"Обрезано парсером: {stats['cut']} из {received} ({stats['cut'] / max(received, 1):.1%}), "
+              f"собрано состояний: {stats['states']} ({stats['states'] / frames:.1%}, до {useful:.1f}/с), "
+              f"неверных: {stats['wrong']}")
+        print(f"Ключевых: {decoder.keyframes}, дельт: {decoder.deltas}, отброшено дельт: {decoder.dropped_deltas}")
+        if framing == FRAMING_LENGTH:
+            assert stats['cut'] == 0 and stats['wrong'] == 0, "FRAMING_LENGTH: кадр обрезан или собран неверно"
+    print("===============================================\n")
+
+
+if __name__ == "__main__":
+    benchmark_delta()
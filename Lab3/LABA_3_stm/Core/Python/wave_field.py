@@ -0,0 +1,76 @@
+# wave_field.py - Заранее запечённый фон моря с волнами
+
+import math
+import numpy as np
+import pygame
+
+
+class WaveField:
+    """Кадры моря с волнами, запечённые по фазе анимации.
+
+    wave_offset пробегает конечный цикл (0, step, ..., period - step), поэтому
+    для каждой фазы один раз строится непрозрачный 8-битный кадр (вода +
+    линии волн), а в кадре игры остаётся один blit со сдвигом по y.
+    Синусы считаются NumPy-массивами при запекании, а не в кадре.
+    """
+
+    # Запас кадра над экраном: слой -2 и сдвиг фона по y помещаются целиком
+    TOP_MARGIN = 90
+
+    def __init__(self, width, height, water_color, layer_colors, period, step,
+                 spacing=35, amplitude=12, wave_length=80, speed=0.03, layer_phase_shift=0.0):
+        self.width = width
+        self.height = height
+        self.water_color = water_color
+        self.layer_colors = layer_colors
+        self.phases = list(range(0, period, step))
+        self.spacing = spacing
+        self.amplitude = amplitude
+        self.wave_length = wave_length
+        self.speed = speed
+        self.layer_phase_shift = layer_phase_shift
+
+        self.frames = {}
+        self.bake_time_ms = 0.0
+
+    def warm_up(self):
+        """Запекание всех фаз сразу (при старте, чтобы не было рывков в игре)"""
+        for phase in self.phases:
+            self.frame(phase)
+
+    def frame(self, wave_offset):
+        """Кадр для фазы wave_offset (запекается при первом запросе)"""
+        frame = self.frames.get(wave_offset)
+        if frame is None:
+            frame = self._bake(wave_offset)
+            self.frames[wave_offset] = frame
+        return frame
+
+    def _bake(self, wave_offset):
+        """Отрисовка всех слоёв волн для одной фазы"""
+        start = pygame.time.get_ticks()
+
+        frame = pygame.Surface((self.width, self.height + self.TOP_MARGIN), 0, 8)
+        frame.set_palette([self.water_color] + list(self.layer_colors))
+        frame.fill(self.water_color)
+
+        xs = np.arange(0, self.width + self.wave_length, 5, dtype=np.float64)
+        k = 2 * math.pi * xs / self.wave_length
+
+        for layer in range(-2, self.height // self.spacing + 3):
+            base_y = layer * self.spacing + self.TOP_MARGIN
+            color = self.layer_colors[layer % len(self.layer_colors)]
+
+            phase_shift = layer * self.layer_phase_shift
+            ys = base_y + self.amplitude * np.sin(k + wave_offset * self.speed + phase_shift)
+            ys += self.amplitude * 0.3 * np.sin(2 * k + wave_offset * self.speed * 1.5 + phase_shift * 1.2)
+
+            points = np.column_stack((xs, ys)).tolist()
+            pygame.draw.lines(frame, color, False, points, 2)
+
+        self.bake_time_ms += pygame.time.get_ticks() - start
+        return frame
+
+    def draw(self, screen, wave_offset, y_offset=0):
+        """Фон моря целиком (заливка не нужна); y_offset - сдвиг волн вниз, 0..TOP_MARGIN"""
+        screen.blit(self.frame(wave_offset), (0, int(y_offset) - self.TOP_MARGIN))
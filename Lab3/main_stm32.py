@@ -10,7 +10,9 @@ import threading
 import time
 import random
 from stm32_game_view import STM32GameView
-from protocol import GameStatePacket, DebugPacket, SpawnEnemyPacket, CommandPacket, START_BYTE, END_BYTE, PACKET_DEBUG, PACKET_GAME_STATE, PACKET_MENU_STATE, MenuStatePacket, PACKET_EXPLOSION
+from frame_parser import FrameParser
+from tx_queue import TxQueue, TX_PRIORITY_HIGH, TX_PRIORITY_LOW
+from protocol import GameStatePacket, DebugPacket, SpawnEnemyPacket, CommandPacket, START_BYTE, END_BYTE, PACKET_DEBUG, PACKET_GAME_STATE, PACKET_MENU_STATE, MenuStatePacket, PACKET_EXPLOSION, FRAMING
 
 class STM32GameController:
     """Контроллер связи с STM32"""
@@ -30,8 +32,11 @@ class STM32GameController:
         self.spawn_timer = 0.0
         self.spawn_interval = 2.0
         
-        # Буфер приёма
-        self.rx_buffer = bytearray()
+        # Кольцевой буфер приёма и разбор кадров
+        self.parser = FrameParser(START_BYTE, END_BYTE, min_length=4, max_length=256, framing=FRAMING)
+        
+        # Очередь передачи: потоки кладут кадры и не ждут порт
+        self.tx = None
         
     def connect(self):
         """Подключиться к STM32"""
@@ -44,6 +49,7 @@ class STM32GameController:
                 stopbits=serial.STOPBITS_ONE,
                 timeout=0.01
             )
+            self.tx = TxQueue(self.ser, self.baudrate)
             print(f"✓ Connected to {self.port}")
             return True
         except Exception as e:
@@ -66,6 +72,9 @@ class STM32GameController:
         """Остановить потоки"""
         self.running = False
         time.sleep(0.1)
+        if self.tx:
+            self.tx.close()
+            self.tx.print_statistics()
         if self.ser:
             self.ser.close()
         print("✓ Disconnected")
@@ -85,10 +94,7 @@ class STM32GameController:
         
         while self.running:
             try:
-                if self.ser.in_waiting > 0:
-                    data = self.ser.read(self.ser.in_waiting)
-                    self.rx_buffer.extend(data)
-                    
+                if self.parser.read_serial(self.ser):
                     # Ищем пакеты
                     self._parse_packets()
                     
@@ -101,38 +107,9 @@ class STM32GameController:
             
     def _parse_packets(self):
         """Парсинг пакетов из буфера"""
-        while len(self.rx_buffer) >= 4:
-            # Ищем START_BYTE
-            start_idx = -1
-            for i in range(len(self.rx_buffer)):
-                if self.rx_buffer[i] == START_BYTE:
-                    start_idx = i
-                    break
-
-            if start_idx == -1:
-                self.rx_buffer.clear()
-                return
-
-            # Удаляем мусор до START
-            if start_idx > 0:
-                self.rx_buffer = self.rx_buffer[start_idx:]
-
-            # Ищем END_BYTE
-            end_idx = -1
-            for i in range(1, len(self.rx_buffer)):
-                if self.rx_buffer[i] == END_BYTE:
-                    end_idx = i
-                    break
-
-            if end_idx == -1:
-                if len(self.rx_buffer) > 256:
-                    self.rx_buffer = self.rx_buffer[1:]
-                return
-
-            # Извлекаем пакет
-            packet_data = bytes(self.rx_buffer[:end_idx + 1])
-            self.rx_buffer = self.rx_buffer[end_idx + 1:]
-
+        # Кадры - memoryview в кольцевой буфер; незаконченный кадр
+        # дособирается на следующем вызове
+        for packet_data in self.parser.frames():
             # Определяем тип пакета и парсим нужным парсером
             packet_type = packet_data[1]
 
@@ -146,7 +123,7 @@ class STM32GameController:
                     print(f"⚠ Invalid GAME packet: {[hex(b) for b in packet_data]}")
 
             elif packet_type == PACKET_MENU_STATE:
-                packet = MenuStatePacket.parse(packet_data)
+                packet = MenuStatePacket.parse(bytes(packet_data))
                 if packet:
                     with self.packet_lock:
                         self.latest_menu = packet  
@@ -155,7 +132,7 @@ class STM32GameController:
                     print(f"⚠ Invalid MENU packet: {[hex(b) for b in packet_data]}")
 
             elif packet_type == PACKET_DEBUG:
-                message = DebugPacket.parse(packet_data)
+                message = DebugPacket.parse(bytes(packet_data))
                 if message is not None:
                     print(f"[STM32 DEBUG] {message}")
                 else:
@@ -177,8 +154,10 @@ class STM32GameController:
         time.sleep(2.0)
         
         # Отправляем команду старта игры
-        self._send_packet(CommandPacket.start_game())
-        print("→ START_GAME sent")
+        if self._send_packet(CommandPacket.start_game(), TX_PRIORITY_HIGH):
+            print("→ START_GAME sent")
+        else:
+            print("✗ START_GAME dropped (TX queue full or port closed)")
         
         while self.running:
             try:
@@ -193,19 +172,25 @@ class STM32GameController:
                 vy = random.uniform(1.5, 3.0)
                 
                 packet = SpawnEnemyPacket(x, enemy_type, vx, vy)
-                self._send_packet(packet.encode())
-                
-                print(f"→ SPAWN_ENEMY: x={x}, type={enemy_type}, v=({vx:.1f}, {vy:.1f})")
+                if self._send_packet(packet.encode()):
+                    print(f"→ SPAWN_ENEMY: x={x}, type={enemy_type}, v=({vx:.1f}, {vy:.1f})")
+                else:
+                    print(f"✗ SPAWN_ENEMY dropped: x={x}, type={enemy_type} (TX queue full or port closed)")
                 
             except Exception as e:
                 if self.running:
                     print(f"❌ TX Error: {e}")
                 break
                 
-    def _send_packet(self, data):
-        """Отправить пакет на STM32"""
-        if self.ser and self.ser.is_open:
-            self.ser.write(data)
+    def _send_packet(self, data, priority=TX_PRIORITY_LOW):
+        """Отправить пакет на STM32 (через очередь, без ожидания порта).
+
+        False - кадр не поставлен: очередь переполнена (считается в
+        TxQueue.dropped) или порт закрыт.
+        """
+        if self.tx and self.ser.is_open:
+            return self.tx.put(data, priority)
+        return False
 
 def main():
     PORT = 'COM5'  # Измени на свой порт!
@@ -4,11 +4,18 @@ protocol.py
 """
 
 import struct
+from crc8 import crc8
+from frame_parser import FRAMING_END, HEADER_SIZE, encode_frame
 
 # Константы протокола
 START_BYTE = 0xAA
 END_BYTE = 0x55
 
+# Разметка кадров (frame_parser): FRAMING_END - как в прошивке сейчас,
+# FRAMING_LENGTH - с длиной в заголовке (включать вместе с прошивкой)
+FRAMING = FRAMING_END
+PAYLOAD_OFFSET = HEADER_SIZE[FRAMING]
+
 # Типы пакетов STM32 -> PC
 PACKET_GAME_STATE = 0x01
 PACKET_MENU_STATE = 0x02
@@ -24,18 +31,6 @@ PACKET_PAUSE_GAME = 0x12
 MAX_ENEMIES = 10
 MAX_BULLETS = 10
 
-def crc8(data):
-    """Вычисление CRC8"""
-    crc = 0
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 0x80:
-                crc = (crc << 1) ^ 0x07
-            else:
-                crc <<= 1
-            crc &= 0xFF
-    return crc
 
 class DebugPacket:
     """Пакет отладки STM32 -> PC"""
@@ -59,7 +54,7 @@ class DebugPacket:
             return None
             
         # Извлекаем текст (между байтом типа и CRC)
-        message = data[2:-2].decode('utf-8', errors='ignore')
+        message = data[PAYLOAD_OFFSET:-2].decode('utf-8', errors='ignore')
         return message
 
 class MenuStatePacket:
@@ -90,7 +85,7 @@ class MenuStatePacket:
             return None
             
         packet = MenuStatePacket()
-        idx = 2
+        idx = PAYLOAD_OFFSET
         
         packet.game_state = data[idx]
         idx += 1
@@ -134,7 +129,7 @@ class GameStatePacket:
         #     return None
             
         packet = GameStatePacket()
-        idx = 2
+        idx = PAYLOAD_OFFSET
         
         # Player
         packet.player_x = struct.unpack('>H', data[idx:idx+2])[0]
@@ -203,33 +198,22 @@ class SpawnEnemyPacket:
         
     def encode(self):
         """Закодировать в байты"""
-        data = bytearray()
-        data.append(START_BYTE)
-        data.append(PACKET_SPAWN_ENEMY)
-        data.extend(struct.pack('>H', self.x))
+        data = bytearray(struct.pack('>H', self.x))
         data.append(self.enemy_type)
         # Скорости как знаковые байты (-127..127) * 0.1
         vx_byte = int(self.velocity_x * 10) & 0xFF
         vy_byte = int(self.velocity_y * 10) & 0xFF
         data.append(vx_byte)
         data.append(vy_byte)
-        data.append(crc8(data[1:]))
-        data.append(END_BYTE)
-        return bytes(data)
+        return encode_frame(PACKET_SPAWN_ENEMY, data, FRAMING)
 
 class CommandPacket:
     """Командные пакеты PC -> STM32"""
     
     @staticmethod
     def start_game():
-        data = bytearray([START_BYTE, PACKET_START_GAME])
-        data.append(crc8(data[1:]))
-        data.append(END_BYTE)
-        return bytes(data)
+        return encode_frame(PACKET_START_GAME, b'', FRAMING)
         
     @staticmethod
     def pause_game():
-        data = bytearray([START_BYTE, PACKET_PAUSE_GAME])
-        data.append(crc8(data[1:]))
-        data.append(END_BYTE)
-        return bytes(data)
\ No newline at end of file
+        return encode_frame(PACKET_PAUSE_GAME, b'', FRAMING)
\ No newline at end of file
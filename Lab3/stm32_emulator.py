@@ -0,0 +1,825 @@
+"""
+stm32_emulator.py
+Виртуальная плата STM32: проверка UART-клиентов без железа
+
+Эмулятор открывает псевдотерминал (или TCP-порт для pyserial socket://)
+и говорит на одном из диалектов протокола:
+  buttons - v4_final (uart_protocol.py): PKT_BUTTONS -> PC, PKT_MILES <- PC
+  laba3   - LABA_3 (uart_protocol.py): GAME_STATE/DEBUG -> PC,
+            INIT_GAME/ADD_OBSTACLE/ADD_SHORE/ADD_ENEMY/... <- PC
+  menu    - Lab3 (main_stm32.py) и v2 (sea_defenders_server.py, --angle):
+            MENU_STATE/GAME_STATE/DEBUG/EXPLOSION -> PC, SPAWN_*/START/PAUSE <- PC
+  text    - test.py (STM32TwoWayComm): текстовые строки -> PC, числа <- PC
+
+Линия ограничена скоростью --baud (10 бит на байт), --ber - вероятность
+инверсии каждого бита в обе стороны, --script - сценарий входов платы
+(строки "<секунды> ключ=значение ...", например "1.5 left=1 fire=0").
+
+Запуск:  python stm32_emulator.py laba3 --ber 1e-5
+         затем в клиенте вместо 'COM5' - путь, который напечатает эмулятор
+         (например /dev/pts/3); для socket:// - serial.serial_for_url(...)
+Замер:   python stm32_emulator.py benchmark
+"""
+
+import argparse
+import math
+import os
+import random
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from crc8 import crc8
+from frame_parser import FrameParser, encode_frame, FRAMING_END, FRAMING_LENGTH
+
+# Константы
+START_BYTE = 0xAA
+END_BYTE = 0x55
+
+UART_BAUDRATE = 115200
+BITS_PER_BYTE = 10      # старт + 8 бит + стоп
+LINK_CHUNK = 16         # порция передачи (как FIFO/DMA), байт
+
+
+class EmulatedLink:
+    """Канал эмулятора: байтовый поток со скоростью линии и битовыми ошибками.
+
+    Передача - очередь порций по LINK_CHUNK байт: каждая уходит в момент,
+    когда её последний бит дошёл бы по линии. Принятые байты отдаются
+    плате тоже не раньше, чем дошли бы на скорости baud. Ошибки -
+    независимые инверсии бит с вероятностью ber (расстояния между ними
+    разыгрываются сразу, без броска на каждый бит).
+    """
+
+    def __init__(self, baud=UART_BAUDRATE, ber=0.0, seed=None):
+        self.baud = baud
+        self.ber = ber
+        self.rng = random.Random(seed)
+        self.port = None
+
+        self._tx_queue = deque()     # (время отправки, порция)
+        self._tx_free_at = 0.0
+        self._rx_queue = deque()     # (время доставки, байты)
+        self._rx_free_at = 0.0
+        self._next_error = self._error_gap()
+
+        # Статистика
+        self.tx_bytes = 0
+        self.tx_frames = 0
+        self.tx_dropped = 0
+        self.rx_bytes = 0
+        self.flipped_bits = 0
+
+    # === Транспорт (переопределяется) ===
+
+    def open(self):
+        """Ожидание клиента (для псевдотерминала не нужно)"""
+
+    def close(self):
+        pass
+
+    def _raw_write(self, data):
+        raise NotImplementedError
+
+    def _raw_read(self, timeout):
+        raise NotImplementedError
+
+    # === Линия ===
+
+    def _error_gap(self):
+        """Число целых бит до следующей ошибки"""
+        if self.ber <= 0:
+            return math.inf
+        return int(math.log(1.0 - self.rng.random()) / math.log(1.0 - self.ber))
+
+    def corrupt(self, data):
+        """Инверсия бит по ber; без ошибок возвращает те же байты"""
+        bits = len(data) * 8
+        if self._next_error >= bits:
+            self._next_error -= bits
+            return data
+        data = bytearray(data)
+        pos = self._next_error
+        while pos < bits:
+            data[pos >> 3] ^= 1 << (pos & 7)
+            self.flipped_bits += 1
+            pos += 1 + self._error_gap()
+        self._next_error = pos - bits
+        return bytes(data)
+
+    def _wire_time(self, size):
+        return size * BITS_PER_BYTE / self.baud if self.baud else 0.0
+
+    @property
+    def tx_busy(self):
+        """Передача прошлого кадра ещё идёт (как uart_tx_busy в прошивке)"""
+        return bool(self._tx_queue)
+
+    def send(self, data, drop_if_busy=False):
+        """Кадр в очередь передачи; возвращает время, когда уйдёт последний байт.
+
+        drop_if_busy - как HAL_UART_Transmit_DMA при занятом UART: кадр
+        пропускается (None), очередь не растёт.
+        """
+        if drop_if_busy and self._tx_queue:
+            self.tx_dropped += 1
+            return None
+        data = self.corrupt(data)
+        self.tx_bytes += len(data)
+        self.tx_frames += 1
+
+        t = max(time.perf_counter(), self._tx_free_at)
+        for i in range(0, len(data), LINK_CHUNK):
+            chunk = data[i:i + LINK_CHUNK]
+            t += self._wire_time(len(chunk))
+            self._tx_queue.append((t, chunk))
+        self._tx_free_at = t
+        return t
+
+    def pump(self, timeout):
+        """Отправка созревших порций и приём; возвращает дошедшие до платы байты"""
+        now = time.perf_counter()
+        while self._tx_queue and self._tx_queue[0][0] <= now:
+            self._raw_write(self._tx_queue.popleft()[1])
+
+        deadline = now + timeout
+        if self._tx_queue:
+            deadline = min(deadline, self._tx_queue[0][0])
+        if self._rx_queue:
+            deadline = min(deadline, self._rx_queue[0][0])
+
+        data = self._raw_read(max(0.0, deadline - now))
+        now = time.perf_counter()
+        if data:
+            self.rx_bytes += len(data)
+            self._rx_free_at = max(now, self._rx_free_at) + self._wire_time(len(data))
+            self._rx_queue.append((self._rx_free_at, self.corrupt(data)))
+
+        delivered = []
+        while self._rx_queue and self._rx_queue[0][0] <= now:
+            delivered.append(self._rx_queue.popleft()[1])
+        return b''.join(delivered)
+
+
+class PtyLink(EmulatedLink):
+    """Псевдотерминал: клиент открывает self.port как обычный последовательный порт"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        import tty
+        self.master, self.slave = os.openpty()
+        # Без эха и обработки строк - чистый байтовый канал. Свой дескриптор
+        # slave держим открытым, чтобы клиент мог переподключаться
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _raw_write(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.master, view):]
+
+    def _raw_read(self, timeout):
+        readable, _, _ = select.select([self.master], [], [], timeout)
+        if not readable:
+            return b''
+        try:
+            return os.read(self.master, 4096)
+        except OSError:
+            return b''
+
+
+class SocketLink(EmulatedLink):
+    """TCP-сервер для pyserial: serial.serial_for_url('socket://host:port')"""
+
+    def __init__(self, host='localhost', tcp_port=7777, **kwargs):
+        super().__init__(**kwargs)
+        self.server = socket.create_server((host, tcp_port))
+        self.conn = None
+        self.port = f"socket://{host}:{tcp_port}"
+
+    def open(self):
+        self._accept(None)
+
+    def _accept(self, timeout):
+        """Ожидание клиента; без клиента байты платы уходят «в отключённый кабель»"""
+        readable, _, _ = select.select([self.server], [], [], timeout)
+        if readable:
+            self.conn, _ = self.server.accept()
+            self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _disconnect(self):
+        self.conn.close()
+        self.conn = None
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+        self.server.close()
+
+    def _raw_write(self, data):
+        if self.conn is None:
+            return
+        try:
+            self.conn.sendall(data)
+        except OSError:
+            self._disconnect()
+
+    def _raw_read(self, timeout):
+        if self.conn is None:
+            self._accept(timeout)
+            return b''
+        readable, _, _ = select.select([self.conn], [], [], timeout)
+        if not readable:
+            return b''
+        try:
+            data = self.conn.recv(4096)
+        except OSError:
+            data = b''
+        if not data:
+            self._disconnect()   # клиент закрыл порт, ждём следующего
+        return data
+
+
+# === Диалекты ===
+
+class Dialect:
+    """Поведение платы: разбор кадров от PC, периодическая отправка, входы сценария"""
+
+    name = ''
+    period = 0.01          # шаг tick(), с
+    lengths = None         # фиксированные длины кадров PC -> STM32 для FrameParser
+    scan_types = None
+
+    def __init__(self, framing=FRAMING_END):
+        self.framing = framing
+        self.link = None
+        self.parser = FrameParser(START_BYTE, END_BYTE, min_length=4, max_length=256,
+                                  lengths=self.lengths, scan_types=self.scan_types, framing=framing)
+        self.rx_packets = 0
+        self.rx_crc_errors = 0
+
+    def send(self, packet_type, payload=b'', drop_if_busy=False):
+        return self.link.send(encode_frame(packet_type, payload, self.framing), drop_if_busy)
+
+    def feed(self, data, now):
+        """Принятые байты: кадры -> on_packet (CRC проверен) или on_crc_error"""
+        self.parser.feed(data)
+        for frame in self.parser.frames():
+            if self.framing == FRAMING_END and crc8(frame[1:-2]) != frame[-2]:
+                self.rx_crc_errors += 1
+                self.on_crc_error(bytes(frame))
+                continue
+            self.rx_packets += 1
+            self.on_packet(frame[1], bytes(self.parser.payload(frame)), now)
+
+    def on_packet(self, packet_type, payload, now):
+        pass
+
+    def on_crc_error(self, frame):
+        pass
+
+    def on_input(self, **inputs):
+        """Входы сценария (кнопки, пункт меню)"""
+
+    def tick(self, now):
+        pass
+
+    def statistics(self):
+        """Строки статистики диалекта"""
+        return [f"Принято кадров: {self.rx_packets}, ошибок CRC: {self.rx_crc_errors}"]
+
+
+class ButtonsDialect(Dialect):
+    """v4_final: кнопки каждые period и сразу по фронту, приём миль.
+
+    latency=True - кнопки уходят как PKT_BUTTONS_EX (seq + часы платы),
+    на PKT_MILES_EX плата отвечает PKT_ECHO для замера задержки на PC.
+    """
+
+    name = 'buttons'
+    PKT_BUTTONS = 0x01
+    PKT_MILES = 0x02
+    PKT_BUTTONS_EX = 0x03
+    PKT_MILES_EX = 0x04
+    PKT_ECHO = 0x05
+    lengths = {PKT_MILES: 6,         # START | TYPE | MILES(2) | CRC | END
+               PKT_MILES_EX: 12}     # ... | MILES(2) | SEQ(2) | T_PC(4) | ...
+    scan_types = ()
+
+    def __init__(self, framing=FRAMING_END, latency=False):
+        super().__init__(framing)
+        self.latency = latency
+        self.buttons = [0, 0, 0]
+        self.miles = 0
+        self.button_seq = 0
+        self.echoes = 0
+        # Часы платы (TIM2, мкс) идут со своего нуля - смещение к PC неизвестно клиенту
+        self._clock_base = random.getrandbits(32)
+
+    def _board_us(self, now):
+        return (int(now * 1e6) + self._clock_base) & 0xFFFFFFFF
+
+    def _send_buttons(self):
+        if self.latency:
+            self.button_seq = (self.button_seq + 1) & 0xFFFF
+            payload = bytes(self.buttons) + struct.pack('<HI', self.button_seq,
+                                                        self._board_us(time.perf_counter()))
+            self.send(self.PKT_BUTTONS_EX, payload)
+        else:
+            self.send(self.PKT_BUTTONS, bytes(self.buttons))
+
+    def on_input(self, left=None, right=None, fire=None, **_):
+        buttons = [self.buttons[0] if left is None else int(left),
+                   self.buttons[1] if right is None else int(right),
+                   self.buttons[2] if fire is None else int(fire)]
+        if buttons != self.buttons:
+            self.buttons = buttons
+            self._send_buttons()   # прерывание по фронту кнопки
+
+    def on_packet(self, packet_type, payload, now):
+        if packet_type == self.PKT_MILES:
+            self.miles = struct.unpack('<H', payload)[0]
+        elif packet_type == self.PKT_MILES_EX:
+            self.miles, seq, pc_us = struct.unpack('<HHI', payload)
+            self.echoes += 1
+            self.send(self.PKT_ECHO, struct.pack('<HII', seq, pc_us, self._board_us(now)))
+
+    def tick(self, now):
+        self._send_buttons()
+
+    def statistics(self):
+        lines = [f"Кнопки L/R/F: {self.buttons}, мили: {self.miles}"]
+        if self.latency:
+            lines.append(f"Кнопок с seq: {self.button_seq}, эхо миль: {self.echoes}")
+        return super().statistics() + lines
+
+
+class Laba3Dialect(Dialect):
+    """LABA_3: мир на плате, GAME_STATE ~60 Гц, DEBUG-ответ на каждую команду"""
+
+    name = 'laba3'
+    period = 1 / 60
+
+    PKT_GAME_STATE = 0x01
+    PKT_ADD_ENEMY = 0x02
+    PKT_ADD_OBSTACLE = 0x03
+    PKT_CLEANUP = 0x04
+    PKT_INIT_GAME = 0x05
+    PKT_ADD_WHIRLPOOL = 0x06
+    PKT_DEBUG = 0x07
+    PKT_ADD_SHORE = 0x08
+
+    COMMANDS = {
+        PKT_ADD_ENEMY: ('ADD_ENEMY', '<Bff'),
+        PKT_ADD_OBSTACLE: ('ADD_OBSTACLE', '<Bfff'),
+        PKT_CLEANUP: ('CLEANUP', '<f'),
+        PKT_INIT_GAME: ('INIT_GAME', ''),
+        PKT_ADD_WHIRLPOOL: ('ADD_WHIRLPOOL', '<ff'),
+        PKT_ADD_SHORE: ('ADD_SHORE', '<Bff'),
+    }
+
+    MAX_ENEMIES = 6
+    MAX_PROJECTILES = 20
+    MAX_WHIRLPOOLS = 3
+    MAX_OBSTACLES = 32
+    SCROLL_SPEED = 2.0
+
+    def __init__(self, framing=FRAMING_END, debug_acks=True):
+        super().__init__(framing)
+        self.debug_acks = debug_acks
+        self.commands = {}
+        self.sent_at = None    # {frame_counter: время формирования} - только для замера задержки
+        self.reset()
+
+    def reset(self):
+        self.buttons = {'left': 0, 'right': 0, 'fire': 0}
+        self.player = [600.0, 600.0, 0.0, 100, 0, 0]   # x, y, angle, health, score, cooldown
+        self.camera_y = 0.0
+        self.frame_counter = 0
+        self.enemies = []        # [type, x, y, health, direction]
+        self.projectiles = []    # [x, y, is_player_shot]
+        self.whirlpools = []     # [x, y, used]
+        self.obstacles = []
+
+    def _debug(self, packet_type, size, crc_received, crc_calculated, success, message):
+        """DEBUG как Protocol_SendDebug: 6 байт + сообщение на 32 байта"""
+        if not self.debug_acks:
+            return
+        text = message.encode('utf-8')[:32].ljust(32, b'\x00')
+        payload = bytes([packet_type, size & 0xFF, 0, crc_received, crc_calculated, int(success)]) + text
+        self.send(self.PKT_DEBUG, payload, drop_if_busy=True)
+
+    def on_input(self, **inputs):
+        for key in self.buttons:
+            if key in inputs:
+                self.buttons[key] = int(inputs[key])
+
+    def on_crc_error(self, frame):
+        self._debug(frame[1], len(frame), frame[-2], crc8(frame[1:-2]), False, "CRC ERROR")
+
+    def on_packet(self, packet_type, payload, now):
+        name, fmt = self.COMMANDS.get(packet_type, (f"UNKNOWN_{packet_type:02X}", None))
+        self.commands[name] = self.commands.get(name, 0) + 1
+        if fmt is None or struct.calcsize(fmt) > len(payload):
+            self._debug(packet_type, len(payload), 0, 0, False, f"BAD {name}")
+            return
+        values = struct.unpack_from(fmt, payload)
+
+        if packet_type == self.PKT_INIT_GAME:
+            self.reset()
+        elif packet_type == self.PKT_ADD_ENEMY and len(self.enemies) < self.MAX_ENEMIES:
+            enemy_type, x, y = values
+            self.enemies.append([enemy_type, x, y, 3 if enemy_type else 1, 2])
+        elif packet_type == self.PKT_ADD_OBSTACLE and len(self.obstacles) < self.MAX_OBSTACLES:
+            self.obstacles.append(values)
+        elif packet_type == self.PKT_ADD_WHIRLPOOL and len(self.whirlpools) < self.MAX_WHIRLPOOLS:
+            self.whirlpools.append([values[0], values[1], 0])
+        elif packet_type == self.PKT_CLEANUP:
+            threshold_y = values[0]
+            self.obstacles = [o for o in self.obstacles if o[2] < threshold_y]
+            self.enemies = [e for e in self.enemies if e[2] < threshold_y]
+        self._debug(packet_type, len(payload), 0, 0, True, f"OK {name}")
+
+    def tick(self, now):
+        player = self.player
+        self.camera_y -= self.SCROLL_SPEED
+        player[1] = self.camera_y + 600
+        player[0] = min(1150.0, max(50.0, player[0] + 5 * (self.buttons['right'] - self.buttons['left'])))
+        player[5] = max(0, player[5] - 1)
+        if self.buttons['fire'] and player[5] == 0 and len(self.projectiles) < self.MAX_PROJECTILES:
+            self.projectiles.append([player[0], player[1] - 30, 1])
+            player[5] = 15
+
+        for enemy in self.enemies:
+            enemy[2] += 1.0
+            enemy[1] += 1.0 if enemy[1] < player[0] else -1.0
+            if enemy[0] and self.frame_counter % 90 == 0 and len(self.projectiles) < self.MAX_PROJECTILES:
+                self.projectiles.append([enemy[1], enemy[2] + 30, 0])
+        for projectile in self.projectiles:
+            projectile[1] += -8.0 if projectile[2] else 6.0
+        self.projectiles = [p for p in self.projectiles if abs(p[1] - player[1]) < 900]
+        self.enemies = [e for e in self.enemies if e[2] < self.camera_y + 1000]
+
+        if self.sent_at is not None:
+            self.sent_at[self.frame_counter] = now
+        self.send(self.PKT_GAME_STATE, self.encode_state(), drop_if_busy=True)
+        self.frame_counter += 1
+
+    def encode_state(self):
+        """Данные GAME_STATE: игрок, три массива с байтом количества, камера и номер кадра"""
+        parts = [struct.pack('<fffhHH', *self.player), bytes([len(self.enemies)])]
+        parts += [struct.pack('<BffBB', *e) for e in self.enemies]
+        parts.append(bytes([len(self.projectiles)]))
+        parts += [struct.pack('<ffB', *p) for p in self.projectiles]
+        parts.append(bytes([len(self.whirlpools)]))
+        parts += [struct.pack('<ffB', *w) for w in self.whirlpools]
+        parts.append(struct.pack('<fI', self.camera_y, self.frame_counter))
+        return b''.join(parts)
+
+    def statistics(self):
+        return super().statistics() + [f"Команды: {self.commands}", f"Кадров GAME_STATE: {self.frame_counter}"]
+
+
+class MenuDialect(Dialect):
+    """Lab3/v2: меню до START_GAME, затем игра 800x600 и спавн врагов по команде PC.
+
+    angle=True - раскладка v2 (байт угла корабля после player_y).
+    """
+
+    name = 'menu'
+    period = 1 / 30
+
+    PACKET_GAME_STATE = 0x01
+    PACKET_MENU_STATE = 0x02
+    PACKET_DEBUG = 0x03
+    PACKET_EXPLOSION = 0x04
+    PACKET_SPAWN_ENEMY = 0x10
+    PACKET_START_GAME = 0x11
+    PACKET_PAUSE_GAME = 0x12
+    PACKET_SPAWN_ISLAND = 0x13
+    PACKET_SPAWN_WHIRLPOOL = 0x14
+
+    MENU, PLAYING, PAUSED, GAME_OVER = range(4)
+    MAX_ENEMIES = 10
+    MAX_BULLETS = 10
+
+    def __init__(self, framing=FRAMING_END, angle=False):
+        super().__init__(framing)
+        self.angle = angle
+        self.state = self.MENU
+        self.selected_item = 0
+        self.buttons = {'left': 0, 'right': 0, 'fire': 0}
+        self.player = [400, 550, 100]   # x, y, hp
+        self.score = 0
+        self.level = 1
+        self.enemies = []        # [x, y, type, hp, vx, vy]
+        self.bullets = []
+        self.enemy_bullets = []
+        self.islands = []
+        self.whirlpools = []
+        self.fire_cooldown = 0
+
+    def _debug(self, message):
+        self.send(self.PACKET_DEBUG, message.encode('utf-8'), drop_if_busy=True)
+
+    def on_input(self, **inputs):
+        for key in self.buttons:
+            if key in inputs:
+                self.buttons[key] = int(inputs[key])
+        if 'item' in inputs:
+            self.selected_item = int(inputs['item'])
+        if 'state' in inputs:
+            self.state = int(inputs['state'])
+
+    def on_packet(self, packet_type, payload, now):
+        if packet_type == self.PACKET_START_GAME:
+            self.state = self.PLAYING
+            self._debug("START_GAME")
+        elif packet_type == self.PACKET_PAUSE_GAME:
+            self.state = self.PAUSED if self.state == self.PLAYING else self.PLAYING
+            self._debug("PAUSE_GAME")
+        elif packet_type == self.PACKET_SPAWN_ENEMY and len(payload) >= 5:
+            x, enemy_type, vx, vy = struct.unpack_from('>HBbb', payload)
+            if len(self.enemies) < self.MAX_ENEMIES:
+                self.enemies.append([float(x), 0.0, enemy_type, 2 if enemy_type else 1, vx / 10, vy / 10])
+        elif packet_type == self.PACKET_SPAWN_ISLAND and len(payload) >= 5:
+            self.islands.append(struct.unpack_from('>HHB', payload))
+        elif packet_type == self.PACKET_SPAWN_WHIRLPOOL and len(payload) >= 8:
+            self.whirlpools.append(struct.unpack_from('>HHHH', payload))
+        else:
+            self._debug(f"UNKNOWN 0x{packet_type:02X}")
+
+    def tick(self, now):
+        if self.state != self.PLAYING:
+            payload = struct.pack('>BBH', self.state, self.selected_item, self.score)
+            self.send(self.PACKET_MENU_STATE, payload, drop_if_busy=True)
+            return
+
+        player = self.player
+        player[0] = min(780, max(20, player[0] + 6 * (self.buttons['right'] - self.buttons['left'])))
+        self.fire_cooldown = max(0, self.fire_cooldown - 1)
+        if self.buttons['fire'] and not self.fire_cooldown and len(self.bullets) < self.MAX_BULLETS:
+            self.bullets.append([player[0], player[1] - 20])
+            self.fire_cooldown = 8
+
+        for bullet in self.bullets:
+            bullet[1] -= 10
+        for enemy in self.enemies:
+            enemy[0] += enemy[4]
+            enemy[1] += enemy[5]
+
+        # Попадания: враг исчезает, на PC уходит EXPLOSION
+        for bullet in self.bullets:
+            for enemy in self.enemies:
+                if enemy[3] > 0 and abs(bullet[0] - enemy[0]) < 25 and abs(bullet[1] - enemy[1]) < 25:
+                    enemy[3] -= 1
+                    bullet[1] = -100
+                    if enemy[3] == 0:
+                        self.score += 10
+                        self.send(self.PACKET_EXPLOSION, struct.pack('>HH', int(enemy[0]), int(enemy[1])),
+                                  drop_if_busy=True)
+        self.bullets = [b for b in self.bullets if b[1] > 0]
+        self.enemies = [e for e in self.enemies if e[3] > 0 and 0 <= e[0] <= 800 and e[1] < 600]
+        self.level = 1 + self.score // 100
+
+        self.send(self.PACKET_GAME_STATE, self.encode_state(), drop_if_busy=True)
+
+    def encode_state(self):
+        """Данные GameStatePacket (big-endian, координаты экрана)"""
+        x, y, hp = self.player
+        data = bytearray(struct.pack('>HH', int(x), int(y)))
+        if self.angle:
+            data += struct.pack('b', 0)
+        data += struct.pack('>BHB', hp, self.score, self.level)
+        data.append(len(self.enemies))
+        for ex, ey, enemy_type, ehp, _, _ in self.enemies:
+            data += struct.pack('>HHBB', int(ex), int(ey), enemy_type, ehp)
+        data.append(len(self.bullets))
+        for bx, by in self.bullets:
+            data += struct.pack('>HH', int(bx), int(by))
+        data.append(len(self.enemy_bullets))
+        for bx, by in self.enemy_bullets:
+            data += struct.pack('>HH', int(bx), int(by))
+        return bytes(data)
+
+    def statistics(self):
+        return super().statistics() + [f"Состояние: {self.state}, счёт: {self.score}, врагов: {len(self.enemies)}"]
+
+
+class TextDialect(Dialect):
+    """test.py: строка раз в period, ответ на каждое принятое число"""
+
+    name = 'text'
+    period = 1.0
+
+    def __init__(self, framing=FRAMING_END):
+        super().__init__(framing)
+        self.ticks = 0
+        self.numbers = []
+
+    def feed(self, data, now):
+        # Без кадров: '0'..'9' - цифра ASCII, остальное - число байтом
+        for byte in data:
+            number = byte - ord('0') if ord('0') <= byte <= ord('9') else byte
+            self.numbers.append(number)
+            self.rx_packets += 1
+            self.link.send(f"Received: {number}\r\n".encode('utf-8'))
+
+    def tick(self, now):
+        self.ticks += 1
+        self.link.send(f"STM32 alive #{self.ticks}\r\n".encode('utf-8'))
+
+    def statistics(self):
+        return [f"Принято чисел: {len(self.numbers)}, последние: {self.numbers[-5:]}"]
+
+
+DIALECTS = {
+    'buttons': ButtonsDialect,
+    'laba3': Laba3Dialect,
+    'menu': MenuDialect,
+    'text': TextDialect,
+}
+
+
+def load_script(path):
+    """Сценарий входов: строки "<секунды> ключ=значение ...", # - комментарий"""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].split()
+            if not line:
+                continue
+            inputs = {}
+            for item in line[1:]:
+                key, value = item.split('=', 1)
+                inputs[key] = float(value) if '.' in value else int(value)
+            events.append((float(line[0]), inputs))
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+class STM32Emulator:
+    """Главный цикл платы: сценарий -> tick() диалекта -> линия -> разбор принятого"""
+
+    def __init__(self, dialect, link, script=(), duration=None):
+        self.dialect = dialect
+        self.link = link
+        dialect.link = link
+        self.script = deque(script)
+        self.duration = duration
+        self.running = False
+        self.started_at = 0.0
+
+    def run(self):
+        self.link.open()
+        self.running = True
+        self.started_at = start = time.perf_counter()
+        next_tick = start
+
+        try:
+            while self.running:
+                now = time.perf_counter()
+                if self.duration is not None and now - start >= self.duration:
+                    break
+
+                while self.script and self.script[0][0] <= now - start:
+                    self.dialect.on_input(**self.script.popleft()[1])
+
+                if now >= next_tick:
+                    self.dialect.tick(now)
+                    next_tick += self.dialect.period
+                    if next_tick < now:
+                        next_tick = now + self.dialect.period   # не догоняем пропущенные шаги
+
+                data = self.link.pump(max(0.0, next_tick - time.perf_counter()))
+                if data:
+                    self.dialect.feed(data, time.perf_counter())
+        finally:
+            self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def print_statistics(self):
+        """Вывод статистики линии и диалекта"""
+        link = self.link
+        elapsed = max(1e-9, time.perf_counter() - self.started_at)
+        utilization = link.tx_bytes * BITS_PER_BYTE / (link.baud * elapsed) * 100 if link.baud else 0.0
+        print("\n===== СТАТИСТИКА ЭМУЛЯТОРА =====")
+        print(f"Диалект: {self.dialect.name}, время: {elapsed:.1f} с")
+        print(f"Отправлено: {link.tx_frames} кадров, {link.tx_bytes} байт ({utilization:.1f}% линии), "
+              f"пропущено (UART занят): {link.tx_dropped}")
+        print(f"Принято байт: {link.rx_bytes}, инвертировано бит: {link.flipped_bits}")
+        for line in self.dialect.statistics():
+            print(line)
+        print("================================\n")
+
+
+def benchmark(seconds=2.0, baud=UART_BAUDRATE, bit_error_rates=(0.0, 1e-5, 1e-4)):
+    """Замер линии LABA_3 через псевдотерминал: кадры/с, потери, задержка.
+
+    Задержка - от формирования GAME_STATE на плате до разбора кадра на
+    стороне PC (очередь UART + передача + ОС + FrameParser).
+    """
+    import serial
+
+    print("\n===== ЭМУЛЯТОР: ЛИНИЯ LABA_3 =====")
+    print(f"{'разметка':>9} {'BER':>7} {'кадр/с':>7} {'потери':>7} {'ресинхр':>8} "
+          f"{'p50, мс':>8} {'p99, мс':>8}")
+    for framing in (FRAMING_END, FRAMING_LENGTH):
+        for ber in bit_error_rates:
+            dialect = Laba3Dialect(framing, debug_acks=False)
+            dialect.sent_at = {}
+            link = PtyLink(baud=baud, ber=ber, seed=1)
+            emulator = STM32Emulator(dialect, link, duration=seconds)
+            thread = threading.Thread(target=emulator.run, daemon=True)
+
+            ser = serial.Serial(link.port, baud, timeout=0.005)
+            parser = FrameParser(START_BYTE, END_BYTE, min_length=10, max_length=512, framing=framing)
+            latencies = []
+            received = 0
+            thread.start()
+            while thread.is_alive() or ser.in_waiting:
+                if not parser.read_serial(ser, 4096):
+                    data = ser.read(1)
+                    if not data:
+                        continue
+                    parser.feed(data)
+                now = time.perf_counter()
+                for frame in parser.frames():
+                    if frame[1] != Laba3Dialect.PKT_GAME_STATE or crc8(frame[1:-2]) != frame[-2]:
+                        continue
+                    received += 1
+                    frame_counter = struct.unpack_from('<I', frame, len(frame) - 6)[0]
+                    sent_at = dialect.sent_at.get(frame_counter)
+                    if sent_at is not None:
+                        latencies.append((now - sent_at) * 1000)
+            ser.close()
+            link.close()
+
+            sent = link.tx_frames
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] if latencies else float('nan')
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else float('nan')
+            loss = (sent - received) / max(1, sent) * 100
+            print(f"{framing:>9} {ber:>7.0e} {received / seconds:>7.1f} {loss:>6.1f}% {parser.resyncs:>8} "
+                  f"{p50:>8.1f} {p99:>8.1f}")
+    print("==================================\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Виртуальная плата STM32 для UART-клиентов")
+    parser.add_argument('dialect', choices=sorted(DIALECTS) + ['benchmark'])
+    parser.add_argument('--baud', type=int, default=UART_BAUDRATE, help="скорость линии, 0 - без ограничения")
+    parser.add_argument('--ber', type=float, default=0.0, help="вероятность ошибки на бит")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--script', help="файл сценария входов платы")
+    parser.add_argument('--framing', choices=(FRAMING_END, FRAMING_LENGTH), default=FRAMING_END)
+    parser.add_argument('--socket', type=int, metavar='PORT', help="TCP-порт вместо псевдотерминала")
+    parser.add_argument('--duration', type=float, help="время работы, с")
+    parser.add_argument('--angle', action='store_true', help="menu: раскладка GAME_STATE из v2")
+    parser.add_argument('--latency', action='store_true', help="buttons: кадры с seq/временем и эхо миль")
+    args = parser.parse_args()
+
+    if args.dialect == 'benchmark':
+        benchmark(baud=args.baud or UART_BAUDRATE)
+        return
+
+    if args.dialect == 'menu':
+        dialect = MenuDialect(args.framing, angle=args.angle)
+    elif args.dialect == 'buttons':
+        dialect = ButtonsDialect(args.framing, latency=args.latency)
+    else:
+        dialect = DIALECTS[args.dialect](args.framing)
+
+    if sys.platform == 'win32' and not args.socket:
+        print("✗ Псевдотерминал есть только в Linux/macOS, на Windows - --socket PORT")
+        return
+
+    link_args = dict(baud=args.baud, ber=args.ber, seed=args.seed)
+    link = SocketLink(tcp_port=args.socket, **link_args) if args.socket else PtyLink(**link_args)
+    script = load_script(args.script) if args.script else ()
+    emulator = STM32Emulator(dialect, link, script, args.duration)
+
+    print(f"✓ Эмулятор STM32 ({dialect.name}) @ {args.baud}, BER={args.ber:g}")
+    print(f"  Порт для клиента: {link.port}")
+    print("  Ctrl+C - выход")
+    try:
+        emulator.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.print_statistics()
+        link.close()
+
+
+if __name__ == "__main__":
+    main()
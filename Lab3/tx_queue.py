@@ -0,0 +1,147 @@
+# tx_queue.py - очередь передачи UART: приоритеты, склейка кадров, бюджет линии
+#
+# Общий модуль (LABA_3, Lab3): игра кладёт готовые кадры в put() и не ждёт
+# порт. Поток записи склеивает накопившиеся кадры в один write() и держит
+# в буферах ОС/USB не больше max_in_flight байт сверх того, что линия уже
+# передала на своей скорости. Срочная команда (TX_PRIORITY_HIGH) поэтому
+# ждёт не всю очередь данных мира, а максимум одну пачку.
+
+import threading
+import time
+from collections import deque
+
+TX_PRIORITY_HIGH = 0    # команды: INIT_GAME, START/PAUSE, запросы
+TX_PRIORITY_LOW = 1     # данные мира: берега, острова, спавн
+
+TX_MAX_IN_FLIGHT = 256      # байт в пути (~22 мс на 115200)
+TX_MAX_PENDING = 65536      # байт в очереди; сверх - кадр отбрасывается
+BITS_PER_BYTE = 10          # старт + 8 бит + стоп
+
+
+class TxQueue:
+    """Неблокирующая передача кадров с потоком записи.
+
+    Статистика: frames_sent, bytes_sent, writes (вызовов ser.write),
+    dropped (очередь переполнена), errors, max_delay (с, от put до write).
+    """
+
+    def __init__(self, ser, baudrate, max_in_flight=TX_MAX_IN_FLIGHT, max_pending=TX_MAX_PENDING):
+        self.ser = ser
+        self.byte_time = BITS_PER_BYTE / baudrate
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+
+        self._queues = (deque(), deque())   # по приоритетам: (время put, кадр)
+        self._pending = 0
+        self._writing = False
+        self._line_free_at = 0.0            # когда линия передаст всё записанное
+        self._cond = threading.Condition()
+        self._running = True
+
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.writes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_delay = 0.0
+
+        self._thread = threading.Thread(target=self._writer_loop, name="UARTWriter", daemon=True)
+        self._thread.start()
+
+    def put(self, frame, priority=TX_PRIORITY_LOW):
+        """Кадр в очередь; False - очередь переполнена, кадр отброшен"""
+        with self._cond:
+            if self._pending + len(frame) > self.max_pending:
+                self.dropped += 1
+                return False
+            self._queues[priority].append((time.perf_counter(), frame))
+            self._pending += len(frame)
+            self._cond.notify()
+        return True
+
+    def discard(self, priority=TX_PRIORITY_LOW):
+        """Сброс неотправленных кадров приоритета (например, старого мира перед INIT_GAME)"""
+        with self._cond:
+            queue = self._queues[priority]
+            count = len(queue)
+            self._pending -= sum(len(frame) for _, frame in queue)
+            queue.clear()
+        return count
+
+    @property
+    def pending_bytes(self):
+        return self._pending
+
+    @property
+    def in_flight(self):
+        """Байт, записанных в порт, но ещё не переданных линией"""
+        return max(0.0, self._line_free_at - time.perf_counter()) / self.byte_time
+
+    def flush(self, timeout=None):
+        """Ожидание отправки очереди; False - не успели за timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self, timeout=1.0):
+        """Дописать очередь (не дольше timeout) и остановить поток"""
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _take_batch(self, limit):
+        """Кадры по приоритету до limit байт (минимум один кадр)"""
+        now = time.perf_counter()
+        batch = []
+        size = 0
+        for queue in self._queues:
+            while queue and (not batch or size + len(queue[0][1]) <= limit):
+                queued_at, frame = queue.popleft()
+                batch.append(frame)
+                size += len(frame)
+                self.max_delay = max(self.max_delay, now - queued_at)
+        self._pending -= size
+        return batch, size
+
+    def _writer_loop(self):
+        # В пути не больше max_in_flight: половина - уже в линии, половина - новая пачка
+        batch_limit = max(1, self.max_in_flight // 2)
+
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self._running)
+                if not self._pending:
+                    return
+
+            # Бюджет линии: ждём, пока линия передаст записанное раньше.
+            # Пачка берётся после ожидания, чтобы пришедшие за это время
+            # срочные кадры ушли первыми
+            wait = (self._line_free_at - time.perf_counter()) - batch_limit * self.byte_time
+            if wait > 0:
+                time.sleep(wait)
+
+            with self._cond:
+                batch, size = self._take_batch(batch_limit)
+                self._writing = True
+
+            try:
+                self.ser.write(b''.join(batch))
+                self.frames_sent += len(batch)
+                self.bytes_sent += size
+                self.writes += 1
+            except Exception:
+                self.errors += 1
+
+            now = time.perf_counter()
+            self._line_free_at = max(now, self._line_free_at) + size * self.byte_time
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+    def print_statistics(self):
+        """Строка статистики очереди"""
+        frames_per_write = self.frames_sent / self.writes if self.writes else 0.0
+        print(f"TX очередь: {self.frames_sent} кадров за {self.writes} записей "
+              f"({frames_per_write:.1f} кадра/запись), {self.bytes_sent} байт, "
+              f"макс. ожидание {self.max_delay * 1000:.1f} мс, отброшено {self.dropped}, ошибок {self.errors}")
@@ -4,6 +4,7 @@ protocol.py
 """
 
 import struct
+from crc8 import crc8
 
 # Константы протокола
 START_BYTE = 0xAA
@@ -26,18 +27,6 @@ PACKET_SPAWN_WHIRLPOOL = 0x14
 MAX_ENEMIES = 10
 MAX_BULLETS = 10
 
-def crc8(data):
-    """Вычисление CRC8"""
-    crc = 0
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 0x80:
-                crc = (crc << 1) ^ 0x07
-            else:
-                crc <<= 1
-            crc &= 0xFF
-    return crc
 
 class DebugPacket:
     """Пакет отладки STM32 -> PC"""
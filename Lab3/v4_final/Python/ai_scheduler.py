@@ -0,0 +1,152 @@
+# ai_scheduler.py - Уровни детализации AI врагов по расстоянию до игрока
+
+import time
+import numpy as np
+from config import *
+from obstacle_probes import circles_collide
+from enemy_system import LOD_UNSET
+
+
+class EnemyScheduler:
+    """Кому из врагов в этом тике считать полный AI.
+
+    Период обновления задаётся полосой расстояния до игрока (ENEMY_LOD_BANDS):
+    в ближней полосе (враг может стрелять, таранить, попасть под снаряд) -
+    каждый тик, дальше - раз в 2, 4, ENEMY_LOD_FAR_PERIOD тиков. Дальние
+    враги обновляются по кругу: каждому на первом появлении даётся своё
+    смещение, первыми идут дольше всех ждавшие, и только пока не исчерпан
+    бюджет ENEMY_AI_BUDGET_MS. В пропущенных тиках враг движется по
+    последней скорости (dead reckoning) без AI и проверок столкновений.
+    """
+
+    def __init__(self, bands=ENEMY_LOD_BANDS, far_period=ENEMY_LOD_FAR_PERIOD,
+                 budget_ms=ENEMY_AI_BUDGET_MS, chunk=ENEMY_AI_SLICE_CHUNK):
+        self.thresholds = np.array([distance for distance, _ in bands], dtype=np.float64)
+        self.periods = np.array([period for _, period in bands] + [far_period], dtype=np.int64)
+        self.far_period = far_period
+        self.budget = budget_ms / 1000
+        self.chunk = chunk
+        self._slots = 0
+
+        # Статистика
+        self.full_updates = 0       # ближняя полоса, каждый тик
+        self.sliced_updates = 0     # дальние, по очереди
+        self.dead_reckoned = 0      # тиков движения без AI
+        self.deferred = 0           # дальних, не влезших в бюджет
+        self.restored = 0           # откатов из препятствия после dead reckoning
+
+    def plan(self, enemies, player, frame):
+        """Строки EnemySystem: (полный AI в этом тике, дальние к обновлению по очереди)"""
+        n = len(enemies)
+        if n == 0:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        lod_tick = enemies.lod_tick[:n]
+        unset = np.flatnonzero(lod_tick == LOD_UNSET)
+        if unset.size:
+            # Смещение по кругу, чтобы враги одного сегмента не шли в один тик
+            lod_tick[unset] = frame - (self._slots + np.arange(unset.size)) % self.far_period
+            self._slots += unset.size
+
+        dx = enemies.x[:n] - player.x
+        dy = enemies.y[:n] - player.y
+        period = self.periods[np.searchsorted(self.thresholds, np.sqrt(dx*dx + dy*dy))]
+        waited = frame - lod_tick
+
+        full = np.flatnonzero(period == 1)
+        due = np.flatnonzero((period > 1) & (waited >= period))
+        # Дольше всех ждавшие - первыми (то, что не влезло в бюджет, пойдёт первым в следующем тике)
+        sliced = due[np.argsort(-waited[due], kind='stable')]
+
+        lod_tick[full] = frame
+        self.full_updates += full.size
+        return full, sliced
+
+    def budgeted(self, enemies, full, sliced, frame, world_index):
+        """Пакеты строк для AI: ближние вместе с первыми chunk дальних, дальше
+        дальние по chunk строк, пока не исчерпан бюджет тика"""
+        deadline = None
+        for start in range(0, max(sliced.size, 1), self.chunk):
+            if deadline is None:
+                # Бюджет отсчитывается после первого пакета (ближние в него не входят)
+                deadline = time.perf_counter() + self.budget
+            elif time.perf_counter() > deadline:
+                self.deferred += sliced.size - start
+                return
+            rows = sliced[start:start + self.chunk]
+            self._restore_if_blocked(enemies, rows, frame, world_index)
+            enemies.lod_tick[rows] = frame
+            self.sliced_updates += rows.size
+            if start == 0:
+                rows = np.concatenate((full, rows))
+            if rows.size:
+                yield rows
+
+    def _restore_if_blocked(self, enemies, rows, frame, world_index):
+        """Dead reckoning завёл врага в остров или берег - назад к позиции последнего AI"""
+        rows = rows[enemies.active[rows]]  # неактивные стоят на месте
+        if rows.size == 0:
+            return
+        radius = enemies.param('radius', rows).astype(np.float64)
+        blocked = rows[circles_collide(enemies.x[rows], enemies.y[rows], radius, world_index)]
+        if blocked.size == 0:
+            return
+        skipped = frame - enemies.lod_tick[blocked] - 1
+        enemies.x[blocked] -= enemies.speed_x[blocked] * skipped
+        enemies.y[blocked] -= enemies.speed_y[blocked] * skipped
+        self.restored += blocked.size
+
+    def dead_reckon(self, enemies, frame):
+        """Движение по последней скорости для всех, кто в этом тике без AI"""
+        n = len(enemies)
+        idle = np.flatnonzero(enemies.lod_tick[:n] != frame)
+        enemies.x[idle] += enemies.speed_x[idle]
+        enemies.y[idle] += enemies.speed_y[idle]
+        self.dead_reckoned += idle.size
+
+    def print_statistics(self):
+        """Строка статистики планировщика"""
+        total = self.full_updates + self.sliced_updates + self.dead_reckoned
+        share = (self.full_updates + self.sliced_updates) / total * 100 if total else 0.0
+        print(f"AI врагов: полных {self.full_updates}, по очереди {self.sliced_updates}, "
+              f"dead reckoning {self.dead_reckoned} ({share:.0f}% тиков с AI), "
+              f"отложено по бюджету {self.deferred}, откатов из препятствий {self.restored}")
+
+
+def benchmark(enemy_count=150, frames=600, seed=ENGINE_BENCHMARK_SEED):
+    """Фаза врагов с полосами детализации и с полным AI для всех (много врагов по всему миру)"""
+    import random
+    from engine import GameEngine
+    from enemy_system import EnemySystem
+
+    print("\n===== ПЛАНИРОВЩИК AI ВРАГОВ =====")
+    for name, scheduler in (("все каждый тик", EnemyScheduler(bands=((float('inf'), 1),))),
+                            ("полосы + бюджет", EnemyScheduler())):
+        engine = GameEngine(seed=seed, verbose=False, background_generation=False)
+        engine.ai_scheduler = scheduler
+        rng = random.Random(seed)
+        engine.enemies = EnemySystem(seed, headless=engine.headless)
+        for _ in range(enemy_count):
+            engine.enemies.spawn('simple' if rng.random() < 0.7 else 'hard',
+                                 rng.uniform(SHORE_EDGE_MARGIN, SCREEN_WIDTH - SHORE_EDGE_MARGIN),
+                                 rng.uniform(engine.world_top, engine.player.y + ENEMY_DELETE_DISTANCE / 2))
+
+        times = []
+        for _ in range(frames):
+            engine.frame += 1
+            engine._store_previous_positions()
+            start = time.perf_counter()
+            engine._update_enemies()
+            times.append(time.perf_counter() - start)
+        engine.close()
+
+        times = np.array(times) * 1000
+        print(f"{name:<16} врагов {enemy_count}: среднее {times.mean():.3f} мс, "
+              f"p95 {np.percentile(times, 95):.3f} мс, max {times.max():.3f} мс")
+        scheduler.print_statistics()
+    print("=================================\n")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -3,7 +3,13 @@
 # === ПАРАМЕТРЫ ЭКРАНА ===
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
-FPS = 60
+FPS = 60  # предел частоты отрисовки
+
+# === ФИКСИРОВАННЫЙ ШАГ СИМУЛЯЦИИ ===
+# Все скорости и таймеры в этом файле заданы за тик симуляции
+SIM_TICK_RATE = 60
+SIM_TICK = 1.0 / SIM_TICK_RATE
+SIM_MAX_TICKS_PER_FRAME = 5  # предел догоняющих тиков за один кадр
 
 # === ЦВЕТА ===
 WATER_BLUE = (20, 105, 180)
@@ -38,6 +44,7 @@ PROJECTILE_RADIUS = 5
 PROJECTILE_COLOR_PLAYER = (255, 255, 0)
 PROJECTILE_COLOR_ENEMY = (255, 50, 50)
 PROJECTILE_DAMAGE_TO_PLAYER = 20
+PROJECTILE_INITIAL_CAPACITY = 256  # начальная ёмкость столбцов ProjectileSystem (растёт удвоением)
 
 # === ОСТРОВА ===
 ISLAND_MIN_RADIUS = 50
@@ -50,6 +57,9 @@ ISLAND_STRUCTURES_MIN = 0
 ISLAND_STRUCTURES_MAX = 2
 ISLAND_DECORATIONS_MIN = 3
 ISLAND_DECORATIONS_MAX = 8
+ISLAND_BAKE_MARGIN = 60  # запас запечённой поверхности вокруг формы (структуры выше берега)
+ISLAND_ANIMATED_STRUCTURES = ('palm', 'lighthouse')  # рисуются поверх запечённой поверхности
+ISLAND_CACHE_BUDGET_BYTES = 48 * 1024 * 1024
 
 # === БЕРЕГА ===
 SHORE_WIDTH = 150
@@ -58,6 +68,7 @@ SHORE_INDENT_MAX = 100
 SHORE_SEGMENT_HEIGHT_MIN = 80
 SHORE_SEGMENT_HEIGHT_MAX = 150
 SHORE_EDGE_MARGIN = 200
+SHORE_COLLISION_MARGIN = 10  # запас к радиусу при столкновении с берегом
 
 # === ВРАГИ - ПРОСТЫЕ ===
 ENEMY_SIMPLE_SIZE = 40
@@ -74,6 +85,11 @@ ENEMY_SIMPLE_TORPEDO_DAMAGE = 30
 ENEMY_SIMPLE_SPAWN_CHANCE = 0.25
 ENEMY_SIMPLE_CAN_SEE_RANGE_X = 400
 ENEMY_SIMPLE_CAN_SEE_RANGE_Y = 300
+ENEMY_SIMPLE_PROBE_ANGLES = (-30, 0, 30)  # градусы от курса
+ENEMY_SIMPLE_PROBE_RADIUS = 20
+ENEMY_SIMPLE_PROBE_STRENGTH = 1.0  # сила отталкивания от острова
+ENEMY_SIMPLE_PROBE_MIN_SCALE = 0.5  # нижний предел dist/100 в знаменателе силы
+ENEMY_SIMPLE_SHORE_PUSH = 1.5
 
 # === ВРАГИ - СЛОЖНЫЕ ===
 ENEMY_HARD_SIZE = 60
@@ -93,11 +109,20 @@ ENEMY_HARD_TORPEDO_DAMAGE = 1000
 ENEMY_HARD_SPAWN_CHANCE = 0.10
 ENEMY_HARD_CAN_SEE_RANGE_X = 500
 ENEMY_HARD_CAN_SEE_RANGE_Y = 400
+ENEMY_HARD_PROBE_ANGLES = (-45, -22, 0, 22, 45)
+ENEMY_HARD_PROBE_RADIUS = 30
+ENEMY_HARD_PROBE_STRENGTH = 1.2
+ENEMY_HARD_PROBE_MIN_SCALE = 0.3
+ENEMY_HARD_SHORE_PUSH = 2.0
 ENEMY_HARD_ARMOR_FLASH_DURATION = 20  # frames
 ENEMY_HARD_MIN_PATROL_DISTANCE = 300
 ENEMY_HARD_PATROL_POINTS_MIN = 2
 ENEMY_HARD_PATROL_POINTS_MAX = 2
 
+# === ХРАНИЛИЩЕ ВРАГОВ (enemy_system.py) ===
+ENEMY_INITIAL_CAPACITY = 128  # начальная ёмкость столбцов EnemySystem (растёт удвоением)
+ENEMY_PATROL_SLOTS = ENEMY_HARD_PATROL_POINTS_MAX + 1  # точек маршрута на врага (плюс финальная)
+
 # === ВОДОВОРОТЫ ===
 WHIRLPOOL_RADIUS = 45
 WHIRLPOOL_ROTATION_SPEED = 8
@@ -118,7 +143,6 @@ WORLD_SEGMENT_HEIGHT = 2000
 WORLD_GENERATION_AHEAD = 1500  # когда генерировать новый сегмент
 WORLD_ISLAND_SPAWN_CHANCE = 0.85
 WORLD_ISLAND_MIN_SPACING = 120
-WORLD_ISLAND_RECENT_CHECK = 30  # сколько последних островов проверять
 WORLD_ISLAND_STEP_MIN = 60
 WORLD_ISLAND_STEP_MAX = 120
 WORLD_ENEMY_SPAWN_DISTANCE = -1500  # враги только впереди игрока
@@ -126,6 +150,9 @@ WORLD_ENEMY_STEP_MIN = 100
 WORLD_ENEMY_STEP_MAX = 200
 WORLD_CLEANUP_DISTANCE = 2000  # удаление объектов позади игрока
 WORLD_INITIAL_SEGMENTS = 3
+WORLD_PREGENERATE_SEGMENTS = 2  # сколько сегментов держать готовыми впереди
+WORLD_GENERATOR_POLL_INTERVAL = 0.5  # take(): как часто проверять, жив ли поток генерации, с
+WORLD_SEGMENT_SEED_STRIDE = 1000003  # seed сегмента = seed мира * шаг + номер
 
 # === КАМЕРА ===
 CAMERA_OFFSET = 200
@@ -140,10 +167,19 @@ UI_BIG_FONT_SIZE = 48
 UI_CONTROLS_WIDTH = 440
 UI_CONTROLS_HEIGHT = 150
 UI_GAME_OVER_WAIT = 4000  # milliseconds
+UI_MONO_FONT_SIZE = 18
+UI_TEXT_CACHE_SIZE = 256  # отрисованных строк UI в кэше (переполнился - очищается целиком)
+
+# === ПРОФИЛИРОВЩИК (profiler.py) ===
+PROFILER_HISTORY_FRAMES = 600  # кольцевой буфер кадров (10 с при 60 FPS)
+PROFILER_OVERLAY_REFRESH = 30  # кадров между пересборкой оверлея
+PROFILER_CSV_PATH = 'profile_frames.csv'
+PROFILER_JSON_PATH = 'profile_summary.json'
 
 # === АНИМАЦИЯ ===
 WAVE_SPEED = 2
 WAVE_HEIGHT = 40
+WAVE_LAYER_SPACING = 35  # расстояние между линиями волн
 TELEPORT_EFFECT_DURATION = 30  # frames
 
 # === АКТИВАЦИЯ И ОЧИСТКА ===
@@ -158,5 +194,28 @@ COLLISION_RADIUS_ENEMY_HARD = ENEMY_HARD_SIZE // 2
 SPAWN_CLEARANCE_RADIUS = 50
 ENEMY_CLEARANCE_EXTRA = 50
 
+# === УРОВНИ ДЕТАЛИЗАЦИИ AI (ai_scheduler.py) ===
+ENEMY_LOD_BANDS = ((700, 1), (1400, 2), (2500, 4))  # (до расстояния от игрока, период AI в тиках)
+ENEMY_LOD_FAR_PERIOD = 8  # период дальше последней полосы
+ENEMY_AI_BUDGET_MS = 2.0  # бюджет тика на дальних врагов
+ENEMY_AI_SLICE_CHUNK = 32  # дальних врагов в одном пакете AI (бюджет проверяется между пакетами)
+
+# === ПОЛЕ ТЕЧЕНИЯ СЕГМЕНТА (flow_field.py) ===
+ENEMY_STEERING = 'flow'  # 'flow' - поле сегмента, 'probes' - зонды (obstacle_probes.py)
+FLOW_CELL_SIZE = 40  # клетка сетки, пикселей
+FLOW_CLEARANCE = 50  # запас вокруг препятствий: радиус большого врага + полклетки
+FLOW_AVOID_CELLS = 4  # ближе стольких клеток к препятствию включается обход
+FLOW_AVOID_STRENGTH = 3.0  # сила обхода у самого препятствия
+FLOW_LOOKAHEAD = (0.25, 1.0)  # точки по курсу, доли дальности обзора врага
+
+# === ПРОСТРАНСТВЕННЫЙ ИНДЕКС ===
+SPATIAL_BUCKET_HEIGHT = 200  # высота корзины по мировой y
+SPATIAL_QUERY_MARGIN = SHORE_COLLISION_MARGIN  # запас запроса по y
+
+# === СИМУЛЯЦИЯ БЕЗ ОКНА (engine.py) ===
+ENGINE_BENCHMARK_FRAMES = 20000
+ENGINE_BENCHMARK_CHUNK = 60  # кадров с одними и теми же кнопками
+ENGINE_BENCHMARK_SEED = 12345
+
 # === КОНВЕРСИЯ ===
 PIXELS_PER_MILE = 10  # для отображения расстояния
\ No newline at end of file
@@ -0,0 +1,424 @@
+# enemy_system.py - Все враги в столбцах NumPy: горячее состояние и пакетный AI
+
+import math
+import time
+import numpy as np
+import pygame
+from config import *
+from sprites import sprite_registry, SPRITE_DIRECTIONS
+from obstacle_probes import circles_collide
+from pools import allocations
+import enemy_simple
+import enemy_hard
+
+# Типы врагов: код типа - номер модуля в KINDS (имена - как в segment.enemy_candidates)
+KINDS = (enemy_simple, enemy_hard)
+KIND_CODES = {kind.NAME: code for code, kind in enumerate(KINDS)}
+
+# Параметры типов таблицами: PARAMS[имя][столбец kind] - значение для каждого врага
+PARAMS = {name: np.array([kind.PARAMS[name] for kind in KINDS]) for name in enemy_simple.PARAMS}
+PROBE_OFFSETS = tuple(np.radians(np.array(kind.PROBE_ANGLES, dtype=np.float64)) for kind in KINDS)
+
+# Стратегии: код 0 - ещё не выбрана (враг не активирован)
+STRATEGIES = (None,) + tuple(dict.fromkeys(name for kind in KINDS for name in kind.STRATEGIES))
+STRATEGY_CODES = {name: code for code, name in enumerate(STRATEGIES)}
+KERNELS = {(code, STRATEGY_CODES[name]): kernel
+           for code, kind in enumerate(KINDS) for name, kernel in kind.STRATEGIES.items()}
+
+DIRECTION_UP, DIRECTION_DOWN, DIRECTION_LEFT, DIRECTION_RIGHT = (
+    SPRITE_DIRECTIONS.index(name) for name in ('up', 'down', 'left', 'right'))
+
+LOD_UNSET = np.iinfo(np.int64).min  # тик последнего AI ещё не назначен (ai_scheduler.py)
+
+
+class EnemySystem:
+    """Хранилище врагов по столбцам: позиция, курс, скорость, таймеры, здоровье, тип, стратегия.
+
+    Постоянные параметры типа не копируются во врага, а берутся из таблиц
+    PARAMS по столбцу kind. AI считается пакетно для набора строк: ядро
+    стратегии (модули enemy_simple/enemy_hard) даёт целевой курс, остальное
+    (обход, поворот, движение, столкновения, края, стрельба) общее для
+    всех. Счётчики типов ведутся при добавлении и удалении. Удаление -
+    swap-remove, как в ProjectileSystem, поэтому номера строк действуют
+    только до ближайшего remove().
+    """
+
+    COLUMNS = (
+        ('x', np.float64),
+        ('y', np.float64),
+        ('prev_x', np.float64),
+        ('prev_y', np.float64),
+        ('angle', np.float64),          # текущий курс
+        ('speed_x', np.float64),
+        ('speed_y', np.float64),
+        ('health', np.int32),
+        ('shoot_cooldown', np.int32),
+        ('armor_timer', np.int32),
+        ('wander_timer', np.int32),
+        ('wander_angle', np.float64),
+        ('pursuit_timer', np.int32),
+        ('pursuit_direction', np.float64),
+        ('patrol_index', np.int32),
+        ('patrol_count', np.int32),
+        ('kind', np.int8),
+        ('strategy', np.int8),
+        ('active', np.bool_),
+        ('direction', np.int8),         # номер в SPRITE_DIRECTIONS
+        ('lod_tick', np.int64),         # тик последнего полного AI
+    )
+    # Столбцы по ENEMY_PATROL_SLOTS значений на врага
+    WIDE_COLUMNS = (
+        ('patrol_x', np.float64),
+        ('patrol_y', np.float64),
+    )
+    # Смещения зондов по типам (obstacle_probes.py берёт их у хранилища, без импорта модуля)
+    PROBE_OFFSETS = PROBE_OFFSETS
+
+    def __init__(self, seed=None, capacity=ENEMY_INITIAL_CAPACITY, headless=False):
+        self.count = 0
+        self.capacity = 0
+        self._allocate(capacity)
+        self.counts = np.zeros(len(KINDS), dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+        self._sprites = None
+        self.headless = headless   # без окна спрайтов нет, draw() ничего не рисует
+
+    def _allocate(self, capacity):
+        """Выделение (или расширение) столбцов с сохранением живых врагов"""
+        if self.capacity:
+            allocations.note('pool_growth')
+        columns = [(name, dtype, (capacity,)) for name, dtype in self.COLUMNS]
+        columns += [(name, dtype, (capacity, ENEMY_PATROL_SLOTS)) for name, dtype in self.WIDE_COLUMNS]
+        for name, dtype, shape in columns:
+            column = np.zeros(shape, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                column[:self.count] = old[:self.count]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def _columns(self):
+        return [getattr(self, name) for name, _ in self.COLUMNS + self.WIDE_COLUMNS]
+
+    def __len__(self):
+        return self.count
+
+    def count_of(self, kind_name):
+        """Число врагов типа (счётчик, без обхода)"""
+        return int(self.counts[KIND_CODES[kind_name]])
+
+    def param(self, name, rows):
+        """Параметр типа для строк rows"""
+        return PARAMS[name][self.kind[rows]]
+
+    def set_strategy(self, rows, name):
+        self.strategy[rows] = STRATEGY_CODES[name]
+
+    def memory_bytes(self):
+        """Память столбцов (вся ёмкость)"""
+        return sum(column.nbytes for column in self._columns())
+
+    # === Создание и удаление ===
+
+    def spawn(self, kind_name, x, y):
+        """Добавление неактивного врага типа kind_name"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        code = KIND_CODES[kind_name]
+        i = self.count
+        for column in self._columns():
+            column[i] = 0
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.angle[i] = math.pi / 2
+        self.health[i] = PARAMS['health'][code]
+        self.kind[i] = code
+        self.direction[i] = DIRECTION_DOWN
+        self.lod_tick[i] = LOD_UNSET
+        self.count += 1
+        self.counts[code] += 1
+        KINDS[code].init(self, np.array([i]))
+
+    def remove(self, rows):
+        """Удаление строк (повторы допустимы): счётчики типов и swap-remove"""
+        n = self.count
+        dead = np.zeros(n, dtype=np.bool_)
+        dead[rows] = True
+        removed = int(np.count_nonzero(dead))
+        if removed == 0:
+            return
+
+        self.counts -= np.bincount(self.kind[:n][dead], minlength=len(KINDS))
+        keep = n - removed
+        holes = np.flatnonzero(dead[:keep])
+        fillers = keep + np.flatnonzero(~dead[keep:n])
+        if holes.size:
+            for column in self._columns():
+                column[holes] = column[fillers]
+        self.count = keep
+
+    def damage(self, row, amount):
+        """Урон одному врагу (броня мигает у типов с armor_flash); True - убит"""
+        self.health[row] -= amount
+        self.armor_timer[row] = PARAMS['armor_flash'][self.kind[row]]
+        return self.health[row] <= 0
+
+    def store_previous(self):
+        """Запоминание позиций перед тиком (для интерполяции при отрисовке)"""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    # === AI ===
+
+    def activate(self, rows, player):
+        """Активация приблизившихся; возвращает (активные строки с AI, отставшие к удалению)"""
+        waking = rows[~self.active[rows] & (self.y[rows] > player.y + ENEMY_ACTIVATION_DISTANCE * SCREEN_HEIGHT)]
+        if waking.size:
+            self.active[waking] = True
+            for code, kind in enumerate(KINDS):
+                chosen = waking[self.kind[waking] == code]
+                if chosen.size:
+                    kind.activate(self, chosen, player)
+
+        rows = rows[self.active[rows]]
+        behind = self.y[rows] > player.y + ENEMY_DELETE_DISTANCE
+        return rows[~behind], rows[behind]
+
+    def think(self, rows, player, avoidance, world_index, flow_fields, projectiles):
+        """Полный шаг AI для активных строк rows.
+
+        avoidance - (ax, ay) векторы обхода препятствий на строку или None,
+        flow_fields - поля течения (куда отворачивать при столкновении).
+        Выстрелы сразу добавляются в projectiles.
+        """
+        kinds = self.kind[rows]
+        groups = [(code, kind, np.flatnonzero(kinds == code)) for code, kind in enumerate(KINDS)]
+        groups = [group for group in groups if group[2].size]
+
+        # Видимость игрока (с позиции до хода)
+        seen = np.zeros(rows.size, dtype=np.bool_)
+        for _, kind, at in groups:
+            seen[at] = kind.can_see(self, rows[at], player)
+
+        # Целевой курс - ядро стратегии по своему набору строк
+        target = np.empty(rows.size, dtype=np.float64)
+        strategies = self.strategy[rows]
+        for (code, strategy), kernel in KERNELS.items():
+            at = np.flatnonzero((kinds == code) & (strategies == strategy))
+            if at.size:
+                target[at] = kernel(self, rows[at], player, seen[at])
+
+        # Обход препятствий: вектор обхода добавляется к желаемому направлению
+        if avoidance is not None:
+            avoid_x, avoid_y = avoidance
+            steer = np.flatnonzero((avoid_x != 0) | (avoid_y != 0))
+            if steer.size:
+                force = PARAMS['avoidance_force'][kinds[steer]]
+                t = target[steer]
+                target[steer] = np.arctan2(np.sin(t) + avoid_y[steer] * force,
+                                           np.cos(t) + avoid_x[steer] * force)
+
+        # Плавный поворот к цели (разница углов в [-pi, pi))
+        angle = self.angle[rows]
+        diff = (target - angle + math.pi) % (2 * math.pi) - math.pi
+        angle += diff * PARAMS['turn_smoothness'][kinds]
+
+        # Движение
+        speed = PARAMS['base_speed'][kinds]
+        speed_x = np.cos(angle) * speed
+        speed_y = np.sin(angle) * speed
+        old_x = self.x[rows]
+        old_y = self.y[rows]
+        x = old_x + speed_x
+        y = old_y + speed_y
+
+        # Столкновения: назад на старое место и отворот
+        radius = PARAMS['radius'][kinds]
+        hit = np.flatnonzero(circles_collide(x, y, radius, world_index))
+        if hit.size:
+            x[hit] = old_x[hit]
+            y[hit] = old_y[hit]
+            self._turn_after_collision(rows, hit, kinds, groups, x, y, angle, speed, radius,
+                                       world_index, flow_fields)
+
+        # Ограничение по краям
+        low = np.flatnonzero(x < PARAMS['edge_min'][kinds])
+        high = np.flatnonzero(x > PARAMS['edge_max'][kinds])
+        if low.size or high.size:
+            x[low] = PARAMS['edge_min'][kinds[low]]
+            angle[low] = np.radians(self.rng.integers(30, 151, low.size))
+            x[high] = PARAMS['edge_max'][kinds[high]]
+            angle[high] = np.radians(self.rng.integers(210, 331, high.size))
+            edge = np.concatenate((low, high))
+            edge = edge[PARAMS['reset_wander_on_turn'][kinds[edge]]]
+            self.wander_angle[rows[edge]] = angle[edge] - math.pi / 2
+
+        self.x[rows] = x
+        self.y[rows] = y
+        self.angle[rows] = angle
+        self.speed_x[rows] = speed_x
+        self.speed_y[rows] = speed_y
+
+        # Направление спрайта
+        horizontal = np.abs(speed_x) > np.abs(speed_y) * PARAMS['direction_bias'][kinds]
+        self.direction[rows] = np.where(horizontal,
+                                        np.where(speed_x > 0, DIRECTION_RIGHT, DIRECTION_LEFT),
+                                        np.where(speed_y > 0, DIRECTION_DOWN, DIRECTION_UP))
+
+        # Таймеры и стрельба
+        armor = self.armor_timer[rows]
+        self.armor_timer[rows] = armor - (armor > 0)
+        cooldown = self.shoot_cooldown[rows]
+        cooldown -= cooldown > 0
+        fire = np.flatnonzero(seen & (cooldown == 0))
+        if fire.size:
+            cooldown[fire] = PARAMS['shoot_delay'][kinds[fire]]
+            self._shoot(rows[fire], player, projectiles)
+        self.shoot_cooldown[rows] = cooldown
+
+    def _turn_after_collision(self, rows, hit, kinds, groups, x, y, angle, speed, radius,
+                              world_index, flow_fields):
+        """Курс из поля течения, если первый шаг по нему свободен, иначе случайный отворот"""
+        advised = np.zeros(hit.size, dtype=np.bool_)
+        if flow_fields is not None:
+            heading, advised = flow_fields.turn_away(x[hit], y[hit])
+            if advised.any():
+                next_x = x[hit] + np.cos(heading) * speed[hit]
+                next_y = y[hit] + np.sin(heading) * speed[hit]
+                advised &= ~circles_collide(next_x, next_y, radius[hit], world_index)
+                angle[hit[advised]] = heading[advised]
+
+        random_turn = hit[~advised]
+        for code, kind, _ in groups:
+            turning = random_turn[kinds[random_turn] == code]
+            if turning.size:
+                choices = np.radians(np.array(kind.TURN_CHOICES, dtype=np.float64))
+                angle[turning] += choices[self.rng.integers(choices.size, size=turning.size)]
+
+        reset = hit[PARAMS['reset_wander_on_turn'][kinds[hit]]]
+        self.wander_angle[rows[reset]] = angle[reset] - math.pi / 2
+
+    def _shoot(self, rows, player, projectiles):
+        """Залп по игроку: у каждого типа свой веер смещений SHOT_OFFSETS"""
+        base = np.arctan2(player.y - self.y[rows], player.x - self.x[rows])
+        for code, kind in enumerate(KINDS):
+            at = np.flatnonzero(self.kind[rows] == code)
+            if at.size == 0:
+                continue
+            offsets = np.array(kind.SHOT_OFFSETS, dtype=np.float64)
+            shooters = rows[at]
+            projectiles.spawn_batch(np.repeat(self.x[shooters], offsets.size),
+                                    np.repeat(self.y[shooters], offsets.size),
+                                    (base[at][:, None] + offsets[None, :]).ravel(),
+                                    PARAMS['projectile_speed'][code],
+                                    is_player_shot=False)
+
+    def rams(self, rows, player):
+        """Строки из rows, протаранившие игрока"""
+        dx = self.x[rows] - player.x
+        dy = self.y[rows] - player.y
+        reach = player.radius + self.param('radius', rows)
+        return rows[dx*dx + dy*dy < reach*reach]
+
+    # === Отрисовка ===
+
+    def _sprite_table(self):
+        """Спрайты [тип][мигание брони][направление]; None - рисовать нечем (без окна)"""
+        if self._sprites is not None or self.headless:
+            return self._sprites
+
+        table = []
+        for kind in KINDS:
+            size = kind.PARAMS['size']
+            images = sprite_registry.get_direction_set(kind.SPRITE_SET, size)
+            if images:
+                normal = [images[direction] for direction in SPRITE_DIRECTIONS]
+            else:
+                fallback = sprite_registry.get_fallback((kind.SPRITE_SET, size),
+                                                        lambda: kind.create_fallback_image(size))
+                if fallback is None:
+                    return None
+                normal = [fallback] * len(SPRITE_DIRECTIONS)
+            table.append((normal, [self._flashed(image) for image in normal]))
+
+        self._sprites = table
+        return table
+
+    @staticmethod
+    def _flashed(image):
+        """Кадр мигания при уроне, один раз на спрайт"""
+        flash_surf = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        flash_surf.fill((255, 200, 200, 100))
+        flashed = image.copy()
+        flashed.blit(flash_surf, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+        allocations.note('surfaces')
+        return flashed
+
+    def draw(self, screen, camera_y, alpha=1.0):
+        """Отрисовка видимых врагов одним вызовом blits (позиция между prev и текущей)"""
+        n = self.count
+        if n == 0:
+            return
+        sprites = self._sprite_table()
+        if sprites is None:
+            return
+
+        x = self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha
+        y_screen = self.prev_y[:n] + (self.y[:n] - self.prev_y[:n]) * alpha - camera_y
+        half = int(PARAMS['size'].max()) // 2 + 1
+        visible = np.flatnonzero((y_screen > -half) & (y_screen < SCREEN_HEIGHT + half))
+        if visible.size == 0:
+            return
+
+        armor = self.armor_timer[visible]
+        flash = ((armor > 0) & (armor % 4 < 2)).tolist()
+        blits = []
+        for kind, direction, flashing, cx, cy in zip(self.kind[visible].tolist(),
+                                                     self.direction[visible].tolist(), flash,
+                                                     x[visible].astype(np.int32).tolist(),
+                                                     y_screen[visible].astype(np.int32).tolist()):
+            image = sprites[kind][flashing][direction]
+            w, h = image.get_size()
+            blits.append((image, (cx - w // 2, cy - h // 2)))
+        screen.blits(blits, doreturn=False)
+
+
+def benchmark(enemy_counts=(50, 100, 200, 400), frames=300, seed=ENGINE_BENCHMARK_SEED):
+    """Фаза врагов движка при разном числе врагов (все в полном AI) и память на врага"""
+    import random
+    from engine import GameEngine
+    from ai_scheduler import EnemyScheduler
+
+    print("\n===== ХРАНИЛИЩЕ ВРАГОВ =====")
+    print(f"{'врагов':>7} {'среднее, мс':>12} {'p95, мс':>9} {'max, мс':>9} {'байт/враг':>10}")
+    for count in enemy_counts:
+        engine = GameEngine(seed=seed, verbose=False, background_generation=False)
+        engine.ai_scheduler = EnemyScheduler(bands=((float('inf'), 1),))
+        rng = random.Random(seed)
+        engine.enemies = EnemySystem(seed, headless=engine.headless)
+        # Враги вокруг игрока, чтобы все были активны
+        for _ in range(count):
+            engine.enemies.spawn('simple' if rng.random() < 0.7 else 'hard',
+                                 rng.uniform(SHORE_EDGE_MARGIN, SCREEN_WIDTH - SHORE_EDGE_MARGIN),
+                                 engine.player.y - rng.uniform(0, 2 * SCREEN_HEIGHT))
+
+        times = []
+        for _ in range(frames):
+            engine.frame += 1
+            engine._store_previous_positions()
+            start = time.perf_counter()
+            engine._update_enemies()
+            times.append(time.perf_counter() - start)
+        engine.close()
+
+        times = np.array(times) * 1000
+        per_enemy = engine.enemies.memory_bytes() / engine.enemies.capacity
+        print(f"{count:>7} {times.mean():>12.3f} {np.percentile(times, 95):>9.3f} "
+              f"{times.max():>9.3f} {per_enemy:>10.0f}")
+    print("============================\n")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,345 @@
+# engine.py - Симуляция мира без окна, шрифтов, спрайтов и UART
+
+import random
+import time
+import pygame
+import numpy as np
+from config import *
+from player import Player
+from whirlpool import WhirlpoolManager
+from enemy_system import EnemySystem
+from spatial_index import WorldSpatialIndex, LAYER_ISLANDS
+from island import island_surface_cache
+from world_generator import SegmentGenerator
+from projectile_system import ProjectileSystem
+from obstacle_probes import probe_avoidance
+from ai_scheduler import EnemyScheduler
+from flow_field import FlowFieldMap
+from profiler import FrameProfiler
+from pools import allocations, compact
+
+
+class EngineKeys:
+    """Состояние кнопок для step(): индексируется как pygame.key.get_pressed()"""
+
+    def __init__(self, left=False, right=False, fire=False):
+        self.pressed = set()
+        if left:
+            self.pressed.add(pygame.K_a)
+        if right:
+            self.pressed.add(pygame.K_d)
+        if fire:
+            self.pressed.add(pygame.K_SPACE)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+NO_KEYS = EngineKeys()
+
+
+class GameEngine:
+    """Вся игровая логика: мир, игрок, враги, снаряды, водовороты.
+
+    Не открывает окно и порт и не грузит спрайты (сущности получают
+    image = None), поэтому step() идёт с полной скоростью процессора.
+    Окно и UART живут в Game, который вызывает step(1, keys) раз в кадр.
+    """
+
+    def __init__(self, seed=None, verbose=True, headless=True, background_generation=True, profiler=None,
+                 ai_scheduler=None):
+        self.verbose = verbose
+        self.background_generation = background_generation
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        # Планировщик AI, как и профайлер, может быть общим на несколько партий
+        self.ai_scheduler = ai_scheduler if ai_scheduler is not None else EnemyScheduler()
+        # Без окна сущности не берут спрайты (image = None); общий реестр не трогаем
+        self.headless = headless
+        if seed is not None:
+            random.seed(seed)
+        self.world_seed = seed if seed is not None else random.randrange(2**31)
+
+        self.frame = 0
+        self._init_game_objects()
+        self._generate_initial_world()
+
+    def close(self):
+        """Остановка фонового генератора мира"""
+        self.segment_generator.stop()
+    
+    @property
+    def game_over(self):
+        return self.player.health <= 0
+
+    @property
+    def miles(self):
+        return int(abs(self.player.y) / PIXELS_PER_MILE)
+
+    def step(self, n_frames=1, inputs=None):
+        """Прогон n_frames кадров симуляции.
+
+        inputs: None (кнопки отпущены), один объект кнопок на все кадры
+        или последовательность объектов кнопок по кадру на каждый шаг.
+        Останавливается на гибели игрока; возвращает число прогнанных кадров.
+        """
+        # Список кнопок pygame (get_pressed, to_pygame_keys) - это тоже список, но из bool
+        per_frame = isinstance(inputs, (list, tuple)) and len(inputs) > 0 and not isinstance(inputs[0], bool)
+        if per_frame and len(inputs) < n_frames:
+            raise ValueError(f"inputs: {len(inputs)} кадров, нужно {n_frames}")
+
+        for i in range(n_frames):
+            if self.game_over:
+                return i
+            if per_frame:
+                keys = inputs[i]
+            else:
+                keys = inputs if inputs is not None else NO_KEYS
+            self._tick(keys)
+        return n_frames
+
+    def _init_game_objects(self):
+        """Инициализация игровых объектов"""
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 150, headless=self.headless)
+        self.camera_y = self.player.y - SCREEN_HEIGHT + CAMERA_OFFSET
+        
+        self.islands = []
+        self.projectiles = ProjectileSystem()
+        self.enemies = EnemySystem(random.getrandbits(32), headless=self.headless)
+        self.left_shores = []
+        self.right_shores = []
+        
+        self.world_top = self.player.y - SCREEN_HEIGHT * 2
+        self.wave_offset = 0
+        
+        # Пространственный индекс островов, берегов и водоворотов
+        self.world_index = WorldSpatialIndex()
+        
+        self.whirlpool_manager = WhirlpoolManager(self.world_index, max_whirlpools=WHIRLPOOL_MAX_COUNT,
+                                                 verbose=self.verbose)
+        
+        # Сегменты мира строятся заранее в фоновом потоке
+        self.segment_generator = SegmentGenerator(self.world_top, self.world_seed,
+                                                  background=self.background_generation)
+        # Поля течения сегментов (строятся вместе с сегментом)
+        self.flow_fields = FlowFieldMap(self.world_top)
+        self.teleport_effect_timer = 0
+    
+    def _generate_initial_world(self):
+        """Генерация начального мира"""
+        for _ in range(WORLD_INITIAL_SEGMENTS):
+            self._generate_world_segment()
+    
+    def _generate_world_segment(self):
+        """Коммит следующего готового сегмента мира (строится заранее в SegmentGenerator)"""
+        segment = self.segment_generator.take()
+        
+        if self.verbose:
+            print(f"Новый сегмент: {segment.start_y} -> {segment.end_y}")
+        
+        # Берега и острова: списки и готовые корзины индекса
+        self.left_shores.append(segment.left_shore)
+        self.right_shores.append(segment.right_shore)
+        self.islands.extend(segment.islands)
+        self.world_index.merge(segment.spatial_index)
+        self.flow_fields.add(segment.index, segment.flow_field)
+        if segment.below_flow_field is not None:
+            # Поле предыдущего сегмента теперь видит и острова этого у границы
+            self.flow_fields.replace(segment.index - 1, segment.below_flow_field)
+        
+        # Водовороты зависят от уже существующих (лимит, расстояние)
+        whirlpools_generated = 0
+        for x, y in segment.whirlpool_candidates:
+            if self.whirlpool_manager.add_whirlpool(x, y):
+                whirlpools_generated += 1
+        
+        # Враги только впереди игрока
+        enemies_generated = 0
+        for kind, x, y in segment.enemy_candidates:
+            if y < self.player.y + WORLD_ENEMY_SPAWN_DISTANCE:
+                self.enemies.spawn(kind, x, y)
+                enemies_generated += 1
+        
+        self.world_top = segment.start_y
+        if self.verbose:
+            print(f"Сгенерировано островов: {len(segment.islands)}, всего: {len(self.islands)}")
+            print(f"Сгенерировано водоворотов: {whirlpools_generated}")
+            print(f"Сгенерировано врагов: {enemies_generated}, всего: {len(self.enemies)}")
+    
+    def render_camera_y(self, alpha=1.0):
+        """Камера для отрисовки по интерполированной позиции игрока"""
+        _, player_y = self.player.interpolated_position(alpha)
+        return player_y - SCREEN_HEIGHT + CAMERA_OFFSET
+    
+    def _store_previous_positions(self):
+        """Запоминание позиций перед тиком (для интерполяции при отрисовке)"""
+        self.player.prev_x, self.player.prev_y = self.player.x, self.player.y
+        self.enemies.store_previous()
+    
+    def _tick(self, keys):
+        """Один тик симуляции (все скорости в config.py - за тик)"""
+        self.frame += 1
+        self._store_previous_positions()
+        
+        # Камера
+        self.camera_y = self.player.y - SCREEN_HEIGHT + CAMERA_OFFSET
+        
+        profiler = self.profiler
+        
+        # Генерация нового мира
+        with profiler.section('world_gen'):
+            if self.player.y < self.world_top + WORLD_GENERATION_AHEAD:
+                self._generate_world_segment()
+        
+        # Водовороты
+        with profiler.section('whirlpools'):
+            teleport_pos = self.whirlpool_manager.update(self.player, self.world_top)
+            
+            if teleport_pos:
+                self.player.x, self.player.y = teleport_pos
+                # Прыжок не интерполируется
+                self.player.prev_x, self.player.prev_y = teleport_pos
+                self.teleport_effect_timer = TELEPORT_EFFECT_DURATION
+        
+        # Враги
+        with profiler.section('enemies'):
+            self._update_enemies()
+        
+        # Игрок
+        with profiler.section('player'):
+            self.player.update(keys, self.world_index)
+            
+            # Стрельба
+            if keys[pygame.K_SPACE]:
+                self.player.shoot(self.projectiles)
+        
+        # Волны
+        self.wave_offset = (self.wave_offset + WAVE_SPEED) % WAVE_HEIGHT
+        
+        # Снаряды
+        with profiler.section('projectiles'):
+            self._update_projectiles()
+        
+        # Эффект телепортации
+        if self.teleport_effect_timer > 0:
+            self.teleport_effect_timer -= 1
+        
+        # Очистка старых объектов
+        with profiler.section('cleanup'):
+            self._cleanup_old_objects()
+    
+    def _update_enemies(self):
+        """Обновление врагов: полный AI рядом с игроком, дальние - по очереди в бюджете"""
+        enemies_to_remove = []
+        
+        full, sliced = self.ai_scheduler.plan(self.enemies, self.player, self.frame)
+        
+        for rows in self.ai_scheduler.budgeted(self.enemies, full, sliced, self.frame, self.world_index):
+            self._run_enemy_ai(rows, enemies_to_remove)
+        self.ai_scheduler.dead_reckon(self.enemies, self.frame)
+        
+        if enemies_to_remove:
+            self.enemies.remove(np.concatenate(enemies_to_remove))
+    
+    def _enemy_avoidance(self, rows):
+        """Векторы обхода препятствий (ax, ay) для строк врагов с AI в этом тике"""
+        enemies = self.enemies
+        if ENEMY_STEERING == 'probes':
+            # Зонды всех врагов - одним пакетом
+            return probe_avoidance(enemies, rows, self.world_index)
+        # Поле течения: выборка клеток по курсу
+        return self.flow_fields.avoidance(enemies.x[rows], enemies.y[rows], enemies.angle[rows],
+                                          enemies.param('detection_range', rows))
+    
+    def _run_enemy_ai(self, rows, enemies_to_remove):
+        """Пакетный AI строк rows и таран"""
+        enemies = self.enemies
+        rows, behind = enemies.activate(rows, self.player)
+        enemies_to_remove.append(behind)
+        if rows.size == 0:
+            return
+        
+        enemies.think(rows, self.player, self._enemy_avoidance(rows), self.world_index,
+                      self.flow_fields, self.projectiles)
+        
+        # Таран (простой враг гибнет сам)
+        rammed = enemies.rams(rows, self.player)
+        if rammed.size:
+            for damage in enemies.param('torpedo_damage', rammed).tolist():
+                self.player.take_damage(damage)
+            enemies_to_remove.append(rammed[enemies.param('dies_on_ram', rammed)])
+    
+    def _update_projectiles(self):
+        """Обновление всех снарядов (пакетно в ProjectileSystem)"""
+        killed, player_hits = self.projectiles.update(self.enemies, self.world_index, self.player)
+        
+        if killed.size:
+            self.player.score += int(self.enemies.param('points', killed).sum())
+            self.enemies.remove(killed)
+        
+        for _ in range(player_hits):
+            self.player.take_damage(PROJECTILE_DAMAGE_TO_PLAYER)
+    
+    def _cleanup_old_objects(self):
+        """Очистка старых объектов"""
+        cleanup_threshold = self.player.y + WORLD_CLEANUP_DISTANCE
+        
+        self.whirlpool_manager.cleanup(cleanup_threshold)
+        
+        # Индекс сам находит устаревшие объекты; списки пересобираются только если что-то удалено
+        removed = self.world_index.remove_below(cleanup_threshold)
+        if not removed:
+            return
+        
+        # Поля течения уходят вместе с берегами своих сегментов
+        self.flow_fields.remove_below(cleanup_threshold)
+        
+        # Запечённые поверхности удалённых островов
+        island_surface_cache.evict(removed.get(LAYER_ISLANDS, ()))
+        
+        # Сжатие списков на месте (без новых списков)
+        islands_removed = compact(self.islands, lambda i: i.y < cleanup_threshold)
+        compact(self.left_shores, lambda s: s.start_y < cleanup_threshold)
+        compact(self.right_shores, lambda s: s.start_y < cleanup_threshold)
+        
+        if self.verbose and islands_removed:
+            print(f"Очищено островов: {islands_removed}, осталось: {len(self.islands)}")
+
+
+def benchmark(frames=ENGINE_BENCHMARK_FRAMES, seed=ENGINE_BENCHMARK_SEED):
+    """Прогон симуляции без окна со случайными кнопками (перезапуск при гибели)"""
+    rng = random.Random(seed)
+    profiler = FrameProfiler()
+    scheduler = EnemyScheduler()
+    engine = GameEngine(seed=seed, verbose=False, profiler=profiler, ai_scheduler=scheduler)
+    restarts = 0
+    done = 0
+
+    start = time.perf_counter()
+    while done < frames:
+        keys = EngineKeys(left=rng.random() < 0.3, right=rng.random() < 0.3, fire=rng.random() < 0.5)
+        for _ in range(min(ENGINE_BENCHMARK_CHUNK, frames - done)):
+            profiler.begin_frame()
+            done += engine.step(1, keys)
+            profiler.end_frame()
+            if engine.game_over:
+                break
+        if engine.game_over:
+            restarts += 1
+            engine.close()
+            engine = GameEngine(seed=seed + restarts, verbose=False, profiler=profiler, ai_scheduler=scheduler)
+    elapsed = time.perf_counter() - start
+    engine.close()
+
+    print("\n===== БЕНЧМАРК СИМУЛЯЦИИ =====")
+    print(f"Кадров: {frames}, за {elapsed:.2f} с")
+    print(f"Скорость: {frames / elapsed:.0f} кадров/с ({elapsed / frames * 1000:.3f} мс/кадр)")
+    print(f"Перезапусков после гибели: {restarts}")
+    print("==============================\n")
+    profiler.print_statistics()
+    scheduler.print_statistics()
+    allocations.print_statistics()
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else ENGINE_BENCHMARK_FRAMES)
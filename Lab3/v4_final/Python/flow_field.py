@@ -0,0 +1,240 @@
+# flow_field.py - Поле течения сегмента мира для обхода препятствий врагами
+
+import math
+from collections import deque
+import numpy as np
+from config import *
+from spatial_index import LAYER_ISLANDS
+
+# 8 соседей клетки: (строка, столбец); при равном потенциале течение выбирает
+# первого по порядку - прямо вниз, потом по сторонам, диагонали последними
+NEIGHBOURS = ((1, 0), (0, -1), (0, 1), (-1, 0), (1, -1), (1, 1), (-1, -1), (-1, 1))
+
+UNREACHABLE = -1
+
+
+def _bfs(sources, passable):
+    """Расстояние в клетках (8 соседей) от клеток sources по клеткам passable"""
+    rows, cols = passable.shape
+    dist = np.full((rows, cols), UNREACHABLE, dtype=np.int32)
+    queue = deque()
+    for r, c in zip(*np.nonzero(sources)):
+        dist[r, c] = 0
+        queue.append((r, c))
+
+    while queue:
+        r, c = queue.popleft()
+        d = dist[r, c] + 1
+        for dr, dc in NEIGHBOURS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and dist[nr, nc] == UNREACHABLE and passable[nr, nc]:
+                dist[nr, nc] = d
+                queue.append((nr, nc))
+    return dist
+
+
+def _descend(potential):
+    """Единичные векторы к соседу с наименьшим потенциалом (нет меньшего - нулевой вектор)"""
+    rows, cols = potential.shape
+    padded = np.pad(potential, 1, constant_values=np.iinfo(potential.dtype).max)
+    best = potential.copy()
+    vx = np.zeros(potential.shape, dtype=np.float32)
+    vy = np.zeros(potential.shape, dtype=np.float32)
+    for dr, dc in NEIGHBOURS:
+        neighbour = padded[1 + dr:1 + dr + rows, 1 + dc:1 + dc + cols]
+        better = neighbour < best
+        best = np.where(better, neighbour, best)
+        length = math.hypot(dr, dc)
+        vx[better] = dc / length
+        vy[better] = dr / length
+    return vx, vy
+
+
+class FlowField:
+    """Грубая сетка сегмента: проходимость, запас до препятствия и направление течения.
+
+    Клетка занята, если её центр ближе FLOW_CLEARANCE к острову или лежит
+    на суше за береговой линией. Течение ведёт «вниз по течению» - к нижнему
+    краю сегмента (туда же, куда идут враги, навстречу игроку) в обход
+    занятых клеток; из занятой клетки - к ближайшей свободной. Строится один
+    раз вместе с сегментом (в потоке SegmentGenerator), дальше только
+    чтение по индексу клетки.
+    """
+
+    def __init__(self, start_y, end_y, islands, shores, cell=FLOW_CELL_SIZE):
+        self.start_y = start_y
+        self.end_y = end_y
+        self.cell = cell
+        self.rows = int(math.ceil((end_y - start_y) / cell))
+        self.cols = int(math.ceil(SCREEN_WIDTH / cell))
+
+        self.blocked = self._rasterize(islands, shores)
+
+        free = ~self.blocked
+        # Запас до ближайшей занятой клетки (для занятых - 0)
+        clearance = _bfs(self.blocked, free)
+        clearance[clearance == UNREACHABLE] = self.rows * self.cols
+        self.clearance = np.minimum(clearance, FLOW_AVOID_CELLS)
+
+        self.flow_x, self.flow_y = self._build_flow(free)
+        # Прочь от препятствий: подъём по запасу (для занятых - глубина со знаком минус)
+        depth = _bfs(free, self.blocked)
+        self.escape_x, self.escape_y = _descend(np.where(self.blocked, depth, -clearance))
+
+    def _rasterize(self, islands, shores):
+        """Маска занятых клеток по центрам клеток"""
+        cx = (np.arange(self.cols) + 0.5) * self.cell
+        cy = self.start_y + (np.arange(self.rows) + 0.5) * self.cell
+        gx = cx[None, :]
+        gy = cy[:, None]
+        blocked = np.zeros((self.rows, self.cols), dtype=np.bool_)
+
+        for island in islands:
+            reach = island.radius * ISLAND_COLLISION_MULTIPLIER + FLOW_CLEARANCE
+            blocked |= (gx - island.x) ** 2 + (gy - island.y) ** 2 < reach * reach
+
+        for shore in shores:
+            # Береговая линия без крайних точек у кромки экрана: y по ней не убывает
+            xs = [p[0] for p in shore.points[1:-1]]
+            ys = [p[1] for p in shore.points[1:-1]]
+            line_x = np.interp(cy, ys, xs)[:, None]
+            if shore.side == 'left':
+                blocked |= gx < line_x + FLOW_CLEARANCE
+            else:
+                blocked |= gx > line_x - FLOW_CLEARANCE
+
+        return blocked
+
+    def _build_flow(self, free):
+        """Единичный вектор к соседу с наименьшим потенциалом.
+
+        Потенциал свободной клетки - путь до нижнего края, занятой - большое
+        число плюс глубина внутри препятствия, поэтому течение выводит из
+        препятствий и никогда не заводит в них. Нижний край - (0, 1), клетки
+        в карманах без выхода вниз (локальный минимум) - нулевой вектор.
+        """
+        downstream = _bfs(free & (np.arange(self.rows) == self.rows - 1)[:, None], free)
+        depth = _bfs(free, self.blocked)
+
+        big = self.rows * self.cols
+        potential = np.where(downstream != UNREACHABLE, downstream, big).astype(np.int64)
+        potential[self.blocked] = 2 * big + np.where(depth[self.blocked] != UNREACHABLE,
+                                                     depth[self.blocked], big)
+
+        flow_x, flow_y = _descend(potential)
+        flow_y[potential == 0] = 1.0   # нижний край: дальше - следующий сегмент
+        return flow_x, flow_y
+
+    def cell_of(self, x, y):
+        """(строка, столбец) клетки точки с прижатием к краям сетки"""
+        r = min(max(int((y - self.start_y) // self.cell), 0), self.rows - 1)
+        c = min(max(int(x // self.cell), 0), self.cols - 1)
+        return r, c
+
+
+class FlowFieldMap:
+    """Поля сегментов, которые сейчас в мире; поиск сегмента по y за O(1).
+
+    Сегмент index занимает [origin_top - (index + 1) * H, origin_top - index * H],
+    см. build_segment() в world_generator.py.
+    """
+
+    def __init__(self, origin_top):
+        self.origin_top = origin_top
+        self.fields = {}
+
+    def __len__(self):
+        return len(self.fields)
+
+    def add(self, index, field):
+        self.fields[index] = field
+
+    def replace(self, index, field):
+        """Замена поля сегмента, если он ещё в мире (уже удалённые не возвращаются)"""
+        if index in self.fields:
+            self.fields[index] = field
+
+    def remove_below(self, threshold):
+        """Освобождение полей сегментов, начинающихся ниже threshold (как берега в очистке)"""
+        stale = [index for index, field in self.fields.items() if field.start_y >= threshold]
+        for index in stale:
+            del self.fields[index]
+        return len(stale)
+
+    def field_at(self, y):
+        return self.fields.get(int((self.origin_top - y) // WORLD_SEGMENT_HEIGHT))
+
+    def sample(self, x, y, layers):
+        """Значения сеток layers (имена атрибутов FlowField) в точках x, y.
+
+        Точки группируются по сегменту (обычно это один-два соседних),
+        в каждом - выборка по индексам клеток. Возвращает (known, [массив
+        на слой]); known - точка попала в сегмент с полем, для остальных
+        значения нулевые.
+        """
+        known = np.zeros(x.size, dtype=np.bool_)
+        values = [np.zeros(x.size, dtype=np.float64) for _ in layers]
+        segments = np.floor((self.origin_top - y) / WORLD_SEGMENT_HEIGHT).astype(np.int64)
+        first, last = int(segments.min()), int(segments.max())
+        for index in range(first, last + 1):
+            field = self.fields.get(index)
+            if field is None:
+                continue
+            at = np.flatnonzero(segments == index) if first != last else np.arange(x.size)
+            r = np.clip(((y[at] - field.start_y) // field.cell).astype(np.intp), 0, field.rows - 1)
+            c = np.clip((x[at] // field.cell).astype(np.intp), 0, field.cols - 1)
+            known[at] = True
+            for value, layer in zip(values, layers):
+                value[at] = getattr(field, layer)[r, c]
+        return known, values
+
+    def turn_away(self, x, y):
+        """Курс после столкновения: течение плюс уход от препятствия.
+
+        Возвращает (курс, есть совет): совета нет вне полей и в клетках
+        с нулевым суммарным вектором.
+        """
+        known, (flow_x, flow_y, escape_x, escape_y) = self.sample(
+            x, y, ('flow_x', 'flow_y', 'escape_x', 'escape_y'))
+        dx = flow_x + escape_x
+        dy = flow_y + escape_y
+        return np.arctan2(dy, dx), known & ((dx != 0) | (dy != 0))
+
+    def avoidance(self, x, y, heading, ranges):
+        """Векторы обхода (ax, ay): течение в точках по курсу (FLOW_LOOKAHEAD - доли дальности обзора).
+
+        Сила растёт по мере приближения точки к препятствию; вне
+        FLOW_AVOID_CELLS клеток от препятствий - ноль.
+        """
+        cos_a = np.cos(heading)
+        sin_a = np.sin(heading)
+        avoid_x = np.zeros(x.size, dtype=np.float64)
+        avoid_y = np.zeros(x.size, dtype=np.float64)
+        for share in FLOW_LOOKAHEAD:
+            distance = ranges * share
+            known, (clearance, flow_x, flow_y) = self.sample(
+                x + cos_a * distance, y + sin_a * distance, ('clearance', 'flow_x', 'flow_y'))
+            close = known & (clearance < FLOW_AVOID_CELLS)
+            weight = np.where(close, FLOW_AVOID_STRENGTH * (FLOW_AVOID_CELLS - clearance) / FLOW_AVOID_CELLS, 0.0)
+            avoid_x += flow_x * weight
+            avoid_y += flow_y * weight
+        return avoid_x, avoid_y
+
+
+def build_flow_field(segment, indexes):
+    """Поле сегмента по его берегам и островам из indexes, заходящим в сегмент.
+
+    Острова у обеих границ: снизу - из индекса предыдущего сегмента, сверху -
+    из индекса следующего. Следующий строится позже, поэтому build_segment()
+    пересобирает поле предыдущего сегмента со своим индексом
+    (below_flow_field), а движок заменяет им поле в FlowFieldMap.
+    """
+    reach = ISLAND_MAX_RADIUS * ISLAND_SHAPE_NOISE_MAX + FLOW_CLEARANCE
+    islands = []
+    seen = set()
+    for index in indexes:
+        for island in index.in_range(segment.start_y - reach, segment.end_y + reach, (LAYER_ISLANDS,)):
+            if id(island) not in seen:
+                seen.add(id(island))
+                islands.append(island)
+    return FlowField(segment.start_y, segment.end_y, islands, (segment.left_shore, segment.right_shore))
@@ -1,16 +1,16 @@
 # game.py - Главный файл игры с управлением через STM32
 
 import pygame
-import random
-import math
 import sys
+import time
 from config import *
-from player import Player
-from island import Island, Shore
-from whirlpool import WhirlpoolManager, Whirlpool
-from enemy_simple import SimpleEnemy
-from enemy_hard import HardEnemy
 from uart_protocol import UARTProtocol  # Добавлено!
+from sprites import sprite_registry
+from spatial_index import LAYER_ISLANDS
+from engine import GameEngine
+from wave_field import WaveField
+from profiler import FrameProfiler
+from pools import allocations
 
 class Game:
     def __init__(self):
@@ -21,361 +21,133 @@ class Game:
         
         # UART для управления с платы
         self.uart = UARTProtocol(debug=False)  # Добавлено!
+        self.uart.start_reader()  # приём кнопок в отдельном потоке
         self.last_miles_sent = 0  # Добавлено!
         
         self._init_fonts()
-        self._init_game_objects()
-        self._generate_initial_world()
+        self._text_cache = {}  # (шрифт, текст, цвет) -> отрисованная строка
+        self._flash_surface = None
+        self._init_sprites()
+        self._init_waves()
+        
+        # Профилировщик кадров (F3 - оверлей)
+        self.profiler = FrameProfiler()
+        
+        # Вся игровая логика - в движке; здесь только окно, UART и отрисовка
+        self.engine = GameEngine(headless=False, profiler=self.profiler)
     
     def _init_fonts(self):
         """Инициализация шрифтов"""
         self.font = pygame.font.Font(None, UI_FONT_SIZE)
         self.small_font = pygame.font.Font(None, UI_SMALL_FONT_SIZE)
         self.big_font = pygame.font.Font(None, UI_BIG_FONT_SIZE)
+        self.mono_font = pygame.font.SysFont('consolas,dejavusansmono,monospace', UI_MONO_FONT_SIZE)
     
-    def _init_game_objects(self):
-        """Инициализация игровых объектов"""
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 150)
-        self.camera_y = self.player.y - SCREEN_HEIGHT + CAMERA_OFFSET
-        
-        self.islands = []
-        self.projectiles = []
-        self.enemies = []
-        self.left_shores = []
-        self.right_shores = []
-        
-        self.world_top = self.player.y - SCREEN_HEIGHT * 2
-        self.wave_offset = 0
-        
-        self.whirlpool_manager = WhirlpoolManager(max_whirlpools=WHIRLPOOL_MAX_COUNT)
-        self.teleport_effect_timer = 0
-    
-    def _generate_initial_world(self):
-        """Генерация начального мира"""
-        for _ in range(WORLD_INITIAL_SEGMENTS):
-            self._generate_world_segment()
-    
-    def _is_position_clear(self, x, y, radius=SPAWN_CLEARANCE_RADIUS):
-        """Проверка свободности позиции"""
-        for island in self.islands[-50:]:
-            dx = island.x - x
-            dy = island.y - y
-            dist = math.sqrt(dx*dx + dy*dy)
-            if dist < island.radius + radius + ENEMY_CLEARANCE_EXTRA:
-                return False
-        
-        for shore in self.left_shores + self.right_shores:
-            if shore.collides_with(x, y, radius):
-                return False
-        
-        if x < SHORE_EDGE_MARGIN or x > SCREEN_WIDTH - SHORE_EDGE_MARGIN:
-            return False
-        
-        return True
+    def _init_sprites(self):
+        """Однократная загрузка и прогрев всех спрайтов"""
+        sprite_registry.load_all()
+        sprite_registry.warm_up()
+        sprite_registry.print_report()
     
-    def _generate_world_segment(self):
-        """Генерация сегмента мира"""
-        segment_start = self.world_top - WORLD_SEGMENT_HEIGHT
-        segment_end = self.world_top
-        
-        print(f"Генерация нового сегмента: {segment_start} -> {segment_end}")
-        
-        # Берега
-        self.left_shores.append(Shore('left', segment_start, segment_end))
-        self.right_shores.append(Shore('right', segment_start, segment_end))
-        
-        # Генерация островов
-        current_y = segment_start
-        islands_generated = 0
-        whirlpools_generated = 0
-        enemies_generated = 0
-        
-        while current_y < segment_end:
-            # Острова
-            if random.random() < WORLD_ISLAND_SPAWN_CHANCE:
-                x = random.randint(SHORE_WIDTH, SCREEN_WIDTH - SHORE_WIDTH)
-                
-                too_close = False
-                for island in self.islands[-WORLD_ISLAND_RECENT_CHECK:]:
-                    dist = math.sqrt((island.x - x)**2 + (island.y - current_y)**2)
-                    if dist < WORLD_ISLAND_MIN_SPACING:
-                        too_close = True
-                        break
-                
-                if not too_close:
-                    island = Island(x, current_y, random.randint(0, 1000000))
-                    self.islands.append(island)
-                    islands_generated += 1
-            
-            # Водовороты
-            if random.random() < WHIRLPOOL_SPAWN_CHANCE:
-                x = random.randint(WHIRLPOOL_EDGE_MARGIN, SCREEN_WIDTH - WHIRLPOOL_EDGE_MARGIN)
-                if Whirlpool.can_place_whirlpool(x, current_y, self.islands, 
-                                                self.left_shores + self.right_shores, 
-                                                self.whirlpool_manager.whirlpools):
-                    self.whirlpool_manager.add_whirlpool(x, current_y, self.islands, 
-                                                       self.left_shores + self.right_shores)
-                    whirlpools_generated += 1
-            
-            current_y += random.randint(WORLD_ISLAND_STEP_MIN, WORLD_ISLAND_STEP_MAX)
-        
-        # Генерация врагов
-        current_y = segment_start
-        while current_y < segment_end:
-            if current_y < self.player.y + WORLD_ENEMY_SPAWN_DISTANCE:
-                # Простые враги
-                if random.random() < ENEMY_SIMPLE_SPAWN_CHANCE:
-                    for _ in range(10):
-                        x = random.randint(250, SCREEN_WIDTH - 250)
-                        
-                        if self._is_position_clear(x, current_y, COLLISION_RADIUS_ENEMY_SIMPLE):
-                            self.enemies.append(SimpleEnemy(x, current_y))
-                            enemies_generated += 1
-                            break
-                
-                # Сложные враги
-                if random.random() < ENEMY_HARD_SPAWN_CHANCE:
-                    for _ in range(10):
-                        x = random.randint(300, SCREEN_WIDTH - 300)
-                        
-                        if self._is_position_clear(x, current_y, COLLISION_RADIUS_ENEMY_HARD):
-                            self.enemies.append(HardEnemy(x, current_y))
-                            enemies_generated += 1
-                            break
-            
-            current_y += random.randint(WORLD_ENEMY_STEP_MIN, WORLD_ENEMY_STEP_MAX)
-        
-        self.world_top = segment_start
-        print(f"Сгенерировано островов: {islands_generated}, всего: {len(self.islands)}")
-        print(f"Сгенерировано водоворотов: {whirlpools_generated}")
-        print(f"Сгенерировано врагов: {enemies_generated}, всего: {len(self.enemies)}")
+    def _init_waves(self):
+        """Запекание кадров волн по всем фазам wave_offset"""
+        self.wave_field = WaveField(
+            SCREEN_WIDTH, SCREEN_HEIGHT, WATER_BLUE,
+            layer_colors=[(10 + d, 95 + d, 170 + min(d, 10)) for d in (0, 5, 10)],
+            period=WAVE_HEIGHT, step=WAVE_SPEED,
+            spacing=WAVE_LAYER_SPACING, amplitude=12, wave_length=80, speed=0.03,
+            layer_phase_shift=0.8
+        )
+        self.wave_field.warm_up()
+        print(f"Волны: запечено кадров {len(self.wave_field.frames)} за {self.wave_field.bake_time_ms} мс")
     
     def update(self):
-        """Главное обновление игры"""
+        """Один тик: кнопки с платы -> шаг симуляции -> мили на плату"""
         # ИЗМЕНЕНИЕ: Получаем состояние кнопок с платы вместо клавиатуры
-        keys = self.uart.get_pygame_keys()
+        keys = self.uart.get_keys()
         
-        # Камера
-        self.camera_y = self.player.y - SCREEN_HEIGHT + CAMERA_OFFSET
+        self.engine.step(1, keys)
         
         # ДОБАВЛЕНО: Отправка миль на плату
-        current_miles = int(abs(self.player.y) / PIXELS_PER_MILE)
+        current_miles = self.engine.miles
         if current_miles != self.last_miles_sent:
             self.uart.send_miles(current_miles)
             self.last_miles_sent = current_miles
-        
-        # Генерация нового мира
-        if self.player.y < self.world_top + WORLD_GENERATION_AHEAD:
-            self._generate_world_segment()
-        
-        # Водовороты
-        teleport_pos = self.whirlpool_manager.update(
-            self.player, 
-            self.world_top,
-            self.islands,
-            self.left_shores + self.right_shores
-        )
-        
-        if teleport_pos:
-            self.player.x, self.player.y = teleport_pos
-            self.teleport_effect_timer = TELEPORT_EFFECT_DURATION
-        
-        # Враги
-        self._update_enemies()
-        
-        # Игрок
-        all_obstacles = self.islands + self.left_shores + self.right_shores
-        self.player.update(keys, all_obstacles)
-        
-        # Стрельба
-        if keys[pygame.K_SPACE]:
-            new_projectiles = self.player.shoot()
-            if new_projectiles:
-                self.projectiles.extend(new_projectiles)
-        
-        # Волны
-        self.wave_offset = (self.wave_offset + WAVE_SPEED) % WAVE_HEIGHT
-        
-        # Снаряды
-        self._update_projectiles(all_obstacles)
-        
-        # Эффект телепортации
-        if self.teleport_effect_timer > 0:
-            self.teleport_effect_timer -= 1
-        
-        # Очистка старых объектов
-        self._cleanup_old_objects()
     
-    def _update_enemies(self):
-        """Обновление всех врагов"""
-        new_enemy_projectiles = []
-        enemies_to_remove = []
-        
-        for enemy in self.enemies:
-            enemy_projectiles = enemy.update(
-                self.islands, 
-                self.left_shores + self.right_shores,
-                self.player,
-                self.world_top
-            )
-            
-            if enemy_projectiles is None:
-                enemies_to_remove.append(enemy)
-                continue
+    def draw(self, alpha=1.0):
+        """Отрисовка всей игры (alpha - доля тика, прошедшая после последнего update)"""
+        camera_y = self.engine.render_camera_y(alpha)
+        
+        profiler = self.profiler
+        
+        # Море и волны (кадр непрозрачный, заливка не нужна)
+        with profiler.section('waves'):
+            self._draw_waves(camera_y)
+        
+        # Берега, водовороты, острова
+        with profiler.section('islands'):
+            for shore in self.engine.left_shores:
+                shore.draw(self.screen, camera_y)
+            for shore in self.engine.right_shores:
+                shore.draw(self.screen, camera_y)
             
-            new_enemy_projectiles.extend(enemy_projectiles)
+            self.engine.whirlpool_manager.draw(self.screen, camera_y)
             
-            # Таран
-            if self.player.collides_with(enemy.x, enemy.y, enemy.radius):
-                damage = enemy.get_torpedo_damage()
-                self.player.take_damage(damage)
-                if isinstance(enemy, SimpleEnemy):
-                    enemies_to_remove.append(enemy)
-        
-        for enemy in enemies_to_remove:
-            self.enemies.remove(enemy)
-        
-        self.projectiles.extend(new_enemy_projectiles)
-    
-    def _update_projectiles(self, all_obstacles):
-        """Обновление всех снарядов"""
-        projectiles_to_remove = []
-        
-        for proj in self.projectiles[:]:
-            proj.update()
+            visible_islands = self.engine.world_index.in_range(camera_y - 200, camera_y + SCREEN_HEIGHT + 200,
+                                                               (LAYER_ISLANDS,))
+            for island in visible_islands:
+                island.draw(self.screen, camera_y)
+        
+        # Враги, снаряды, игрок
+        with profiler.section('entities'):
+            self.engine.enemies.draw(self.screen, camera_y, alpha)
             
-            # Попадание по врагам
-            for enemy in self.enemies[:]:
-                if proj.collides_with(enemy):
-                    if proj.is_player_shot:
-                        if enemy.take_damage(1):
-                            self.player.score += enemy.points
-                            self.enemies.remove(enemy)
-                        projectiles_to_remove.append(proj)
-                        break
+            self.engine.projectiles.draw(self.screen, camera_y, alpha)
             
-            # Столкновение с препятствиями
-            obstacle_hit = any(proj.collides_with(obstacle) for obstacle in all_obstacles)
+            self.engine.player.draw(self.screen, camera_y, alpha)
             
-            # Попадание по игроку
-            player_hit = not proj.is_player_shot and self.player.collides_with(proj.x, proj.y, PROJECTILE_RADIUS)
-            if player_hit:
-                self.player.take_damage(PROJECTILE_DAMAGE_TO_PLAYER)
-            
-            # Условия удаления
-            if (proj.lifetime <= 0 or 
-                proj.x < 0 or 
-                proj.x > SCREEN_WIDTH or
-                obstacle_hit or
-                player_hit):
-                projectiles_to_remove.append(proj)
-        
-        for proj in projectiles_to_remove:
-            if proj in self.projectiles:
-                self.projectiles.remove(proj)
-    
-    def _cleanup_old_objects(self):
-        """Очистка старых объектов"""
-        cleanup_threshold = self.player.y + WORLD_CLEANUP_DISTANCE
-        
-        islands_before = len(self.islands)
-        
-        self.islands = [i for i in self.islands if i.y < cleanup_threshold]
-        self.left_shores = [s for s in self.left_shores if s.start_y < cleanup_threshold]
-        self.right_shores = [s for s in self.right_shores if s.start_y < cleanup_threshold]
-        
-        self.whirlpool_manager.cleanup(cleanup_threshold)
-        
-        if islands_before != len(self.islands):
-            print(f"Очищено островов: {islands_before - len(self.islands)}, осталось: {len(self.islands)}")
-    
-    def draw(self):
-        """Отрисовка всей игры"""
-        # Море
-        self.screen.fill(WATER_BLUE)
-        
-        # Волны
-        self._draw_waves()
-        
-        # Объекты
-        for shore in self.left_shores:
-            shore.draw(self.screen, self.camera_y)
-        for shore in self.right_shores:
-            shore.draw(self.screen, self.camera_y)
-        
-        self.whirlpool_manager.draw(self.screen, self.camera_y)
-        
-        for island in self.islands:
-            island.draw(self.screen, self.camera_y)
-        
-        for enemy in self.enemies:
-            enemy.draw(self.screen, self.camera_y)
-        
-        for proj in self.projectiles:
-            proj.draw(self.screen, self.camera_y)
-        
-        self.player.draw(self.screen, self.camera_y)
-        
-        # Эффект телепортации
-        if self.teleport_effect_timer > 0:
-            alpha = int((self.teleport_effect_timer / TELEPORT_EFFECT_DURATION) * 200)
-            flash = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            flash.set_alpha(alpha)
-            flash.fill(WHITE)
-            self.screen.blit(flash, (0, 0))
+            # Эффект телепортации
+            if self.engine.teleport_effect_timer > 0:
+                flash_alpha = int((self.engine.teleport_effect_timer / TELEPORT_EFFECT_DURATION) * 200)
+                if self._flash_surface is None:
+                    self._flash_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+                    self._flash_surface.fill(WHITE)
+                    allocations.note('surfaces')
+                self._flash_surface.set_alpha(flash_alpha)
+                self.screen.blit(self._flash_surface, (0, 0))
         
         # UI
-        self._draw_ui()
+        with profiler.section('ui'):
+            self._draw_ui()
+            profiler.draw_overlay(self.screen, self.mono_font)
         
         pygame.display.flip()
+        self.uart.frame_presented()
     
-    def _draw_waves(self):
-        """Отрисовка реалистичных волн с синусоидальными колебаниями"""
-        AMPLITUDE = 12
-        WAVE_LENGTH = 80
-        WAVE_SPEED = 0.03
-        VERTICAL_SPACING = 35
-        
-        base_offset = (self.camera_y // 3) % VERTICAL_SPACING + (self.wave_offset % VERTICAL_SPACING)
-        
-        for layer in range(-2, SCREEN_HEIGHT // VERTICAL_SPACING + 3):
-            base_y = layer * VERTICAL_SPACING + base_offset
-            
-            depth_factor = (layer % 3) * 5
-            color = (
-                10 + depth_factor, 
-                95 + depth_factor, 
-                170 + min(depth_factor, 10)
-            )
-            
-            phase_shift = layer * 0.8
-            points = []
-            
-            for x in range(0, SCREEN_WIDTH + WAVE_LENGTH, 5):
-                y = base_y + AMPLITUDE * math.sin(
-                    (2 * math.pi * x / WAVE_LENGTH) + 
-                    (self.wave_offset * WAVE_SPEED) + 
-                    phase_shift
-                )
-                
-                y += AMPLITUDE * 0.3 * math.sin(
-                    (4 * math.pi * x / WAVE_LENGTH) + 
-                    (self.wave_offset * WAVE_SPEED * 1.5) + 
-                    phase_shift * 1.2
-                )
-                
-                points.append((x, y))
-            
-            if len(points) > 1:
-                pygame.draw.lines(self.screen, color, False, points, 2)
+    def _draw_waves(self, camera_y):
+        """Море с волнами: один blit запечённого кадра текущей фазы"""
+        base_offset = (camera_y // 3) % WAVE_LAYER_SPACING + (self.engine.wave_offset % WAVE_LAYER_SPACING)
+        self.wave_field.draw(self.screen, self.engine.wave_offset, base_offset)
+    
+    def _text(self, font, text, antialias, color):
+        """Строка UI: отрисовывается только когда текст изменился"""
+        key = (font, text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            if len(self._text_cache) >= UI_TEXT_CACHE_SIZE:
+                self._text_cache.clear()
+            surface = font.render(text, antialias, color)
+            self._text_cache[key] = surface
+            allocations.note('surfaces')
+        return surface
     
     def _draw_ui(self):
         """Отрисовка UI"""
         # Здоровье
-        health_text = self.font.render(f"HP: {max(0, self.player.health)}/{self.player.max_health}", True, WHITE)
+        health_text = self._text(self.font, f"HP: {max(0, self.engine.player.health)}/{self.engine.player.max_health}", True, WHITE)
         self.screen.blit(health_text, (UI_PADDING, UI_PADDING))
         
-        health_ratio = max(0, self.player.health) / self.player.max_health
+        health_ratio = max(0, self.engine.player.health) / self.engine.player.max_health
         
         pygame.draw.rect(self.screen, (100, 0, 0), (UI_PADDING, 60, UI_HEALTH_BAR_WIDTH, UI_HEALTH_BAR_HEIGHT))
         pygame.draw.rect(self.screen, (0, 200, 0), 
@@ -383,23 +155,23 @@ class Game:
         pygame.draw.rect(self.screen, WHITE, (UI_PADDING, 60, UI_HEALTH_BAR_WIDTH, UI_HEALTH_BAR_HEIGHT), 3)
         
         # Счёт
-        score_text = self.font.render(f"Счёт: {self.player.score}", True, GOLD)
+        score_text = self._text(self.font, f"Счёт: {self.engine.player.score}", True, GOLD)
         self.screen.blit(score_text, (SCREEN_WIDTH - 250, UI_PADDING))
 
         # Пройденные мили
-        miles = int(abs(self.player.y) / PIXELS_PER_MILE)
-        miles_text = self.font.render(f"Мили: {miles}", True, WHITE)
+        miles = int(abs(self.engine.player.y) / PIXELS_PER_MILE)
+        miles_text = self._text(self.font, f"Мили: {miles}", True, WHITE)
         self.screen.blit(miles_text, (SCREEN_WIDTH - 250, 60))
         
         # Угол поворота
-        angle_text = self.big_font.render(f"Угол: {int(self.player.hull_angle)}°", True, CYAN)
+        angle_text = self._text(self.big_font, f"Угол: {int(self.engine.player.hull_angle)}°", True, CYAN)
         self.screen.blit(angle_text, (SCREEN_WIDTH // 2 - 100, UI_PADDING))
         
         # Направление выстрела
-        if abs(self.player.hull_angle) > PLAYER_MIN_ANGLE_FOR_SIDE_SHOT:
-            direction = "↖ ЗАЛП ВЛЕВО-ВВЕРХ" if self.player.hull_angle > PLAYER_MIN_ANGLE_FOR_SIDE_SHOT else "ЗАЛП ВПРАВО-ВВЕРХ ↗"
-            dir_color = RED if self.player.shoot_cooldown == 0 else (100, 100, 100)
-            dir_text = self.font.render(direction, True, dir_color)
+        if abs(self.engine.player.hull_angle) > PLAYER_MIN_ANGLE_FOR_SIDE_SHOT:
+            direction = "↖ ЗАЛП ВЛЕВО-ВВЕРХ" if self.engine.player.hull_angle > PLAYER_MIN_ANGLE_FOR_SIDE_SHOT else "ЗАЛП ВПРАВО-ВВЕРХ ↗"
+            dir_color = RED if self.engine.player.shoot_cooldown == 0 else (100, 100, 100)
+            dir_text = self._text(self.font, direction, True, dir_color)
             self.screen.blit(dir_text, (SCREEN_WIDTH // 2 - 200, 75))
         
         # Управление - ИЗМЕНЕНО!
@@ -410,13 +182,13 @@ class Game:
     
     def _draw_controls(self):
         """Отрисовка подсказок управления"""
-        controls = [
+        controls = (
             "Управление: кнопки на STM32",
             "CANON_LEFT - Лево (плывёшь влево)",
             "CANON_RIGHT - Право (плывёшь вправо)",
             "CANON_FIRE - Залп вверх-вбок",
             "ESC - Выход"
-        ]
+        )
         
         pygame.draw.rect(self.screen, (0, 0, 0, 180), 
                         (SCREEN_WIDTH - 500, SCREEN_HEIGHT - 160, 490, UI_CONTROLS_HEIGHT))
@@ -425,32 +197,32 @@ class Game:
         
         for i, text in enumerate(controls):
             color = GOLD if i == 0 else WHITE
-            control_text = self.small_font.render(text, True, color)
+            control_text = self._text(self.small_font, text, True, color)
             self.screen.blit(control_text, (SCREEN_WIDTH - 490, SCREEN_HEIGHT - 145 + i * 28))
     
     def _draw_stats(self):
         """Отрисовка статистики"""
-        whirlpool_count = len(self.whirlpool_manager.whirlpools)
-        enemy_count = len(self.enemies)
+        whirlpool_count = len(self.engine.whirlpool_manager.whirlpools)
+        enemy_count = len(self.engine.enemies)
         
-        stats_text = self.small_font.render(
-            f"Островов: {len(self.islands)} | Врагов: {enemy_count} | Водоворотов: {whirlpool_count}", 
+        stats_text = self._text(self.small_font,
+            f"Островов: {len(self.engine.islands)} | Врагов: {enemy_count} | Водоворотов: {whirlpool_count}", 
             True, (255, 200, 100))
         self.screen.blit(stats_text, (UI_PADDING, SCREEN_HEIGHT - 40))
         
         # Информация о водоворотах
-        active_whirlpools = sum(1 for w in self.whirlpool_manager.whirlpools if not w.used_recently)
+        active_whirlpools = sum(1 for w in self.engine.whirlpool_manager.whirlpools if not w.used_recently)
         if whirlpool_count > 0:
-            whirlpool_info = self.small_font.render(
+            whirlpool_info = self._text(self.small_font,
                 f"🌀 Активных водоворотов: {active_whirlpools}/{whirlpool_count}", 
                 True, CYAN)
             self.screen.blit(whirlpool_info, (UI_PADDING, SCREEN_HEIGHT - 70))
         
         # Информация о врагах
-        simple_enemies = sum(1 for e in self.enemies if isinstance(e, SimpleEnemy))
-        hard_enemies = sum(1 for e in self.enemies if isinstance(e, HardEnemy))
+        simple_enemies = self.engine.enemies.count_of('simple')
+        hard_enemies = self.engine.enemies.count_of('hard')
         if enemy_count > 0:
-            enemy_info = self.small_font.render(
+            enemy_info = self._text(self.small_font,
                 f"⚔️ Враги: {simple_enemies} простых | {hard_enemies} серьезных", 
                 True, (255, 100, 100))
             self.screen.blit(enemy_info, (UI_PADDING, SCREEN_HEIGHT - 100))
@@ -459,6 +231,11 @@ class Game:
         """Главный цикл игры"""
         running = True
         
+        # Фиксированный шаг: симуляция идёт тиками SIM_TICK независимо от
+        # скорости отрисовки, кадр рисуется с интерполяцией между тиками
+        accumulator = 0.0
+        previous_time = time.perf_counter()
+        
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -466,18 +243,45 @@ class Game:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
+                    elif event.key == pygame.K_F3:
+                        self.profiler.toggle_overlay()
             
-            if self.player.health <= 0:
+            self.profiler.begin_frame()
+            
+            now = time.perf_counter()
+            accumulator += now - previous_time
+            previous_time = now
+            
+            # Снимок кнопок с платы берётся в каждом тике (внутри update)
+            ticks = 0
+            while accumulator >= SIM_TICK and ticks < SIM_MAX_TICKS_PER_FRAME:
+                self.update()
+                accumulator -= SIM_TICK
+                ticks += 1
+            
+            # Не догоняем бесконечно после долгого подвисания
+            if ticks == SIM_MAX_TICKS_PER_FRAME:
+                accumulator = min(accumulator, SIM_TICK)
+            
+            if self.engine.game_over:
                 self._game_over()
                 running = False
             
-            self.update()
-            self.draw()
+            self.draw(accumulator / SIM_TICK)
+            self.profiler.end_frame()
             self.clock.tick(FPS)
         
+        self.engine.close()
+        self.uart.close()
+        
         # ДОБАВЛЕНО: Вывод статистики UART
         self.uart.print_statistics()
         
+        # Профиль кадров: перцентили по фазам и выгрузка в CSV/JSON
+        self.profiler.print_statistics()
+        self.profiler.dump()
+        allocations.print_statistics()
+        
         pygame.quit()
         sys.exit()
     
@@ -492,10 +296,10 @@ class Game:
         game_over_text = game_over_font.render("ИГРА ОКОНЧЕНА", True, RED)
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80))
         
-        score_text = self.big_font.render(f"Финальный счёт: {self.player.score}", True, GOLD)
+        score_text = self.big_font.render(f"Финальный счёт: {self.engine.player.score}", True, GOLD)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         
-        distance_text = self.font.render(f"Пройдено: {int(abs(self.player.y) / PIXELS_PER_MILE)} морских миль", 
+        distance_text = self.font.render(f"Пройдено: {int(abs(self.engine.player.y) / PIXELS_PER_MILE)} морских миль", 
                                         True, WHITE)
         distance_rect = distance_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
         
@@ -3,33 +3,41 @@
 import pygame
 import random
 import math
+import numpy as np
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from config import *
+from spatial_index import point_to_segment_distance
 
 class Island:
     def __init__(self, x, y, seed):
         self.x = x
         self.y = y
-        self.radius = random.randint(ISLAND_MIN_RADIUS, ISLAND_MAX_RADIUS)
         self.seed = seed
-        random.seed(seed)
+        # Свой генератор: остров одинаков при одном seed и не трогает общий random
+        # (острова строятся в фоновом потоке, см. world_generator.py)
+        self.rng = random.Random(seed)
+        self.radius = self.rng.randint(ISLAND_MIN_RADIUS, ISLAND_MAX_RADIUS)
         
         # Генерация уникального оттенка зеленого
         self.color = (
-            max(20, min(80, ISLAND_GREEN[0] + random.randint(-15, 15))),
-            max(80, min(160, ISLAND_GREEN[1] + random.randint(-20, 20))),
-            max(10, min(60, ISLAND_GREEN[2] + random.randint(-10, 10)))
+            max(20, min(80, ISLAND_GREEN[0] + self.rng.randint(-15, 15))),
+            max(80, min(160, ISLAND_GREEN[1] + self.rng.randint(-20, 20))),
+            max(10, min(60, ISLAND_GREEN[2] + self.rng.randint(-10, 10)))
         )
         
         self.points = self._generate_shape()
         self.structures = self._generate_structures()
         self.decorations = self._generate_decorations()
+        self.animated_structures = [st for st in self.structures if st['type'] in ISLAND_ANIMATED_STRUCTURES]
+        self._init_bake_rect()
     
     def _generate_shape(self):
         """Генерация органичной формы острова"""
         points = []
         for i in range(ISLAND_SHAPE_POINTS):
             angle = (i / ISLAND_SHAPE_POINTS) * 2 * math.pi
-            noise = random.uniform(ISLAND_SHAPE_NOISE_MIN, ISLAND_SHAPE_NOISE_MAX)
+            noise = self.rng.uniform(ISLAND_SHAPE_NOISE_MIN, ISLAND_SHAPE_NOISE_MAX)
             r = self.radius * noise
             x = self.x + math.cos(angle) * r
             y = self.y + math.sin(angle) * r
@@ -39,15 +47,15 @@ class Island:
     def _generate_structures(self):
         """Генерация основных структур"""
         structures = []
-        num_structures = random.randint(ISLAND_STRUCTURES_MIN, ISLAND_STRUCTURES_MAX)
+        num_structures = self.rng.randint(ISLAND_STRUCTURES_MIN, ISLAND_STRUCTURES_MAX)
         
         for _ in range(num_structures):
-            angle = random.uniform(0, 2 * math.pi)
-            distance = random.uniform(0.3, 0.7) * self.radius
+            angle = self.rng.uniform(0, 2 * math.pi)
+            distance = self.rng.uniform(0.3, 0.7) * self.radius
             x = self.x + math.cos(angle) * distance
             y = self.y + math.sin(angle) * distance
             
-            structure_type = random.choices(
+            structure_type = self.rng.choices(
                 ['lighthouse', 'hut', 'palm', 'rock', 'shipwreck', 'chest'],
                 weights=[0.1, 0.2, 0.3, 0.2, 0.1, 0.1]
             )[0]
@@ -56,8 +64,8 @@ class Island:
                 'type': structure_type,
                 'x': x,
                 'y': y,
-                'size': random.uniform(0.8, 1.2),
-                'angle': random.uniform(0, 360)
+                'size': self.rng.uniform(0.8, 1.2),
+                'angle': self.rng.uniform(0, 360)
             })
         
         return structures
@@ -65,15 +73,15 @@ class Island:
     def _generate_decorations(self):
         """Генерация мелких декоративных элементов"""
         decorations = []
-        num_decorations = random.randint(ISLAND_DECORATIONS_MIN, ISLAND_DECORATIONS_MAX)
+        num_decorations = self.rng.randint(ISLAND_DECORATIONS_MIN, ISLAND_DECORATIONS_MAX)
         
         for _ in range(num_decorations):
-            angle = random.uniform(0, 2 * math.pi)
-            distance = random.uniform(0.2, 0.8) * self.radius
+            angle = self.rng.uniform(0, 2 * math.pi)
+            distance = self.rng.uniform(0.2, 0.8) * self.radius
             x = self.x + math.cos(angle) * distance
             y = self.y + math.sin(angle) * distance
             
-            decor_type = random.choices(
+            decor_type = self.rng.choices(
                 ['bush', 'flower', 'stone', 'coconut'],
                 weights=[0.3, 0.3, 0.2, 0.2]
             )[0]
@@ -82,123 +90,156 @@ class Island:
                 'type': decor_type,
                 'x': x,
                 'y': y,
-                'size': random.uniform(0.5, 1.0)
+                'size': self.rng.uniform(0.5, 1.0)
             })
         
         return decorations
     
-    def draw(self, screen, camera_y):
-        """Отрисовка острова"""
-        adjusted_points = [(int(p[0]), int(p[1] - camera_y)) for p in self.points]
-        
-        min_y = min(p[1] for p in adjusted_points)
-        max_y = max(p[1] for p in adjusted_points)
+    def _init_bake_rect(self):
+        """Мировой прямоугольник запечённой поверхности (форма + запас под структуры)"""
+        xs = [p[0] for p in self.points]
+        ys = [p[1] for p in self.points]
+        self.min_point_y = min(ys)
+        self.max_point_y = max(ys)
         
-        if max_y < -200 or min_y > SCREEN_HEIGHT + 200:
-            return
+        margin = ISLAND_BAKE_MARGIN
+        left = int(min(xs)) - margin
+        top = int(self.min_point_y) - margin
+        self.bake_rect = pygame.Rect(left, top,
+                                     int(max(xs)) + margin - left,
+                                     int(self.max_point_y) + margin - top)
+    
+    def bake(self):
+        """Статичная часть острова в SRCALPHA-поверхности: форма, структуры, декор"""
+        rect = self.bake_rect
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
         
-        pygame.draw.polygon(screen, self.color, adjusted_points)
-        pygame.draw.polygon(screen, DARK_GREEN, adjusted_points, 3)
+        points = [(int(p[0] - rect.x), int(p[1] - rect.y)) for p in self.points]
+        pygame.draw.polygon(surface, self.color, points)
+        pygame.draw.polygon(surface, DARK_GREEN, points, 3)
         
+        # Камни раньше получали случайную форму каждый кадр; теперь - одну на остров
+        rock_rng = random.Random(self.seed)
         for structure in self.structures:
-            self._draw_structure(screen, camera_y, structure)
+            self._draw_structure(surface, rect.x, rect.y, structure, rock_rng)
         
         for decor in self.decorations:
-            self._draw_decoration(screen, camera_y, decor)
-    
-    def _draw_structure(self, screen, camera_y, structure):
-        """Отрисовка структур на острове"""
-        x_screen = int(structure['x'])
-        y_screen = int(structure['y'] - camera_y)
-        size = structure['size']
+            self._draw_decoration(surface, rect.x, rect.y, decor)
         
-        if y_screen < -100 or y_screen > SCREEN_HEIGHT + 100:
+        return surface
+    
+    def draw(self, screen, camera_y):
+        """Отрисовка острова: запечённая поверхность + анимированный слой"""
+        if self.max_point_y - camera_y < -200 or self.min_point_y - camera_y > SCREEN_HEIGHT + 200:
             return
         
+        surface = island_surface_cache.get(self)
+        screen.blit(surface, (self.bake_rect.x, self.bake_rect.y - camera_y))
+        
+        for structure in self.animated_structures:
+            self._draw_animated(screen, camera_y, structure)
+    
+    def _draw_structure(self, surface, origin_x, origin_y, structure, rock_rng):
+        """Статичная часть структуры (origin - мировые координаты левого верхнего угла surface)"""
+        x_screen = int(structure['x'] - origin_x)
+        y_screen = int(structure['y'] - origin_y)
+        size = structure['size']
+        
         struct_type = structure['type']
         
         if struct_type == 'lighthouse':
-            pygame.draw.rect(screen, BROWN, 
+            pygame.draw.rect(surface, BROWN, 
                            (x_screen - 8*size, y_screen - 35*size, 16*size, 35*size))
-            pygame.draw.polygon(screen, RED, [
+            pygame.draw.polygon(surface, RED, [
                 (x_screen, y_screen - 45*size),
                 (x_screen - 12*size, y_screen - 35*size),
                 (x_screen + 12*size, y_screen - 35*size)
             ])
-            if random.random() < 0.5:
-                pygame.draw.circle(screen, GOLD, (x_screen, int(y_screen - 45*size)), int(5*size))
         
         elif struct_type == 'hut':
-            pygame.draw.polygon(screen, BROWN, [
+            pygame.draw.polygon(surface, BROWN, [
                 (x_screen - 15*size, y_screen),
                 (x_screen + 15*size, y_screen),
                 (x_screen + 15*size, y_screen - 25*size),
                 (x_screen, y_screen - 35*size),
                 (x_screen - 15*size, y_screen - 25*size)
             ])
-            pygame.draw.rect(screen, (100, 50, 0), 
+            pygame.draw.rect(surface, (100, 50, 0), 
                            (x_screen - 5*size, y_screen - 10*size, 10*size, 10*size))
         
         elif struct_type == 'palm':
-            sway = math.sin(pygame.time.get_ticks() / 300 + structure['angle']) * 3 * size
-            pygame.draw.rect(screen, (101, 67, 33), 
+            # Ствол статичен, крона качается в _draw_animated
+            pygame.draw.rect(surface, (101, 67, 33), 
                            (x_screen - 3*size, y_screen, 6*size, -30*size))
-            pygame.draw.circle(screen, (0, 100, 0), (int(x_screen + sway), int(y_screen - 30*size)), int(15*size))
-            pygame.draw.circle(screen, (0, 120, 0), (int(x_screen + 10*size + sway/2), int(y_screen - 25*size)), int(10*size))
-            pygame.draw.circle(screen, (0, 120, 0), (int(x_screen - 10*size + sway/2), int(y_screen - 25*size)), int(10*size))
         
         elif struct_type == 'rock':
             points = []
             for i in range(6):
                 angle = i * math.pi / 3 + structure['angle'] / 100
-                r = random.uniform(8, 12) * size
+                r = rock_rng.uniform(8, 12) * size
                 points.append((
                     x_screen + math.cos(angle) * r,
                     y_screen - 20*size + math.sin(angle) * r
                 ))
-            pygame.draw.polygon(screen, (100, 100, 100), points)
-            pygame.draw.polygon(screen, (80, 80, 80), points, 1)
+            pygame.draw.polygon(surface, (100, 100, 100), points)
+            pygame.draw.polygon(surface, (80, 80, 80), points, 1)
         
         elif struct_type == 'shipwreck':
-            pygame.draw.ellipse(screen, (70, 50, 30), 
+            pygame.draw.ellipse(surface, (70, 50, 30), 
                               (x_screen - 20*size, y_screen - 5*size, 40*size, 15*size))
-            pygame.draw.rect(screen, (80, 60, 40), 
+            pygame.draw.rect(surface, (80, 60, 40), 
                            (x_screen - 2*size, y_screen - 25*size, 4*size, 20*size))
-            pygame.draw.polygon(screen, (200, 200, 200, 100), [
+            pygame.draw.polygon(surface, (200, 200, 200, 100), [
                 (x_screen, y_screen - 25*size),
                 (x_screen + 15*size, y_screen - 15*size),
                 (x_screen, y_screen - 5*size)
             ], 1)
         
         elif struct_type == 'chest':
-            pygame.draw.rect(screen, GOLD, 
+            pygame.draw.rect(surface, GOLD, 
                            (x_screen - 10*size, y_screen - 5*size, 20*size, 10*size))
-            pygame.draw.polygon(screen, (150, 100, 50), [
+            pygame.draw.polygon(surface, (150, 100, 50), [
                 (x_screen - 12*size, y_screen - 5*size),
                 (x_screen + 12*size, y_screen - 5*size),
                 (x_screen + 10*size, y_screen - 15*size),
                 (x_screen - 10*size, y_screen - 15*size)
             ])
-            pygame.draw.circle(screen, (50, 50, 50), (x_screen, y_screen - 10*size), int(3*size))
+            pygame.draw.circle(surface, (50, 50, 50), (x_screen, y_screen - 10*size), int(3*size))
     
-    def _draw_decoration(self, screen, camera_y, decor):
-        """Отрисовка декораций"""
-        x_screen = int(decor['x'])
-        y_screen = int(decor['y'] - camera_y)
-        size = decor['size']
+    def _draw_animated(self, screen, camera_y, structure):
+        """Анимированный слой поверх запечённой поверхности: крона пальмы и огонь маяка"""
+        x_screen = int(structure['x'])
+        y_screen = int(structure['y'] - camera_y)
+        size = structure['size']
         
-        if y_screen < -50 or y_screen > SCREEN_HEIGHT + 50:
+        if y_screen < -100 or y_screen > SCREEN_HEIGHT + 100:
             return
         
+        if structure['type'] == 'palm':
+            sway = math.sin(pygame.time.get_ticks() / 300 + structure['angle']) * 3 * size
+            pygame.draw.circle(screen, (0, 100, 0), (int(x_screen + sway), int(y_screen - 30*size)), int(15*size))
+            pygame.draw.circle(screen, (0, 120, 0), (int(x_screen + 10*size + sway/2), int(y_screen - 25*size)), int(10*size))
+            pygame.draw.circle(screen, (0, 120, 0), (int(x_screen - 10*size + sway/2), int(y_screen - 25*size)), int(10*size))
+        
+        elif structure['type'] == 'lighthouse':
+            if random.random() < 0.5:
+                pygame.draw.circle(screen, GOLD, (x_screen, int(y_screen - 45*size)), int(5*size))
+    
+    def _draw_decoration(self, surface, origin_x, origin_y, decor):
+        """Отрисовка декораций (origin - мировые координаты левого верхнего угла surface)"""
+        x_screen = int(decor['x'] - origin_x)
+        y_screen = int(decor['y'] - origin_y)
+        size = decor['size']
+        
         decor_type = decor['type']
         
         if decor_type == 'bush':
-            pygame.draw.circle(screen, (0, 100, 0), (x_screen, y_screen), int(8*size))
-            pygame.draw.circle(screen, (0, 80, 0), (x_screen, y_screen), int(6*size), 1)
+            pygame.draw.circle(surface, (0, 100, 0), (x_screen, y_screen), int(8*size))
+            pygame.draw.circle(surface, (0, 80, 0), (x_screen, y_screen), int(6*size), 1)
         
         elif decor_type == 'flower':
-            pygame.draw.circle(screen, (255, 100, 150), (x_screen, y_screen), int(5*size))
-            pygame.draw.circle(screen, (255, 255, 0), (x_screen, y_screen), int(2*size))
+            pygame.draw.circle(surface, (255, 100, 150), (x_screen, y_screen), int(5*size))
+            pygame.draw.circle(surface, (255, 255, 0), (x_screen, y_screen), int(2*size))
         
         elif decor_type == 'stone':
             points = [
@@ -208,11 +249,11 @@ class Island:
                 (x_screen, y_screen + 5*size),
                 (x_screen - 4*size, y_screen + 2*size)
             ]
-            pygame.draw.polygon(screen, (120, 120, 120), points)
+            pygame.draw.polygon(surface, (120, 120, 120), points)
         
         elif decor_type == 'coconut':
-            pygame.draw.circle(screen, (101, 67, 33), (x_screen, y_screen), int(4*size))
-            pygame.draw.circle(screen, (50, 30, 15), (x_screen, y_screen), int(2*size))
+            pygame.draw.circle(surface, (101, 67, 33), (x_screen, y_screen), int(4*size))
+            pygame.draw.circle(surface, (50, 30, 15), (x_screen, y_screen), int(2*size))
     
     def collides_with(self, x, y, radius=25):
         """Проверка столкновения с островом"""
@@ -222,14 +263,69 @@ class Island:
         return dist < self.radius * ISLAND_COLLISION_MULTIPLIER + radius
 
 
+class IslandSurfaceCache:
+    """Запечённые поверхности островов (LRU с бюджетом памяти).
+
+    Поверхность строится при первом появлении острова на экране и
+    удаляется вместе с островом в _cleanup_old_objects() или при
+    превышении бюджета (тогда - самая давно не видимая).
+    """
+    
+    def __init__(self, budget_bytes=ISLAND_CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.surfaces = OrderedDict()   # Island -> Surface
+        self.used_bytes = 0
+        self.bakes = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _surface_bytes(surface):
+        width, height = surface.get_size()
+        return width * height * surface.get_bytesize()
+    
+    def get(self, island):
+        """Поверхность острова (запекается при первом запросе)"""
+        surface = self.surfaces.get(island)
+        if surface is not None:
+            self.surfaces.move_to_end(island)
+            return surface
+        
+        surface = island.bake()
+        self.bakes += 1
+        self.surfaces[island] = surface
+        self.used_bytes += self._surface_bytes(surface)
+        
+        # Вытеснение давно не видимых, но не только что запечённой
+        while self.used_bytes > self.budget_bytes and len(self.surfaces) > 1:
+            _, old_surface = self.surfaces.popitem(last=False)
+            self.used_bytes -= self._surface_bytes(old_surface)
+            self.evictions += 1
+        
+        return surface
+    
+    def evict(self, islands):
+        """Удаление поверхностей островов, убранных из мира"""
+        for island in islands:
+            surface = self.surfaces.pop(island, None)
+            if surface is not None:
+                self.used_bytes -= self._surface_bytes(surface)
+                self.evictions += 1
+
+
+# Общий кэш на весь процесс
+island_surface_cache = IslandSurfaceCache()
+
+
 # shore.py - Берега с зубчатыми краями
 
 class Shore:
-    def __init__(self, side, start_y, end_y):
+    def __init__(self, side, start_y, end_y, rng=random):
         self.side = side
+        self.rng = rng
         self.start_y = start_y
         self.end_y = end_y
         self.points = self._generate_shore()
+        self._build_segment_index()
         
         if side == 'left':
             self.x_left = 0
@@ -238,6 +334,31 @@ class Shore:
             self.x_left = SCREEN_WIDTH - SHORE_WIDTH
             self.x_right = SCREEN_WIDTH
     
+    def _build_segment_index(self):
+        """Индекс отрезков ломаной: отсортированные y и габарит по x"""
+        xs = [p[0] for p in self.points]
+        ys = [p[1] for p in self.points]
+        self.min_x, self.max_x = min(xs), max(xs)
+        self.min_y, self.max_y = min(ys), max(ys)
+        
+        # Отрезки сортируются по нижней границе y; последний отрезок (к end_y)
+        # может идти вверх, поэтому сортировка нужна, а не просто порядок точек
+        segments = sorted(
+            (min(y1, y2), max(y1, y2), x1, y1, x2, y2)
+            for (x1, y1), (x2, y2) in zip(self.points, self.points[1:])
+        )
+        self.segment_y_min = [seg[0] for seg in segments]
+        self.segments = [seg[1:] for seg in segments]
+        self.max_segment_span = max(seg[1] - seg[0] for seg in segments)
+        
+        # Те же отрезки столбцами NumPy для пакетной проверки снарядов
+        points = np.array(self.points, dtype=np.float64)
+        self._segment_arrays = (points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+    
+    def segment_arrays(self):
+        """Отрезки ломаной как массивы (x1, y1, x2, y2)"""
+        return self._segment_arrays
+    
     def _generate_shore(self):
         """Генерация зубчатых краёв берега"""
         points = []
@@ -247,12 +368,12 @@ class Shore:
             points.append((0, current_y))
             
             while current_y < self.end_y:
-                indent = random.randint(SHORE_INDENT_MIN, SHORE_INDENT_MAX)
-                segment_height = random.randint(SHORE_SEGMENT_HEIGHT_MIN, SHORE_SEGMENT_HEIGHT_MAX)
+                indent = self.rng.randint(SHORE_INDENT_MIN, SHORE_INDENT_MAX)
+                segment_height = self.rng.randint(SHORE_SEGMENT_HEIGHT_MIN, SHORE_SEGMENT_HEIGHT_MAX)
                 
                 points.append((indent, current_y))
                 current_y += segment_height / 2
-                points.append((indent + random.randint(-20, 20), current_y))
+                points.append((indent + self.rng.randint(-20, 20), current_y))
                 current_y += segment_height / 2
             
             points.append((0, self.end_y))
@@ -260,12 +381,12 @@ class Shore:
             points.append((SCREEN_WIDTH, current_y))
             
             while current_y < self.end_y:
-                indent = random.randint(SHORE_INDENT_MIN, SHORE_INDENT_MAX)
-                segment_height = random.randint(SHORE_SEGMENT_HEIGHT_MIN, SHORE_SEGMENT_HEIGHT_MAX)
+                indent = self.rng.randint(SHORE_INDENT_MIN, SHORE_INDENT_MAX)
+                segment_height = self.rng.randint(SHORE_SEGMENT_HEIGHT_MIN, SHORE_SEGMENT_HEIGHT_MAX)
                 
                 points.append((SCREEN_WIDTH - indent, current_y))
                 current_y += segment_height / 2
-                points.append((SCREEN_WIDTH - indent + random.randint(-20, 20), current_y))
+                points.append((SCREEN_WIDTH - indent + self.rng.randint(-20, 20), current_y))
                 current_y += segment_height / 2
             
             points.append((SCREEN_WIDTH, self.end_y))
@@ -293,39 +414,22 @@ class Shore:
         return self.collides_with(x, y, radius)
     
     def collides_with(self, x, y, radius=25):
-        """Проверка столкновения с берегом"""
-        for i in range(len(self.points) - 1):
-            x1, y1 = self.points[i]
-            x2, y2 = self.points[i+1]
-            dist = self._point_to_segment_distance(x, y, x1, y1, x2, y2)
-            if dist < radius + 10:
+        """Проверка столкновения с берегом: бисекция к отрезкам рядом с y"""
+        reach = radius + SHORE_COLLISION_MARGIN
+        
+        # Ранний отказ по габариту берега
+        if x - reach > self.max_x or x + reach < self.min_x:
+            return False
+        if y + reach < self.min_y or y - reach > self.max_y:
+            return False
+        
+        lo = bisect_left(self.segment_y_min, y - reach - self.max_segment_span)
+        hi = bisect_right(self.segment_y_min, y + reach)
+        
+        for i in range(lo, hi):
+            seg_y_max, x1, y1, x2, y2 = self.segments[i]
+            if seg_y_max < y - reach:
+                continue
+            if point_to_segment_distance(x, y, x1, y1, x2, y2) < reach:
                 return True
         return False
-    
-    def _point_to_segment_distance(self, px, py, x1, y1, x2, y2):
-        """Расстояние от точки до отрезка"""
-        try:
-            line_vec = (x2 - x1, y2 - y1)
-            point_vec = (px - x1, py - y1)
-            
-            line_len_sq = line_vec[0]**2 + line_vec[1]**2
-            
-            if line_len_sq == 0:
-                dx = px - x1
-                dy = py - y1
-                return math.sqrt(dx*dx + dy*dy) if abs(dx) < 1e6 and abs(dy) < 1e6 else 1e9
-            
-            t = max(0, min(1, (point_vec[0] * line_vec[0] + point_vec[1] * line_vec[1]) / line_len_sq)) # линейная интерполяция
-            
-            nearest_x = x1 + t * line_vec[0]
-            nearest_y = y1 + t * line_vec[1]
-            
-            dx = px - nearest_x
-            dy = py - nearest_y
-            
-            if abs(dx) > 1e6 or abs(dy) > 1e6:
-                return 1e9
-            
-            return math.sqrt(dx*dx + dy*dy)
-        except (OverflowError, ValueError):
-            return 1e9
\ No newline at end of file
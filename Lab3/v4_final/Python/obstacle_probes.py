@@ -0,0 +1,217 @@
+# obstacle_probes.py - Зонды обхода препятствий для всех врагов за один проход NumPy
+
+import math
+import time
+import numpy as np
+from config import *
+from spatial_index import LAYER_ISLANDS, LAYER_SHORES
+
+
+def probe_points(enemies, rows):
+    """Точки зондов врагов rows одним массивом.
+
+    Возвращает (owner, px, py, radius): owner - позиция строки в rows
+    для каждого зонда, остальное - центр и радиус круга зонда. Углы
+    зондов - PROBE_ANGLES типа врага от текущего курса, на дальности обзора.
+    """
+    kinds = enemies.kind[rows]
+    owners = []
+    offsets = []
+    for code, kind_offsets in enumerate(enemies.PROBE_OFFSETS):
+        at = np.flatnonzero(kinds == code)
+        owners.append(np.repeat(at, kind_offsets.size))
+        offsets.append(np.tile(kind_offsets, at.size))
+    owner = np.concatenate(owners)
+    rows_of = rows[owner]
+
+    angles = enemies.angle[rows_of] + np.concatenate(offsets)
+    ranges = enemies.param('detection_range', rows_of)
+    px = enemies.x[rows_of] + np.cos(angles) * ranges
+    py = enemies.y[rows_of] + np.sin(angles) * ranges
+    return owner, px, py, enemies.param('probe_radius', rows_of).astype(np.float64)
+
+
+def _shore_contact(shore, x, y, reach):
+    """Маска точек, чей круг радиуса reach задевает ломаную берега"""
+    touched = np.zeros(x.size, dtype=np.bool_)
+    # Только точки в габарите берега (как ранний отказ в Shore.collides_with)
+    near = np.flatnonzero((x - reach <= shore.max_x) & (x + reach >= shore.min_x) &
+                          (y + reach >= shore.min_y) & (y - reach <= shore.max_y))
+    if near.size == 0:
+        return touched
+
+    x1, y1, x2, y2 = shore.segment_arrays()
+    sdx = x2 - x1
+    sdy = y2 - y1
+    length_sq = np.maximum(sdx*sdx + sdy*sdy, 1e-12)
+
+    qx = x[near, None]
+    qy = y[near, None]
+    t = np.clip(((qx - x1) * sdx + (qy - y1) * sdy) / length_sq, 0, 1)
+    nx = qx - (x1 + t * sdx)
+    ny = qy - (y1 + t * sdy)
+    touched[near] = (nx*nx + ny*ny < (reach[near, None]) ** 2).any(axis=1)
+    return touched
+
+
+def _island_arrays(islands):
+    """Центры и радиусы столкновения островов"""
+    ix = np.fromiter((i.x for i in islands), np.float64, len(islands))
+    iy = np.fromiter((i.y for i in islands), np.float64, len(islands))
+    ir = np.fromiter((i.radius for i in islands), np.float64, len(islands)) * ISLAND_COLLISION_MULTIPLIER
+    return ix, iy, ir
+
+
+def circles_collide(x, y, radius, world_index):
+    """Маска кругов, задевших остров или берег (пакетный WorldSpatialIndex.collides_circle)"""
+    hit = np.zeros(x.size, dtype=np.bool_)
+    if x.size == 0:
+        return hit
+
+    margin = float(radius.max()) + SHORE_COLLISION_MARGIN + SPATIAL_QUERY_MARGIN
+    y_min = float(y.min()) - margin
+    y_max = float(y.max()) + margin
+
+    islands = world_index.in_range(y_min, y_max, (LAYER_ISLANDS,))
+    if islands:
+        ix, iy, ir = _island_arrays(islands)
+        dx = x[:, None] - ix[None, :]
+        dy = y[:, None] - iy[None, :]
+        reach = ir[None, :] + radius[:, None]
+        hit |= (dx*dx + dy*dy < reach*reach).any(axis=1)
+
+    reach = radius + SHORE_COLLISION_MARGIN
+    for shore in world_index.in_range(y_min, y_max, (LAYER_SHORES,)):
+        hit |= _shore_contact(shore, x, y, reach)
+    return hit
+
+
+def probe_avoidance(enemies, rows, world_index):
+    """Векторы обхода для строк rows хранилища врагов: массивы (ax, ay).
+
+    Острова и берега проверяются сразу против всех зондов: острова -
+    матрицей «зонд x остров» по центрам и радиусам, берега - матрицей
+    «зонд x отрезок» по столбцам отрезков из Shore.segment_arrays().
+    """
+    n = rows.size
+    avoid_x = np.zeros(n, dtype=np.float64)
+    avoid_y = np.zeros(n, dtype=np.float64)
+    if n == 0:
+        return avoid_x, avoid_y
+
+    owner, px, py, pr = probe_points(enemies, rows)
+    ex = enemies.x[rows]
+    ey = enemies.y[rows]
+
+    margin = float(pr.max()) + SPATIAL_QUERY_MARGIN
+    y_min = float(py.min()) - margin
+    y_max = float(py.max()) + margin
+
+    # Острова: зонд касается острова -> отталкивание врага от центра острова
+    islands = world_index.in_range(y_min, y_max, (LAYER_ISLANDS,))
+    if islands:
+        ix, iy, ir = _island_arrays(islands)
+        dx = px[:, None] - ix[None, :]
+        dy = py[:, None] - iy[None, :]
+        reach = ir[None, :] + pr[:, None]
+        contact = dx*dx + dy*dy < reach*reach
+
+        probes, hit_islands = np.nonzero(contact)
+        if probes.size:
+            owners = owner[probes]
+            ax = ex[owners] - ix[hit_islands]
+            ay = ey[owners] - iy[hit_islands]
+            dist = np.sqrt(ax*ax + ay*ay)
+            valid = dist > 0
+            owners, ax, ay, dist = owners[valid], ax[valid], ay[valid], dist[valid]
+
+            strength_k = enemies.param('probe_strength', rows[owners])
+            min_scale = enemies.param('probe_min_scale', rows[owners])
+            strength = strength_k / np.maximum(dist / 100, min_scale)
+            avoid_x += np.bincount(owners, ax / dist * strength, n)
+            avoid_y += np.bincount(owners, ay / dist * strength, n)
+
+    # Берега: зонд задел ломаную берега -> толчок по x от его стороны
+    shores = world_index.in_range(y_min, y_max, (LAYER_SHORES,))
+    if shores:
+        push = enemies.param('shore_push', rows[owner])
+        reach = pr + SHORE_COLLISION_MARGIN
+        shore_x = np.zeros(owner.size, dtype=np.float64)
+        for shore in shores:
+            sign = 1.0 if shore.side == 'left' else -1.0
+            shore_x += np.where(_shore_contact(shore, px, py, reach), sign * push, 0.0)
+        avoid_x += np.bincount(owner, shore_x, n)
+
+    return avoid_x, avoid_y
+
+
+def _probe_one(x, y, heading, angles, params, world_index):
+    """Зонды одного врага через query_circle (эталон для сравнения в benchmark)"""
+    avoid = [0.0, 0.0]
+    for angle_offset in angles:
+        check_angle = heading + math.radians(angle_offset)
+        check_x = x + math.cos(check_angle) * params['detection_range']
+        check_y = y + math.sin(check_angle) * params['detection_range']
+
+        for island in world_index.query_circle(check_x, check_y, params['probe_radius'], (LAYER_ISLANDS,)):
+            dx = x - island.x
+            dy = y - island.y
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist > 0:
+                strength = params['probe_strength'] / max(dist / 100, params['probe_min_scale'])
+                avoid[0] += (dx / dist) * strength
+                avoid[1] += (dy / dist) * strength
+
+        for shore in world_index.query_circle(check_x, check_y, params['probe_radius'], (LAYER_SHORES,)):
+            avoid[0] += params['shore_push'] if shore.side == 'left' else -params['shore_push']
+    return avoid
+
+
+def benchmark(enemy_counts=(10, 30, 50, 100), frames=200, seed=ENGINE_BENCHMARK_SEED):
+    """Сравнение зондов по одному врагу (query_circle) и probe_avoidance() на мире движка"""
+    import random
+    from engine import GameEngine
+    from enemy_system import EnemySystem, KINDS
+
+    engine = GameEngine(seed=seed, verbose=False, background_generation=False)
+    rng = random.Random(seed)
+    top = engine.world_top
+    bottom = engine.player.y
+
+    print("\n===== ЗОНДЫ ПРЕПЯТСТВИЙ =====")
+    print(f"{'врагов':>7} {'по одному, мс':>14} {'пакетом, мс':>12} {'ускорение':>10} {'расхождение':>12}")
+    for count in enemy_counts:
+        enemies = EnemySystem(seed, headless=engine.headless)
+        for _ in range(count):
+            enemies.spawn('simple' if rng.random() < 0.7 else 'hard',
+                          rng.uniform(SHORE_WIDTH, SCREEN_WIDTH - SHORE_WIDTH), rng.uniform(top, bottom))
+        enemies.angle[:count] = [rng.uniform(0, 2 * math.pi) for _ in range(count)]
+        rows = np.arange(count)
+        scalar_args = [(float(enemies.x[i]), float(enemies.y[i]), float(enemies.angle[i]),
+                        KINDS[enemies.kind[i]].PROBE_ANGLES, KINDS[enemies.kind[i]].PARAMS) for i in rows]
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            scalar = [_probe_one(*args, engine.world_index) for args in scalar_args]
+        scalar_time = (time.perf_counter() - start) / frames
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            batch = probe_avoidance(enemies, rows, engine.world_index)
+        batch_time = (time.perf_counter() - start) / frames
+
+        error = float(np.abs(np.array(scalar, dtype=np.float64) - np.column_stack(batch)).max())
+        # Пакетная проверка столкновений против collides_circle
+        radius = enemies.param('radius', rows).astype(np.float64)
+        expected = [engine.world_index.collides_circle(float(enemies.x[i]), float(enemies.y[i]), float(radius[i]))
+                    for i in rows]
+        mismatched = int(np.count_nonzero(circles_collide(enemies.x[rows], enemies.y[rows], radius,
+                                                          engine.world_index) != np.array(expected)))
+        print(f"{count:>7} {scalar_time * 1000:>14.3f} {batch_time * 1000:>12.3f} "
+              f"{scalar_time / batch_time:>9.1f}x {error:>12.2e}  столкновений не совпало: {mismatched}")
+    print("=============================\n")
+    engine.close()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -3,11 +3,15 @@
 import pygame
 import math
 from config import *
+from sprites import sprite_registry
+from pools import allocations
 
 class Player:
-    def __init__(self, x, y):
+    def __init__(self, x, y, headless=False):
         self.x = x
         self.y = y
+        self.prev_x = x  # позиция на предыдущем тике (для интерполяции отрисовки)
+        self.prev_y = y
         self.hull_angle = 0
         self.size = PLAYER_SIZE
         self.base_speed = PLAYER_BASE_SPEED
@@ -17,15 +21,17 @@ class Player:
         self.score = 0
         self.radius = COLLISION_RADIUS_PLAYER
         
-        self._load_image()
+        self._rotated = {}  # целый угол корпуса -> повёрнутый спрайт
+        
+        self.image = None   # без окна (headless) спрайта нет
+        if not headless:
+            self._load_image()
     
     def _load_image(self):
-        """Загрузка спрайта игрока"""
-        try:
-            self.image = pygame.image.load('img/player/player_up.png').convert_alpha()
-            self.image = pygame.transform.scale(self.image, (self.size, self.size))
-        except pygame.error:
-            self.image = self._create_fallback_image()
+        """Получение спрайта игрока из общего реестра"""
+        self.image = sprite_registry.get('player_up', self.size)
+        if self.image is None:
+            self.image = sprite_registry.get_fallback(('player', self.size), self._create_fallback_image)
     
     def _create_fallback_image(self):
         """Создание заглушки если спрайт не найден"""
@@ -38,10 +44,10 @@ class Player:
         ])
         return surf
     
-    def update(self, keys, obstacles):
+    def update(self, keys, world_index):
         """Обновление состояния игрока"""
         self._handle_rotation(keys)
-        self._handle_movement(obstacles)
+        self._handle_movement(world_index)
         self._update_cooldown()
     
     def _handle_rotation(self, keys):
@@ -61,7 +67,7 @@ class Player:
         
         self.hull_angle = max(-PLAYER_MAX_ANGLE, min(PLAYER_MAX_ANGLE, self.hull_angle))
     
-    def _handle_movement(self, obstacles):
+    def _handle_movement(self, world_index):
         """Обработка движения и коллизий"""
         old_x, old_y = self.x, self.y
         
@@ -74,21 +80,12 @@ class Player:
         self.x = max(PLAYER_EDGE_MARGIN, min(SCREEN_WIDTH - PLAYER_EDGE_MARGIN, self.x))
         
         # Проверка коллизий
-        if self._check_collisions(obstacles):
+        if self._check_collisions(world_index):
             self._handle_collision(old_x, old_y)
     
-    def _check_collisions(self, obstacles):
-        """Проверка столкновений с препятствиями"""
-        for obstacle in obstacles:
-            # Острова
-            if hasattr(obstacle, 'collides_with'):
-                if obstacle.collides_with(self.x, self.y, self.radius):
-                    return True
-            # Берега
-            elif hasattr(obstacle, 'contains_point'):
-                if obstacle.contains_point(self.x, self.y, self.radius):
-                    return True
-        return False
+    def _check_collisions(self, world_index):
+        """Проверка столкновений с островами и берегами рядом с игроком"""
+        return world_index.collides_circle(self.x, self.y, self.radius)
     
     def _handle_collision(self, old_x, old_y):
         """Обработка столкновения"""
@@ -108,10 +105,10 @@ class Player:
         distance = math.sqrt(dx*dx + dy*dy)
         return distance < self.radius + radius
     
-    def shoot(self):
-        """Стрельба с учетом угла поворота"""
+    def shoot(self, projectiles):
+        """Стрельба с учетом угла поворота: снаряд сразу в ProjectileSystem; True - выстрел был"""
         if self.shoot_cooldown > 0:
-            return []
+            return False
         
         self.shoot_cooldown = PLAYER_SHOOT_COOLDOWN
         
@@ -124,17 +121,33 @@ class Player:
         elif self.hull_angle < -PLAYER_MIN_ANGLE_FOR_SIDE_SHOT:
             angle -= math.radians(PLAYER_SHOOT_ANGLE_OFFSET)
         
-        from projectile import Projectile
-        return [Projectile(self.x, self.y, angle)]
+        projectiles.spawn(self.x, self.y, angle)
+        return True
     
     def take_damage(self, amount):
         """Получение урона"""
         self.health -= amount
         return self.health <= 0
     
-    def draw(self, screen, camera_y):
-        """Отрисовка игрока"""
-        y_screen = int(self.y - camera_y)
-        rotated = pygame.transform.rotate(self.image, -self.hull_angle)
-        rect = rotated.get_rect(center=(int(self.x), y_screen))
+    def interpolated_position(self, alpha):
+        """Позиция между предыдущим и текущим тиком"""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+    
+    def _rotated_image(self):
+        """Спрайт под углом корпуса с точностью до градуса (поворот один раз на угол)"""
+        angle = int(round(self.hull_angle))
+        rotated = self._rotated.get(angle)
+        if rotated is None:
+            rotated = pygame.transform.rotate(self.image, -angle)
+            self._rotated[angle] = rotated
+            allocations.note('surfaces')
+        return rotated
+    
+    def draw(self, screen, camera_y, alpha=1.0):
+        """Отрисовка игрока (alpha - доля тика между prev и текущей позицией)"""
+        x, y = self.interpolated_position(alpha)
+        y_screen = int(y - camera_y)
+        rotated = self._rotated_image()
+        rect = rotated.get_rect(center=(int(x), y_screen))
         screen.blit(rotated, rect.topleft)
\ No newline at end of file
@@ -0,0 +1,133 @@
+# pools.py - Пулы объектов, сжатие списков на месте и счётчики выделений за кадр
+
+import sys
+
+# Что считается: новые объекты пулов, объекты из свободного списка,
+# расширение столбцов (ProjectileSystem/EnemySystem), новые поверхности pygame
+ALLOCATION_KINDS = ('objects', 'reused', 'pool_growth', 'surfaces')
+ALLOCATION_LABELS = {
+    'objects': 'объектов',
+    'reused': 'из пула',
+    'pool_growth': 'рост пулов',
+    'surfaces': 'поверхностей',
+}
+
+
+class AllocationCounter:
+    """Счётчики выделений по кадрам (оверлей F3 и статистика в конце игры).
+
+    Места выделения сами вызывают note(); кадр закрывает
+    FrameProfiler.end_frame(). Дополнительно - изменение числа блоков
+    памяти Python за кадр (sys.getallocatedblocks, нетто: рост без
+    освобождённого).
+    """
+
+    __slots__ = ('current', 'totals', 'peaks', 'frames', 'blocks', 'blocks_total', '_blocks_mark')
+
+    def __init__(self):
+        self.current = dict.fromkeys(ALLOCATION_KINDS, 0)
+        self.totals = dict.fromkeys(ALLOCATION_KINDS, 0)
+        self.peaks = dict.fromkeys(ALLOCATION_KINDS, 0)
+        self.frames = 0
+        self.blocks = 0          # нетто блоков за последний кадр
+        self.blocks_total = 0
+        self._blocks_mark = sys.getallocatedblocks()
+
+    def note(self, kind, n=1):
+        self.current[kind] += n
+
+    def end_frame(self):
+        """Закрыть кадр: текущие счётчики в итоги, пики по кадру"""
+        current = self.current
+        totals = self.totals
+        peaks = self.peaks
+        for kind in ALLOCATION_KINDS:
+            n = current[kind]
+            if n:
+                totals[kind] += n
+                if n > peaks[kind]:
+                    peaks[kind] = n
+                current[kind] = 0
+        self.frames += 1
+
+        blocks = sys.getallocatedblocks()
+        self.blocks = blocks - self._blocks_mark
+        self.blocks_total += self.blocks
+        self._blocks_mark = blocks
+
+    def mark(self):
+        """Снимок итогов для per_frame()"""
+        return self.frames, dict(self.totals)
+
+    def per_frame(self, mark=None):
+        """{вид: среднее за кадр} с момента mark (по умолчанию - за всё время)"""
+        frames, totals = mark if mark is not None else (0, dict.fromkeys(ALLOCATION_KINDS, 0))
+        elapsed = self.frames - frames
+        if elapsed <= 0:
+            return dict.fromkeys(ALLOCATION_KINDS, 0.0)
+        return {kind: (self.totals[kind] - totals[kind]) / elapsed for kind in ALLOCATION_KINDS}
+
+    def print_statistics(self):
+        """Итоги и среднее за кадр по видам выделений"""
+        print("\n===== ВЫДЕЛЕНИЯ ЗА КАДР =====")
+        print(f"Кадров: {self.frames}")
+        rates = self.per_frame()
+        print(f"{'вид':<14} {'всего':>8} {'за кадр':>8} {'пик':>6}")
+        for kind in ALLOCATION_KINDS:
+            print(f"{ALLOCATION_LABELS[kind]:<14} {self.totals[kind]:>8} {rates[kind]:>8.3f} {self.peaks[kind]:>6}")
+        if self.frames:
+            print(f"Блоков памяти Python: {self.blocks_total:+d} нетто ({self.blocks_total / self.frames:+.2f} за кадр)")
+        print("=============================\n")
+
+
+allocations = AllocationCounter()
+
+
+class ObjectPool:
+    """Свободный список объектов одного класса.
+
+    acquire() берёт объект из свободного списка (или создаёт новый) и
+    вызывает у него reset(*args); release() возвращает объект в список.
+    Класс объекта должен уметь reset() теми же аргументами, что __init__.
+    """
+
+    __slots__ = ('cls', 'free', 'created', 'reused')
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reused += 1
+            allocations.note('reused')
+            return obj
+        self.created += 1
+        allocations.note('objects')
+        return self.cls(*args)
+
+    def release(self, obj):
+        self.free.append(obj)
+
+
+def compact(items, keep, release=None):
+    """Сжатие списка на месте без нового списка: остаются элементы с keep(item) == True.
+
+    Порядок сохраняется; удалённые передаются в release (например,
+    ObjectPool.release). Возвращает число удалённых.
+    """
+    write = 0
+    for item in items:
+        if keep(item):
+            items[write] = item
+            write += 1
+        elif release is not None:
+            release(item)
+    removed = len(items) - write
+    if removed:
+        del items[write:]
+    return removed
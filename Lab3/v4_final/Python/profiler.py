@@ -0,0 +1,162 @@
+# profiler.py - Профилировщик кадров по подсистемам
+
+import csv
+import json
+import time
+import numpy as np
+from config import *
+from pools import allocations, ALLOCATION_KINDS, ALLOCATION_LABELS
+
+# Фазы симуляции (GameEngine._tick) и отрисовки (Game.draw)
+UPDATE_PHASES = ('world_gen', 'whirlpools', 'enemies', 'player', 'projectiles', 'cleanup')
+DRAW_PHASES = ('waves', 'islands', 'entities', 'ui')
+PHASES = UPDATE_PHASES + DRAW_PHASES + ('frame',)
+
+
+class _Section:
+    """Таймер одной фазы: with profiler.section('enemies'): ..."""
+
+    __slots__ = ('current', 'column', 'start')
+
+    def __init__(self, current, column):
+        self.current = current
+        self.column = column
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.current[self.column] += time.perf_counter() - self.start
+
+
+class FrameProfiler:
+    """Время фаз за последние кадры в кольцевом буфере.
+
+    Время фазы внутри кадра суммируется (при фиксированном шаге в кадре
+    бывает несколько тиков), end_frame() переносит строку в буфер.
+    Таймер - два вызова perf_counter на фазу, без выделения памяти.
+    """
+
+    def __init__(self, capacity=PROFILER_HISTORY_FRAMES):
+        self.capacity = capacity
+        self.history = np.zeros((capacity, len(PHASES)), dtype=np.float64)  # секунды
+        self.index = 0
+        self.frames = 0
+        self.overlay_visible = False
+
+        self.current = [0.0] * len(PHASES)
+        self._sections = {name: _Section(self.current, i) for i, name in enumerate(PHASES)}
+        self._frame_start = time.perf_counter()
+
+        self._overlay_surface = None
+        self._overlay_age = 0
+        self._allocation_mark = allocations.mark()
+
+    def section(self, name):
+        """Таймер фазы (объект переиспользуется, ничего не создаётся)"""
+        return self._sections[name]
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Закрыть кадр: строка фаз уходит в кольцевой буфер"""
+        current = self.current
+        current[-1] = time.perf_counter() - self._frame_start
+        self.history[self.index] = current
+        self.index = (self.index + 1) % self.capacity
+        self.frames += 1
+        for i in range(len(current)):
+            current[i] = 0.0
+        allocations.end_frame()
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self._overlay_surface = None
+
+    # === Статистика ===
+
+    def percentiles(self):
+        """{фаза: (p50, p95, p99, max)} в миллисекундах по кадрам в буфере"""
+        filled = min(self.frames, self.capacity)
+        if filled == 0:
+            return {}
+        data = self.history[:filled] * 1000
+        p50, p95, p99 = np.percentile(data, (50, 95, 99), axis=0)
+        peak = data.max(axis=0)
+        return {name: (p50[i], p95[i], p99[i], peak[i]) for i, name in enumerate(PHASES)}
+
+    def print_statistics(self):
+        """Вывод перцентилей по фазам (рядом со статистикой UART)"""
+        stats = self.percentiles()
+        print("\n===== ПРОФИЛЬ КАДРОВ =====")
+        print(f"Кадров всего: {self.frames}, в буфере: {min(self.frames, self.capacity)}")
+        if stats:
+            print(f"{'фаза':<12} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  (мс)")
+            for name, (p50, p95, p99, peak) in stats.items():
+                print(f"{name:<12} {p50:7.3f} {p95:7.3f} {p99:7.3f} {peak:7.3f}")
+        print("==========================\n")
+
+    def dump(self, csv_path=PROFILER_CSV_PATH, json_path=PROFILER_JSON_PATH):
+        """Кадры из буфера в CSV (мс, от старых к новым) и перцентили в JSON"""
+        filled = min(self.frames, self.capacity)
+        start = self.index if self.frames > self.capacity else 0
+        order = [(start + i) % self.capacity for i in range(filled)]
+
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(PHASES)
+            for row in order:
+                writer.writerow([f"{value * 1000:.4f}" for value in self.history[row]])
+
+        summary = {
+            'frames': self.frames,
+            'buffered': filled,
+            'phases_ms': {
+                name: {'p50': round(p50, 4), 'p95': round(p95, 4), 'p99': round(p99, 4), 'max': round(peak, 4)}
+                for name, (p50, p95, p99, peak) in self.percentiles().items()
+            },
+        }
+        with open(json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"Профиль сохранён: {csv_path}, {json_path}")
+
+    # === Оверлей ===
+
+    def draw_overlay(self, screen, font):
+        """Таблица перцентилей и выделений за кадр поверх кадра (пересобирается раз в PROFILER_OVERLAY_REFRESH кадров)"""
+        if not self.overlay_visible:
+            return
+
+        import pygame
+
+        self._overlay_age += 1
+        if self._overlay_surface is None or self._overlay_age >= PROFILER_OVERLAY_REFRESH:
+            self._overlay_age = 0
+            lines = [f"{'фаза':<11}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            for name, (p50, p95, p99, _) in self.percentiles().items():
+                lines.append(f"{name:<11}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+
+            # Выделения: среднее за кадр с прошлой пересборки оверлея
+            rates = allocations.per_frame(self._allocation_mark)
+            self._allocation_mark = allocations.mark()
+            lines.append("выделений за кадр")
+            for kind in ALLOCATION_KINDS:
+                lines.append(f"{ALLOCATION_LABELS[kind]:<14}{rates[kind]:7.2f}")
+            lines.append(f"{'блоков Python':<14}{allocations.blocks:+7d}")
+
+            rendered = [font.render(line, True, WHITE) for line in lines]
+            width = max(r.get_width() for r in rendered) + 20
+            height = sum(r.get_height() for r in rendered) + 20
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 180))
+            y = 10
+            for r in rendered:
+                surface.blit(r, (10, y))
+                y += r.get_height()
+            self._overlay_surface = surface
+            allocations.note('surfaces', len(rendered) + 1)
+
+        screen.blit(self._overlay_surface, (UI_PADDING, 110))
@@ -0,0 +1,266 @@
+# projectile_system.py - Все снаряды в столбцах NumPy (structure of arrays)
+
+import math
+import numpy as np
+import pygame
+from config import *
+from spatial_index import LAYER_ISLANDS, LAYER_SHORES
+from pools import allocations
+
+
+class ProjectileSystem:
+    """Хранилище снарядов по столбцам: x, y, vx, vy, lifetime, owner, radius.
+
+    Движение, время жизни, выход за края и столкновения с врагами, островами,
+    берегами и игроком считаются пакетно для всех снарядов сразу. Удаление -
+    swap-remove: дыры в начале массива заполняются живыми снарядами с хвоста.
+    """
+
+    # Столбцы и их типы (owner: True - снаряд игрока)
+    COLUMNS = (
+        ('x', np.float64),
+        ('y', np.float64),
+        ('vx', np.float64),
+        ('vy', np.float64),
+        ('lifetime', np.int32),
+        ('owner', np.bool_),
+        ('radius', np.float64),
+    )
+
+    def __init__(self, capacity=PROJECTILE_INITIAL_CAPACITY):
+        self.count = 0
+        self.capacity = 0
+        self._allocate(capacity)
+        self._sprites = {}
+
+    def _allocate(self, capacity):
+        """Выделение (или расширение) столбцов с сохранением живых снарядов"""
+        if self.capacity:
+            allocations.note('pool_growth')
+        for name, dtype in self.COLUMNS:
+            column = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                column[:self.count] = old[:self.count]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def _columns(self):
+        return [getattr(self, name) for name, _ in self.COLUMNS]
+
+    def __len__(self):
+        return self.count
+
+    # === Создание снарядов ===
+
+    def spawn(self, x, y, angle, speed=PROJECTILE_SPEED, is_player_shot=True, radius=PROJECTILE_RADIUS):
+        """Добавление снаряда; cos/sin считаются один раз здесь"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = math.cos(angle) * speed
+        self.vy[i] = math.sin(angle) * speed
+        self.lifetime[i] = PROJECTILE_LIFETIME
+        self.owner[i] = is_player_shot
+        self.radius[i] = radius
+        self.count += 1
+
+    def spawn_batch(self, x, y, angle, speed, is_player_shot=True, radius=PROJECTILE_RADIUS):
+        """Добавление снарядов массивами x, y, angle (скорость и владелец общие)"""
+        k = len(x)
+        while self.count + k > self.capacity:
+            self._allocate(self.capacity * 2)
+
+        new = slice(self.count, self.count + k)
+        self.x[new] = x
+        self.y[new] = y
+        self.vx[new] = np.cos(angle) * speed
+        self.vy[new] = np.sin(angle) * speed
+        self.lifetime[new] = PROJECTILE_LIFETIME
+        self.owner[new] = is_player_shot
+        self.radius[new] = radius
+        self.count += k
+
+    # === Обновление ===
+
+    def update(self, enemies, world_index, player):
+        """Шаг всех снарядов.
+
+        Возвращает (строки убитых врагов EnemySystem, число попаданий по
+        игроку). Урон врагам наносится здесь же, удаляет их вызывающий.
+        """
+        n = self.count
+        if n == 0:
+            return np.empty(0, dtype=np.intp), 0
+
+        x, y = self.x[:n], self.y[:n]
+        vx, vy = self.vx[:n], self.vy[:n]
+
+        # Движение и время жизни
+        x += vx
+        y += vy
+        self.lifetime[:n] -= 1
+
+        dead = (self.lifetime[:n] <= 0) | (x < 0) | (x > SCREEN_WIDTH)
+
+        # Попадания по врагам
+        killed = self._hit_enemies(enemies, dead)
+
+        # Острова и берега
+        dead |= self._hit_obstacles(world_index)
+
+        # Попадания по игроку
+        enemy_shot = ~self.owner[:n]
+        dx = x - player.x
+        dy = y - player.y
+        player_hit = enemy_shot & (dx*dx + dy*dy < (player.radius + PROJECTILE_RADIUS) ** 2)
+        player_hits = int(np.count_nonzero(player_hit))
+        dead |= player_hit
+
+        self._compact(dead)
+        return killed, player_hits
+
+    def _hit_enemies(self, enemies, dead):
+        """Снаряды игрока против всех врагов сразу; попавшие помечаются в dead"""
+        n = self.count
+        m = len(enemies)
+        shots = np.flatnonzero(self.owner[:n])
+        if shots.size == 0 or m == 0:
+            return np.empty(0, dtype=np.intp)
+
+        er = enemies.param('radius', slice(0, m))
+        dx = self.x[shots, None] - enemies.x[None, :m]
+        dy = self.y[shots, None] - enemies.y[None, :m]
+        reach = self.radius[shots, None] + er[None, :]
+        contact = dx*dx + dy*dy < reach*reach
+
+        rows = np.flatnonzero(contact.any(axis=1))
+        if rows.size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        # Каждый снаряд бьёт первого живого врага по порядку строк, которого касается
+        killed = []
+        for row in rows.tolist():
+            for col in np.flatnonzero(contact[row]).tolist():
+                if col in killed:
+                    continue
+                if enemies.damage(col, 1):
+                    killed.append(col)
+                dead[shots[row]] = True
+                break
+
+        return np.array(killed, dtype=np.intp)
+
+    def _hit_obstacles(self, world_index):
+        """Маска снарядов, задевших остров (по пути за шаг) или берег"""
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        vx, vy = self.vx[:n], self.vy[:n]
+        r = self.radius[:n]
+        hit = np.zeros(n, dtype=np.bool_)
+
+        margin = float(r.max()) + SHORE_COLLISION_MARGIN
+        y_min = float(y.min()) - margin
+        y_max = float(y.max()) + margin
+
+        # Острова: расстояние от центра до отрезка движения за последний шаг
+        islands = world_index.in_range(y_min, y_max, (LAYER_ISLANDS,))
+        if islands:
+            ix = np.fromiter((i.x for i in islands), np.float64, len(islands))
+            iy = np.fromiter((i.y for i in islands), np.float64, len(islands))
+            ir = np.fromiter((i.radius for i in islands), np.float64, len(islands)) * ISLAND_COLLISION_MULTIPLIER
+
+            x0 = (x - vx)[:, None]
+            y0 = (y - vy)[:, None]
+            step_sq = (vx*vx + vy*vy)[:, None]
+            dx = ix[None, :] - x0
+            dy = iy[None, :] - y0
+            t = np.clip((dx * vx[:, None] + dy * vy[:, None]) / np.maximum(step_sq, 1e-12), 0, 1)
+            nx = dx - t * vx[:, None]
+            ny = dy - t * vy[:, None]
+            reach = ir[None, :] + r[:, None]
+            hit |= (nx*nx + ny*ny < reach*reach).any(axis=1)
+
+        # Берега: только снаряды внутри габарита берега
+        for shore in world_index.in_range(y_min, y_max, (LAYER_SHORES,)):
+            reach = r + SHORE_COLLISION_MARGIN
+            near = ((x - reach <= shore.max_x) & (x + reach >= shore.min_x) &
+                    (y + reach >= shore.min_y) & (y - reach <= shore.max_y) & ~hit)
+            idx = np.flatnonzero(near)
+            if idx.size == 0:
+                continue
+
+            x1, y1, x2, y2 = shore.segment_arrays()
+            sdx = x2 - x1
+            sdy = y2 - y1
+            length_sq = np.maximum(sdx*sdx + sdy*sdy, 1e-12)
+
+            px = x[idx, None]
+            py = y[idx, None]
+            t = np.clip(((px - x1) * sdx + (py - y1) * sdy) / length_sq, 0, 1)
+            nx = px - (x1 + t * sdx)
+            ny = py - (y1 + t * sdy)
+            hit[idx] |= (nx*nx + ny*ny < (reach[idx, None]) ** 2).any(axis=1)
+
+        return hit
+
+    def _compact(self, dead):
+        """Swap-remove: живые снаряды с хвоста переезжают в дыры начала массива"""
+        n = self.count
+        keep = n - int(np.count_nonzero(dead))
+        if keep == n:
+            return
+
+        holes = np.flatnonzero(dead[:keep])
+        fillers = keep + np.flatnonzero(~dead[keep:n])
+        if holes.size:
+            for column in self._columns():
+                column[holes] = column[fillers]
+        self.count = keep
+
+    # === Отрисовка ===
+
+    def _sprite(self, is_player_shot, radius):
+        """Кружок снаряда, нарисованный один раз"""
+        key = (is_player_shot, radius)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            size = radius * 2 + 1
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            color = PROJECTILE_COLOR_PLAYER if is_player_shot else PROJECTILE_COLOR_ENEMY
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            self._sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, camera_y, alpha=1.0):
+        """Отрисовка видимых снарядов одним вызовом blits.
+
+        Движение прямолинейное, поэтому позиция на доле тика alpha - это
+        текущая позиция минус (1 - alpha) шага скорости.
+        """
+        n = self.count
+        if n == 0:
+            return
+
+        lag = 1.0 - alpha
+        x = self.x[:n] - self.vx[:n] * lag
+        y_screen = self.y[:n] - self.vy[:n] * lag - camera_y
+        visible = np.flatnonzero((y_screen > -PROJECTILE_RADIUS) & (y_screen < SCREEN_HEIGHT + PROJECTILE_RADIUS))
+        if visible.size == 0:
+            return
+
+        radius = PROJECTILE_RADIUS
+        player_sprite = self._sprite(True, radius)
+        enemy_sprite = self._sprite(False, radius)
+
+        xs = x[visible].astype(np.int32).tolist()
+        ys = y_screen[visible].astype(np.int32).tolist()
+        owners = self.owner[visible].tolist()
+
+        screen.blits([
+            (player_sprite if owner else enemy_sprite, (px - radius, py - radius))
+            for px, py, owner in zip(xs, ys, owners)
+        ], doreturn=False)
@@ -0,0 +1,211 @@
+# spatial_index.py - Пространственный индекс мира (корзины по мировой координате y)
+
+import math
+from config import *
+
+# Слои индекса
+LAYER_ISLANDS = 'islands'
+LAYER_SHORES = 'shores'
+LAYER_WHIRLPOOLS = 'whirlpools'
+
+OBSTACLE_LAYERS = (LAYER_ISLANDS, LAYER_SHORES)
+
+
+def point_to_segment_distance(px, py, x1, y1, x2, y2):
+    """Расстояние от точки до отрезка"""
+    dx = x2 - x1
+    dy = y2 - y1
+    length_sq = dx*dx + dy*dy
+
+    if length_sq == 0:
+        t = 0
+    else:
+        t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+
+    nx = px - (x1 + t * dx)
+    ny = py - (y1 + t * dy)
+    return math.sqrt(nx*nx + ny*ny)
+
+
+class WorldSpatialIndex:
+    """Хэш островов, берегов и водоворотов по корзинам мировой координаты y.
+
+    Объект попадает во все корзины, которые пересекает его вертикальный
+    габарит, поэтому запрос смотрит только корзины вокруг точки запроса.
+    Для очистки объект дополнительно числится в «домашней» корзине по своей
+    ключевой координате (та же, что проверяет _cleanup_old_objects()).
+    """
+
+    def __init__(self, bucket_height=SPATIAL_BUCKET_HEIGHT):
+        self.bucket_height = bucket_height
+        self.buckets = {layer: {} for layer in (LAYER_ISLANDS, LAYER_SHORES, LAYER_WHIRLPOOLS)}
+        self.home_buckets = {layer: {} for layer in self.buckets}
+        # Верхняя граница номера домашней корзины (нижний край мира) для remove_below()
+        self.max_home = {layer: None for layer in self.buckets}
+        self.counts = {layer: 0 for layer in self.buckets}
+
+    # === Габариты объектов ===
+
+    @staticmethod
+    def _extent(obj, layer):
+        """Вертикальный габарит (y_min, y_max) и ключевая координата для очистки"""
+        if layer == LAYER_SHORES:
+            return obj.min_y, obj.max_y, obj.start_y
+        if layer == LAYER_ISLANDS:
+            reach = obj.radius * ISLAND_SHAPE_NOISE_MAX
+        else:
+            reach = obj.radius
+        return obj.y - reach, obj.y + reach, obj.y
+
+    def _bucket_range(self, y_min, y_max):
+        """Номера корзин, покрывающих диапазон y"""
+        return range(int(y_min // self.bucket_height), int(y_max // self.bucket_height) + 1)
+
+    # === Изменение индекса ===
+
+    def insert(self, obj, layer):
+        """Добавление объекта в слой"""
+        y_min, y_max, key_y = self._extent(obj, layer)
+        buckets = self.buckets[layer]
+        for bucket in self._bucket_range(y_min, y_max):
+            buckets.setdefault(bucket, []).append(obj)
+        home = int(key_y // self.bucket_height)
+        self.home_buckets[layer].setdefault(home, []).append(obj)
+        self._raise_max_home(layer, home)
+        self.counts[layer] += 1
+
+    def _raise_max_home(self, layer, home):
+        max_home = self.max_home[layer]
+        if max_home is None or home > max_home:
+            self.max_home[layer] = home
+
+    def remove(self, obj, layer):
+        """Удаление объекта из слоя"""
+        y_min, y_max, key_y = self._extent(obj, layer)
+        buckets = self.buckets[layer]
+        for bucket in self._bucket_range(y_min, y_max):
+            items = buckets.get(bucket)
+            if items is not None and obj in items:
+                items.remove(obj)
+                if not items:
+                    del buckets[bucket]
+
+        home = int(key_y // self.bucket_height)
+        items = self.home_buckets[layer].get(home)
+        if items is not None and obj in items:
+            items.remove(obj)
+            if not items:
+                del self.home_buckets[layer][home]
+            self.counts[layer] -= 1
+
+    def merge(self, other):
+        """Перенос всех объектов другого индекса (готовые корзины сливаются целиком)"""
+        for layer in other.buckets:
+            buckets = self.buckets[layer]
+            for bucket, items in other.buckets[layer].items():
+                buckets.setdefault(bucket, []).extend(items)
+            home_buckets = self.home_buckets[layer]
+            for bucket, items in other.home_buckets[layer].items():
+                home_buckets.setdefault(bucket, []).extend(items)
+            if other.max_home[layer] is not None:
+                self._raise_max_home(layer, other.max_home[layer])
+            self.counts[layer] += other.counts[layer]
+    
+    def remove_below(self, threshold, layers=OBSTACLE_LAYERS):
+        """Удаление объектов с ключевой координатой y >= threshold.
+
+        Просматриваются только номера домашних корзин от порога до
+        max_home (нижнего края мира). После вызова все корзины ниже
+        порогового удалены, поэтому пока удалять нечего, стоимость - одна
+        корзина и не зависит от размера мира.
+        Возвращает словарь {слой: [удалённые объекты]}.
+        """
+        removed = {}
+        first_bucket = int(threshold // self.bucket_height)
+
+        for layer in layers:
+            max_home = self.max_home[layer]
+            if max_home is None or max_home < first_bucket:
+                continue
+            home_buckets = self.home_buckets[layer]
+            stale = []
+            for bucket in range(first_bucket, max_home + 1):
+                items = home_buckets.get(bucket)
+                if items:
+                    stale.extend(obj for obj in items if self._extent(obj, layer)[2] >= threshold)
+            for obj in stale:
+                self.remove(obj, layer)
+            if stale:
+                removed[layer] = stale
+            # Корзины ниже first_bucket опустели целиком, first_bucket - не обязательно
+            self.max_home[layer] = first_bucket if first_bucket in home_buckets else first_bucket - 1
+
+        return removed
+
+    # === Запросы ===
+
+    def nearby(self, x, y, radius, layers=OBSTACLE_LAYERS):
+        """Кандидаты, чей габарит по y пересекает [y - radius, y + radius] (без точной проверки)"""
+        return self.in_range(y - radius, y + radius, layers)
+
+    def in_range(self, y_min, y_max, layers=OBSTACLE_LAYERS):
+        """Все объекты слоёв, пересекающие диапазон y (каждый ровно один раз)"""
+        result = []
+        seen = set()
+        for layer in layers:
+            buckets = self.buckets[layer]
+            for bucket in self._bucket_range(y_min, y_max):
+                for obj in buckets.get(bucket, ()):
+                    key = id(obj)
+                    if key not in seen:
+                        seen.add(key)
+                        result.append(obj)
+        return result
+
+    def query_circle(self, x, y, radius, layers=OBSTACLE_LAYERS):
+        """Объекты, с которыми пересекается круг (x, y, radius)"""
+        return [obj for obj in self.nearby(x, y, radius + SPATIAL_QUERY_MARGIN, layers)
+                if obj.collides_with(x, y, radius)]
+
+    def collides_circle(self, x, y, radius, layers=OBSTACLE_LAYERS):
+        """Есть ли хоть одно пересечение с кругом (с ранним выходом)"""
+        for layer in layers:
+            buckets = self.buckets[layer]
+            for bucket in self._bucket_range(y - radius - SPATIAL_QUERY_MARGIN,
+                                             y + radius + SPATIAL_QUERY_MARGIN):
+                for obj in buckets.get(bucket, ()):
+                    if obj.collides_with(x, y, radius):
+                        return True
+        return False
+
+    def query_segment(self, x1, y1, x2, y2, radius, layers=OBSTACLE_LAYERS):
+        """Объекты, которых касается круг радиуса radius, движущийся по отрезку"""
+        margin = radius + SPATIAL_QUERY_MARGIN
+        y_min = min(y1, y2) - margin
+        y_max = max(y1, y2) + margin
+
+        length = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+        steps = max(1, int(math.ceil(length / max(radius, 1))))
+
+        hits = []
+        for layer in layers:
+            for obj in self.in_range(y_min, y_max, (layer,)):
+                if layer == LAYER_SHORES:
+                    # Берег: точки вдоль отрезка с шагом не больше радиуса
+                    for i in range(steps + 1):
+                        t = i / steps
+                        if obj.collides_with(x1 + (x2 - x1) * t, y1 + (y2 - y1) * t, radius):
+                            hits.append(obj)
+                            break
+                    continue
+
+                if layer == LAYER_ISLANDS:
+                    reach = obj.radius * ISLAND_COLLISION_MULTIPLIER
+                elif obj.used_recently:
+                    continue
+                else:
+                    reach = obj.radius
+
+                if point_to_segment_distance(obj.x, obj.y, x1, y1, x2, y2) < reach + radius:
+                    hits.append(obj)
+        return hits
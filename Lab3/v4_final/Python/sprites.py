@@ -0,0 +1,118 @@
+# sprites.py - Общий реестр спрайтов (каждый PNG грузится один раз на процесс)
+
+import time
+import pygame
+from config import *
+
+SPRITE_DIRECTIONS = ('up', 'down', 'left', 'right')
+
+# Набор спрайтов по направлениям: имя набора -> шаблон пути
+SPRITE_SETS = {
+    'player': 'img/player/player_{}.png',
+    'enemy_simple': 'img/enemy_simple/enemy_simple_{}.png',
+    'enemy_hard': 'img/enemy_hard/enemy_hard_{}.png',
+}
+
+# Масштабированные варианты, которые прогреваются при старте игры
+SPRITE_WARMUP = [
+    ('player', PLAYER_SIZE),
+    ('enemy_simple', ENEMY_SIMPLE_SIZE),
+    ('enemy_hard', ENEMY_HARD_SIZE),
+]
+
+
+class SpriteRegistry:
+    """Реестр спрайтов: исходники грузятся один раз, масштабированные
+    варианты кэшируются по ключу (asset, size) и раздаются по ссылке"""
+
+    def __init__(self):
+        self.sources = {}        # asset -> Surface (или None, если файл не загрузился)
+        self.scaled = {}         # (asset, size) -> Surface
+        self.direction_sets = {} # (set_name, size) -> {direction: Surface}
+        self.fallbacks = {}      # произвольный ключ -> Surface-заглушка
+
+        self.load_time_ms = 0.0
+        self.warmup_time_ms = 0.0
+        self.disk_loads = 0
+        self.scale_ops = 0
+
+    def load_all(self):
+        """Загрузка всех исходных спрайтов (после pygame.display.set_mode)"""
+        start = time.perf_counter()
+        for set_name, path_template in SPRITE_SETS.items():
+            for direction in SPRITE_DIRECTIONS:
+                self._load_source(f"{set_name}_{direction}", path_template.format(direction))
+        self.load_time_ms += (time.perf_counter() - start) * 1000
+
+    def warm_up(self, variants=SPRITE_WARMUP):
+        """Заранее строит масштабированные наборы, чтобы спавн не масштабировал в кадре"""
+        start = time.perf_counter()
+        for set_name, size in variants:
+            self.get_direction_set(set_name, size)
+        self.warmup_time_ms += (time.perf_counter() - start) * 1000
+
+    def _load_source(self, asset, path):
+        """Загрузка одного PNG с диска"""
+        if asset in self.sources:
+            return self.sources[asset]
+
+        try:
+            surface = pygame.image.load(path).convert_alpha()
+            self.disk_loads += 1
+        except (pygame.error, FileNotFoundError):
+            surface = None
+
+        self.sources[asset] = surface
+        return surface
+
+    def get(self, asset, size):
+        """Масштабированный спрайт (None, если исходник не загрузился)"""
+        key = (asset, size)
+        if key in self.scaled:
+            return self.scaled[key]
+
+        source = self.sources.get(asset)
+        if source is None and asset not in self.sources:
+            set_name, direction = asset.rsplit('_', 1)
+            source = self._load_source(asset, SPRITE_SETS[set_name].format(direction))
+
+        surface = None
+        if source is not None:
+            surface = pygame.transform.scale(source, (size, size))
+            self.scale_ops += 1
+
+        self.scaled[key] = surface
+        return surface
+
+    def get_direction_set(self, set_name, size):
+        """Общий словарь {направление: спрайт} для набора (None, если чего-то нет)"""
+        key = (set_name, size)
+        if key in self.direction_sets:
+            return self.direction_sets[key]
+
+        images = {}
+        for direction in SPRITE_DIRECTIONS:
+            images[direction] = self.get(f"{set_name}_{direction}", size)
+
+        if any(image is None for image in images.values()):
+            images = None
+
+        self.direction_sets[key] = images
+        return images
+
+    def get_fallback(self, key, factory):
+        """Заглушка, созданная один раз для всех сущностей с одинаковым ключом"""
+        surface = self.fallbacks.get(key)
+        if surface is None:
+            surface = factory()
+            self.fallbacks[key] = surface
+        return surface
+
+    def print_report(self):
+        """Вывод времени загрузки и прогрева"""
+        print(f"Спрайты: загружено файлов {self.disk_loads} за {self.load_time_ms:.1f} мс, "
+              f"масштабировано вариантов {self.scale_ops}, прогрев {self.warmup_time_ms:.1f} мс")
+
+
+# Общий реестр на весь процесс
+sprite_registry = SpriteRegistry()
@@ -1,32 +1,153 @@
 # uart_protocol.py - UART протокол для кнопок и миль
 
+import bisect
 import serial
 import struct
+import threading
+import time
+import pygame
+from crc8 import crc8
+from frame_parser import FrameParser
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 # Константы
 START_BYTE = 0xAA
 END_BYTE = 0x55
 PKT_BUTTONS = 0x01
 PKT_MILES = 0x02
+PKT_BUTTONS_EX = 0x03   # STM32 -> PC: кнопки + seq + время платы (мкс)
+PKT_MILES_EX = 0x04     # PC -> STM32: мили + seq + время PC (мкс)
+PKT_ECHO = 0x05         # STM32 -> PC: seq и время PC из PKT_MILES_EX + время платы при приёме
 
 UART_PORT = 'COM5'  # Измените на ваш порт
 UART_BAUDRATE = 115200
 UART_TIMEOUT = 0.001
+UART_READER_TIMEOUT = 0.05   # сколько поток приёма ждёт байт (и stop_reader - поток)
 
+BUTTONS_PACKET_SIZE = 7    # START | TYPE | L | R | F | CRC | END
+BUTTONS_EX_PACKET_SIZE = 13  # START | TYPE | L | R | F | SEQ(2) | T_BOARD(4) | CRC | END
+ECHO_PACKET_SIZE = 14      # START | TYPE | SEQ(2) | T_PC(4) | T_BOARD(4) | CRC | END
+UART_RX_BUFFER_SIZE = 512
 
-@dataclass
+# Замер задержек: мили уходят как PKT_MILES_EX, нужна прошивка с PKT_*_EX/PKT_ECHO
+UART_LATENCY_STATS = False
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+LATENCY_STAGES = (
+    'wire',          # нажатие на плате -> байты прочитаны на PC (нужна синхронизация часов)
+    'parse',         # прочитаны -> опубликован ButtonState
+    'queue',         # опубликован -> взят игрой в update()
+    'display',       # взят -> кадр с ним показан (display.flip)
+    'total',         # нажатие (или чтение без PKT_BUTTONS_EX) -> кадр показан
+    'miles_rtt',     # PKT_MILES_EX -> PKT_ECHO
+    'miles_uplink',  # PKT_MILES_EX сформирован -> принят платой
+)
+
+
+def _clock_us():
+    """Время PC в мкс по модулю 2^32 (поле T_PC)"""
+    return int(time.perf_counter() * 1e6) & 0xFFFFFFFF
+
+
+def _wrap_diff(a, b):
+    """a - b для 32-битных счётчиков мкс с переполнением"""
+    diff = (a - b) & 0xFFFFFFFF
+    return diff - 0x100000000 if diff & 0x80000000 else diff
+
+
+class LatencyHistogram:
+    """Гистограмма задержек по корзинам LATENCY_BUCKETS_MS (последняя - всё, что больше)"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+    
+    def percentile(self, q):
+        """Верхняя граница корзины с q-м перцентилем, мс"""
+        if not self.count:
+            return None
+        target = q / 100 * self.count
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+    
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else None,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+            'buckets_ms': dict(zip(LATENCY_BUCKETS_MS + (float('inf'),), self.counts)),
+        }
+
+
+@dataclass(frozen=True)
 class ButtonState:
-    """Состояние кнопок от STM32"""
+    """Состояние кнопок от STM32 (неизменяемый снимок).
+
+    *_changed_at - time.perf_counter() последнего нажатия/отпускания кнопки,
+    sequence - номер пакета, в котором состояние последний раз изменилось.
+    read_at/published_at - когда байты этого пакета прочитаны и снимок
+    опубликован, board_sent_at - момент нажатия по часам PC (PKT_BUTTONS_EX
+    после синхронизации часов, иначе None).
+    Индексируется как pygame.key.get_pressed(), поэтому снимок сразу
+    передаётся в GameEngine.step() без списка на 512 элементов.
+    """
     left_pressed: bool
     right_pressed: bool
     fire_pressed: bool
+    left_changed_at: float = 0.0
+    right_changed_at: float = 0.0
+    fire_changed_at: float = 0.0
+    sequence: int = 0
+    read_at: float = 0.0
+    published_at: float = 0.0
+    board_sent_at: Optional[float] = None
+    
+    def __getitem__(self, key):
+        if key == pygame.K_a:
+            return self.left_pressed
+        if key == pygame.K_d:
+            return self.right_pressed
+        if key == pygame.K_SPACE:
+            return self.fire_pressed
+        return False
+    
+    def with_buttons(self, left, right, fire, timestamp, sequence, read_at=0.0, board_sent_at=None):
+        """Следующий снимок: время меняется только у кнопок с фронтом"""
+        return replace(
+            self,
+            left_pressed=left,
+            right_pressed=right,
+            fire_pressed=fire,
+            left_changed_at=timestamp if left != self.left_pressed else self.left_changed_at,
+            right_changed_at=timestamp if right != self.right_pressed else self.right_changed_at,
+            fire_changed_at=timestamp if fire != self.fire_pressed else self.fire_changed_at,
+            sequence=sequence,
+            read_at=read_at,
+            published_at=time.perf_counter(),
+            board_sent_at=board_sent_at,
+        )
     
     # Для совместимости с pygame keys
     def to_pygame_keys(self):
         """Преобразование в формат pygame keys"""
-        import pygame
         keys = [False] * 512
         if self.left_pressed:
             keys[pygame.K_a] = True
@@ -38,17 +159,50 @@ class ButtonState:
 
 
 class UARTProtocol:
-    """Класс для работы с UART протоколом"""
+    """Класс для работы с UART протоколом.
+
+    После start_reader() приём и разбор идут в отдельном потоке: он
+    публикует новый неизменяемый ButtonState одним присваиванием
+    ссылки, а игра в get_keys() только читает эту ссылку и не ждёт порт.
+    Без потока receive_buttons() по-прежнему опрашивает порт сам.
+
+    latency=True - мили уходят как PKT_MILES_EX, а задержки по этапам
+    (LATENCY_STAGES) копятся в гистограммах: get_statistics() и
+    print_statistics(). Для этапа display игра вызывает frame_presented()
+    после display.flip().
+    """
     
-    def __init__(self, port=UART_PORT, baudrate=UART_BAUDRATE, debug=True):
+    def __init__(self, port=UART_PORT, baudrate=UART_BAUDRATE, debug=True, latency=UART_LATENCY_STATS):
         self.debug = debug
-        self.packet_buffer = b''
+        self.baudrate = baudrate
+        # Из парсера выходят только кадры известных типов фиксированной длины
+        self.parser = FrameParser(START_BYTE, END_BYTE,
+                                  lengths={PKT_BUTTONS: BUTTONS_PACKET_SIZE,
+                                           PKT_BUTTONS_EX: BUTTONS_EX_PACKET_SIZE,
+                                           PKT_ECHO: ECHO_PACKET_SIZE},
+                                  scan_types=(), capacity=UART_RX_BUFFER_SIZE)
         self.sent_packets = 0
         self.received_packets = 0
         self.error_packets = 0
         
-        # Последнее состояние кнопок
+        # Замер задержек
+        self.latency = latency
+        self.latency_stats = {stage: LatencyHistogram(stage) for stage in LATENCY_STAGES}
+        self.lost_button_packets = 0
+        self._button_seq = None         # последний seq PKT_BUTTONS_EX
+        self._miles_seq = 0
+        self._clock_offset = None       # часы платы - часы PC, мкс (по эху с наименьшим RTT)
+        self._best_rtt_us = float('inf')
+        self._consumed_sequence = 0     # последний снимок, взятый игрой
+        self._awaiting_display = None   # (снимок, когда взят) до frame_presented()
+        
+        # Последнее состояние кнопок (снимок заменяется целиком, не меняется)
         self.last_button_state = ButtonState(False, False, False)
+        self.last_packet_time = 0.0
+        
+        # Поток приёма
+        self._reader = None
+        self._reader_running = False
         
         try:
             self.ser = serial.Serial(port, baudrate, timeout=UART_TIMEOUT)
@@ -59,19 +213,6 @@ class UARTProtocol:
             print(f"✗ Ошибка подключения UART: {e}")
             self.ser = None
     
-    def calculate_crc(self, data):
-        """Вычисление CRC8"""
-        crc = 0
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ 0x07
-                else:
-                    crc <<= 1
-                crc &= 0xFF
-        return crc
-    
     def send_miles(self, miles: int):
         """Отправка счёта миль на STM32"""
         if not self.ser:
@@ -80,9 +221,13 @@ class UARTProtocol:
         # Ограничиваем диапазон 0-9999
         miles = max(0, min(9999, int(miles)))
         
-        # Формируем пакет: START | TYPE | MILES(2 байта) | CRC | END
-        packet = struct.pack('<BH', PKT_MILES, miles)
-        crc = self.calculate_crc(packet)
+        # Формируем пакет: START | TYPE | MILES(2 байта) | [SEQ(2) | T_PC(4)] | CRC | END
+        if self.latency:
+            self._miles_seq = (self._miles_seq + 1) & 0xFFFF
+            packet = struct.pack('<BHHI', PKT_MILES_EX, miles, self._miles_seq, _clock_us())
+        else:
+            packet = struct.pack('<BH', PKT_MILES, miles)
+        crc = crc8(packet)
         full_packet = struct.pack('<B', START_BYTE) + packet + struct.pack('<BB', crc, END_BYTE)
         
         try:
@@ -96,82 +241,97 @@ class UARTProtocol:
             if self.debug:
                 print(f"✗ Ошибка отправки миль: {e}")
     
+    def _handle_frames(self, read_at):
+        """Разбор готовых кадров из кольцевого буфера и публикация снимка.
+
+        read_at - time.perf_counter() чтения байт из порта.
+        """
+        # Обрабатываем готовые кадры (незаконченный кадр ждёт следующего вызова)
+        for packet_data in self.parser.frames():
+            # Проверка CRC
+            crc_received = packet_data[-2]
+            crc_calculated = crc8(packet_data[1:-2])
+            
+            if crc_received != crc_calculated:
+                self.error_packets += 1
+                if self.debug:
+                    print(f"✗ CRC error: calc={crc_calculated:02X}, recv={crc_received:02X}")
+                continue
+            
+            self.received_packets += 1
+            self.last_packet_time = time.perf_counter()
+            
+            packet_type = packet_data[1]
+            if packet_type == PKT_ECHO:
+                self._handle_echo(packet_data)
+                continue
+            
+            # Распаковка данных кнопок
+            left = bool(packet_data[2])
+            right = bool(packet_data[3])
+            fire = bool(packet_data[4])
+            board_sent_at = None
+            if packet_type == PKT_BUTTONS_EX:
+                board_sent_at = self._handle_button_seq(packet_data, read_at)
+            
+            state = self.last_button_state
+            if (left, right, fire) != (state.left_pressed, state.right_pressed, state.fire_pressed):
+                # Атомарная замена ссылки: читатель видит старый или новый снимок целиком
+                state = state.with_buttons(
+                    left, right, fire, self.last_packet_time, self.received_packets, read_at, board_sent_at
+                )
+                self.last_button_state = state
+                
+                if self.latency:
+                    if board_sent_at is not None:
+                        self.latency_stats['wire'].add(read_at - board_sent_at)
+                    self.latency_stats['parse'].add(state.published_at - read_at)
+            
+            if self.debug and self.received_packets % 100 == 0:
+                print(f"[RECV] Кнопки: L={left} R={right} F={fire} (пакет #{self.received_packets})")
+    
+    def _handle_button_seq(self, packet_data, read_at):
+        """seq и время платы из PKT_BUTTONS_EX; возвращает момент отправки по часам PC или None"""
+        seq, board_us = struct.unpack_from('<HI', packet_data, 5)
+        if self._button_seq is not None:
+            self.lost_button_packets += (seq - self._button_seq - 1) & 0xFFFF
+        self._button_seq = seq
+        
+        if self._clock_offset is None:
+            return None
+        # Время платы -> часы PC через смещение, полученное по эху
+        read_us = int(read_at * 1e6) & 0xFFFFFFFF
+        wire_us = _wrap_diff(read_us, (board_us - self._clock_offset) & 0xFFFFFFFF)
+        return read_at - wire_us / 1e6
+    
+    def _handle_echo(self, packet_data):
+        """PKT_ECHO: RTT миль и смещение часов платы (берём эхо с наименьшим RTT)"""
+        now_us = _clock_us()
+        seq, pc_us, board_us = struct.unpack_from('<HII', packet_data, 2)
+        rtt_us = _wrap_diff(now_us, pc_us)
+        if rtt_us < 0:
+            return
+        self.latency_stats['miles_rtt'].add(rtt_us / 1e6)
+        
+        # Старое лучшее значение понемногу «стареет», чтобы уходить за дрейфом кварца
+        self._best_rtt_us *= 1.01
+        if rtt_us <= self._best_rtt_us:
+            self._best_rtt_us = rtt_us
+            self._clock_offset = _wrap_diff(board_us, (pc_us + rtt_us // 2) & 0xFFFFFFFF)
+        
+        # Сколько мили шли до платы по общим часам
+        uplink_us = _wrap_diff((board_us - self._clock_offset) & 0xFFFFFFFF, pc_us)
+        self.latency_stats['miles_uplink'].add(max(0, uplink_us) / 1e6)
+    
     def receive_buttons(self) -> ButtonState:
-        """Получение состояния кнопок от STM32"""
-        if not self.ser:
+        """Получение состояния кнопок от STM32 (опрос порта в потоке игры)"""
+        if not self.ser or self._reader_running:
             return self.last_button_state
         
         try:
-            # Читаем доступные данные
-            if self.ser.in_waiting > 0:
-                bytes_to_read = min(self.ser.in_waiting, 128)
-                self.packet_buffer += self.ser.read(bytes_to_read)
-                
-                # Ограничение размера буфера
-                if len(self.packet_buffer) > 512:
-                    self.packet_buffer = self.packet_buffer[-256:]
-            
-            # Обрабатываем пакеты
-            while len(self.packet_buffer) >= 6:
-                # Ищем начало пакета
-                start_pos = self.packet_buffer.find(bytes([START_BYTE]))
-                
-                if start_pos == -1:
-                    self.packet_buffer = b''
-                    break
-                
-                # Удаляем всё до стартового байта
-                if start_pos > 0:
-                    self.packet_buffer = self.packet_buffer[start_pos:]
-                
-                # Проверяем минимальный размер пакета (6 байт)
-                if len(self.packet_buffer) < 6:
-                    break
-                
-                # Ищем конечный байт
-                end_pos = self.packet_buffer.find(bytes([END_BYTE]), 1)
-                
-                if end_pos == -1:
-                    # Если не нашли END_BYTE, ждём больше данных
-                    if len(self.packet_buffer) > 20:
-                        # Слишком длинный пакет - сбрасываем
-                        self.packet_buffer = self.packet_buffer[1:]
-                    break
-                
-                # Извлекаем полный пакет
-                packet_data = self.packet_buffer[:end_pos + 1]
-                self.packet_buffer = self.packet_buffer[end_pos + 1:]
-                
-                # Проверка размера (должно быть ровно 6 байт)
-                test = len(packet_data)
-                if len(packet_data) != 7:
-                    continue
-                
-                # Проверка CRC
-                crc_received = packet_data[-2]
-                crc_calculated = self.calculate_crc(packet_data[1:-2])
-                
-                if crc_received != crc_calculated:
-                    self.error_packets += 1
-                    if self.debug:
-                        print(f"✗ CRC error: calc={crc_calculated:02X}, recv={crc_received:02X}")
-                    continue
-                
-                # Проверка типа пакета
-                if packet_data[1] != PKT_BUTTONS:
-                    continue
-                
-                # Распаковка данных кнопок
-                left = bool(packet_data[2])
-                right = bool(packet_data[3])
-                fire = bool(packet_data[4])
-                
-                self.received_packets += 1
-                self.last_button_state = ButtonState(left, right, fire)
-                
-                if self.debug and self.received_packets % 100 == 0:
-                    print(f"[RECV] Кнопки: L={left} R={right} F={fire} (пакет #{self.received_packets})")
-            
+            # Читаем доступные данные в кольцевой буфер
+            if self.parser.read_serial(self.ser, 128):
+                self._handle_frames(time.perf_counter())
             return self.last_button_state
         
         except Exception as e:
@@ -180,11 +340,89 @@ class UARTProtocol:
                 print(f"✗ Ошибка приёма кнопок: {e}")
             return self.last_button_state
     
+    # === Поток приёма ===
+    
+    def start_reader(self):
+        """Запуск фонового потока приёма кнопок"""
+        if not self.ser or self._reader is not None:
+            return
+        
+        # Поток ждёт первый байт в read(); таймаут ограничивает ожидание при остановке
+        self.ser.timeout = UART_READER_TIMEOUT
+        self._reader_running = True
+        self._reader = threading.Thread(target=self._reader_loop, name="UARTReader", daemon=True)
+        self._reader.start()
+    
+    def stop_reader(self):
+        """Остановка потока приёма"""
+        if self._reader is None:
+            return
+        self._reader_running = False
+        self._reader.join(timeout=UART_READER_TIMEOUT * 4)
+        self._reader = None
+        if self.ser:
+            self.ser.timeout = UART_TIMEOUT
+    
+    def _reader_loop(self):
+        """Поток: блокирующее чтение порта -> разбор -> публикация снимка"""
+        while self._reader_running:
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+                if data:
+                    read_at = time.perf_counter()
+                    self.parser.feed(data)
+                    self._handle_frames(read_at)
+            except Exception as e:
+                self.error_packets += 1
+                if self.debug:
+                    print(f"✗ Ошибка приёма кнопок: {e}")
+                time.sleep(UART_READER_TIMEOUT)
+    
+    def get_keys(self) -> ButtonState:
+        """Снимок кнопок для GameEngine.step(); с потоком приёма порт не трогается"""
+        state = self.last_button_state if self._reader_running else self.receive_buttons()
+        if self.latency and state.sequence != self._consumed_sequence:
+            # Новый снимок впервые попал в тик игры
+            now = time.perf_counter()
+            self._consumed_sequence = state.sequence
+            self.latency_stats['queue'].add(now - state.published_at)
+            self._awaiting_display = (state, now)
+        return state
+    
+    def frame_presented(self):
+        """Кадр показан (после display.flip): закрывает этапы display и total"""
+        if self._awaiting_display is None:
+            return
+        state, consumed_at = self._awaiting_display
+        self._awaiting_display = None
+        now = time.perf_counter()
+        self.latency_stats['display'].add(now - consumed_at)
+        start = state.board_sent_at if state.board_sent_at is not None else state.read_at
+        self.latency_stats['total'].add(now - start)
+    
     def get_pygame_keys(self):
         """Получить состояние кнопок в формате pygame keys"""
-        button_state = self.receive_buttons()
+        button_state = self.get_keys()
         return button_state.to_pygame_keys()
     
+    def close(self):
+        """Остановка потока приёма и закрытие порта"""
+        self.stop_reader()
+        if self.ser:
+            self.ser.close()
+            self.ser = None
+    
+    def get_statistics(self):
+        """Счётчики пакетов и сводка гистограмм задержек (мс) по этапам"""
+        return {
+            'sent_packets': self.sent_packets,
+            'received_packets': self.received_packets,
+            'error_packets': self.error_packets,
+            'lost_button_packets': self.lost_button_packets,
+            'clock_offset_us': self._clock_offset,
+            'latency': {stage: hist.summary() for stage, hist in self.latency_stats.items()},
+        }
+    
     def print_statistics(self):
         """Вывод статистики UART-трафика"""
         print("\n===== СТАТИСТИКА UART-ТРАФИКА =====")
@@ -194,4 +432,12 @@ class UARTProtocol:
         if self.received_packets > 0:
             success_rate = (self.received_packets / max(1, self.sent_packets)) * 100
             print(f"Успешность: {success_rate:.1f}%")
+        if self.latency:
+            print(f"Потеряно пакетов кнопок: {self.lost_button_packets}")
+            print(f"{'этап':<13} {'n':>6} {'сред.':>7} {'p50':>6} {'p95':>6} {'p99':>6} {'max':>7}  (мс)")
+            for stage, hist in self.latency_stats.items():
+                if not hist.count:
+                    continue
+                print(f"{stage:<13} {hist.count:>6} {hist.total_ms / hist.count:>7.2f} {hist.percentile(50):>6g} "
+                      f"{hist.percentile(95):>6g} {hist.percentile(99):>6g} {hist.max_ms:>7.2f}")
         print("==================================\n")
\ No newline at end of file
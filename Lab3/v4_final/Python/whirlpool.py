@@ -4,9 +4,17 @@ import pygame
 import math
 import random
 from config import *
+from spatial_index import LAYER_ISLANDS, LAYER_WHIRLPOOLS
+from pools import ObjectPool, compact
 
 class Whirlpool:
+    __slots__ = ('x', 'y', 'radius', 'rotation', 'used_recently', 'cooldown_timer', 'animation_phase')
+    
     def __init__(self, x, y):
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Начальное состояние (и повторное использование объекта из пула)"""
         self.x = x
         self.y = y
         self.radius = WHIRLPOOL_RADIUS
@@ -81,8 +89,11 @@ class Whirlpool:
         return dist < self.radius + radius
     
     @staticmethod
-    def can_place_whirlpool(x, y, islands, shores, existing_whirlpools, min_distance=WHIRLPOOL_MIN_DISTANCE):
+    def can_place_whirlpool(x, y, world_index, min_distance=WHIRLPOOL_MIN_DISTANCE):
         """Проверка возможности размещения водоворота"""
+        islands = world_index.nearby(x, y, ISLAND_MAX_RADIUS + WHIRLPOOL_ISLAND_SAFE_DISTANCE,
+                                     (LAYER_ISLANDS,))
+        
         # Проверка расстояния до островов
         for island in islands:
             safe_distance = island.radius + WHIRLPOOL_ISLAND_SAFE_DISTANCE
@@ -100,7 +111,7 @@ class Whirlpool:
             return False
         
         # Проверка расстояния до других водоворотов
-        for whirlpool in existing_whirlpools:
+        for whirlpool in world_index.nearby(x, y, min_distance * 2.5, (LAYER_WHIRLPOOLS,)):
             dist = math.sqrt((whirlpool.x - x)**2 + (whirlpool.y - y)**2)
             if dist < min_distance * 2.5:
                 return False
@@ -108,9 +119,9 @@ class Whirlpool:
         return True
     
     @staticmethod
-    def find_teleport_target(current_whirlpool, all_whirlpools, world_top, islands, shores, 
-                           min_distance=WHIRLPOOL_TELEPORT_DISTANCE):
-        """Найти подходящий водоворот для телепортации"""
+    def find_teleport_target(current_whirlpool, all_whirlpools, world_top, world_index, pool,
+                           min_distance=WHIRLPOOL_TELEPORT_DISTANCE, verbose=True):
+        """Найти подходящий водоворот для телепортации (новый берётся из pool)"""
         candidates = []
         
         for whirlpool in all_whirlpools:
@@ -128,10 +139,12 @@ class Whirlpool:
             while attempts < WHIRLPOOL_PLACEMENT_ATTEMPTS:
                 new_x = random.randint(WHIRLPOOL_EDGE_MARGIN, SCREEN_WIDTH - WHIRLPOOL_EDGE_MARGIN)
                 
-                if Whirlpool.can_place_whirlpool(new_x, new_y, islands, shores, all_whirlpools):
-                    new_whirlpool = Whirlpool(new_x, new_y)
+                if Whirlpool.can_place_whirlpool(new_x, new_y, world_index):
+                    new_whirlpool = pool.acquire(new_x, new_y)
                     all_whirlpools.append(new_whirlpool)
-                    print(f"✨ Создан новый водоворот для телепортации в ({new_x}, {new_y})")
+                    world_index.insert(new_whirlpool, LAYER_WHIRLPOOLS)
+                    if verbose:
+                        print(f"✨ Создан новый водоворот для телепортации в ({new_x}, {new_y})")
                     return new_whirlpool
                 
                 attempts += 1
@@ -139,9 +152,11 @@ class Whirlpool:
             
             if attempts == WHIRLPOOL_PLACEMENT_ATTEMPTS:
                 new_x = random.randint(WHIRLPOOL_EDGE_MARGIN, SCREEN_WIDTH - WHIRLPOOL_EDGE_MARGIN)
-                new_whirlpool = Whirlpool(new_x, new_y)
+                new_whirlpool = pool.acquire(new_x, new_y)
                 all_whirlpools.append(new_whirlpool)
-                print(f"⚠️ Создан водоворот без проверки в ({new_x}, {new_y})")
+                world_index.insert(new_whirlpool, LAYER_WHIRLPOOLS)
+                if verbose:
+                    print(f"⚠️ Создан водоворот без проверки в ({new_x}, {new_y})")
                 return new_whirlpool
         
         return random.choice(candidates)
@@ -164,30 +179,34 @@ class Whirlpool:
 
 
 class WhirlpoolManager:
-    def __init__(self, max_whirlpools=WHIRLPOOL_MAX_COUNT):
+    def __init__(self, world_index, max_whirlpools=WHIRLPOOL_MAX_COUNT, verbose=True):
         self.whirlpools = []
+        self.pool = ObjectPool(Whirlpool)  # удалённые при очистке водовороты идут в повторное использование
+        self.verbose = verbose
+        self.world_index = world_index
         self.max_whirlpools = max_whirlpools
     
-    def update(self, player, world_top, islands, shores):
+    def update(self, player, world_top):
         """Обновление всех водоворотов"""
         for whirlpool in self.whirlpools:
             whirlpool.update()
         
-        for whirlpool in self.whirlpools:
-            if whirlpool.collides_with(player.x, player.y):
-                target = Whirlpool.find_teleport_target(
-                    whirlpool, 
-                    self.whirlpools, 
-                    world_top,
-                    islands,
-                    shores,
-                    min_distance=WHIRLPOOL_TELEPORT_DISTANCE
-                )
-                
-                teleport_pos = whirlpool.teleport_player(target)
-                if teleport_pos:
-                    print(f"🌀 ТЕЛЕПОРТАЦИЯ! {player.y:.0f} → {teleport_pos[1]:.0f} (прыжок: {player.y - teleport_pos[1]:.0f})")
-                return teleport_pos
+        # Водовороты рядом с игроком (на перезарядке collides_with вернёт False)
+        for whirlpool in self.world_index.query_circle(player.x, player.y, 25, (LAYER_WHIRLPOOLS,)):
+            target = Whirlpool.find_teleport_target(
+                whirlpool, 
+                self.whirlpools, 
+                world_top,
+                self.world_index,
+                self.pool,
+                min_distance=WHIRLPOOL_TELEPORT_DISTANCE,
+                verbose=self.verbose
+            )
+            
+            teleport_pos = whirlpool.teleport_player(target)
+            if teleport_pos and self.verbose:
+                print(f"🌀 ТЕЛЕПОРТАЦИЯ! {player.y:.0f} → {teleport_pos[1]:.0f} (прыжок: {player.y - teleport_pos[1]:.0f})")
+            return teleport_pos
         
         return None
     
@@ -196,24 +215,29 @@ class WhirlpoolManager:
         for whirlpool in self.whirlpools:
             whirlpool.draw(screen, camera_y)
     
-    def add_whirlpool(self, x, y, islands, shores):
+    def add_whirlpool(self, x, y):
         """Добавление нового водоворота"""
         if len(self.whirlpools) >= self.max_whirlpools:
             return False
         
-        if not Whirlpool.can_place_whirlpool(x, y, islands, shores, self.whirlpools):
+        if not Whirlpool.can_place_whirlpool(x, y, self.world_index):
             return False
         
-        whirlpool = Whirlpool(x, y)
+        whirlpool = self.pool.acquire(x, y)
         self.whirlpools.append(whirlpool)
-        print(f"➕ Водоворот добавлен в ({x}, {y}), всего: {len(self.whirlpools)}")
+        self.world_index.insert(whirlpool, LAYER_WHIRLPOOLS)
+        if self.verbose:
+            print(f"➕ Водоворот добавлен в ({x}, {y}), всего: {len(self.whirlpools)}")
         return True
     
     def cleanup(self, cleanup_threshold):
         """Удаление старых водоворотов"""
-        before = len(self.whirlpools)
-        self.whirlpools = [w for w in self.whirlpools if w.y < cleanup_threshold]
+        removed = self.world_index.remove_below(cleanup_threshold, (LAYER_WHIRLPOOLS,))
+        if not removed:
+            return
+        
+        deleted = compact(self.whirlpools, lambda w: w.y < cleanup_threshold, self.pool.release)
         
-        if len(self.whirlpools) < before:
-            print(f"🗑️ Удалено водоворотов: {before - len(self.whirlpools)}, осталось: {len(self.whirlpools)}")
+        if self.verbose and deleted:
+            print(f"🗑️ Удалено водоворотов: {deleted}, осталось: {len(self.whirlpools)}")
 
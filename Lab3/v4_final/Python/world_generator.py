@@ -0,0 +1,234 @@
+# world_generator.py - Фоновая генерация сегментов мира
+
+import math
+import queue
+import random
+import threading
+from config import *
+from island import Island, Shore
+from spatial_index import WorldSpatialIndex, LAYER_ISLANDS, LAYER_SHORES
+from flow_field import build_flow_field
+
+
+def segment_seed(world_seed, index):
+    """Детерминированный seed сегмента: мир с одним seed всегда одинаков"""
+    return world_seed * WORLD_SEGMENT_SEED_STRIDE + index
+
+
+class WorldSegment:
+    """Готовый сегмент мира: объекты уже разложены по корзинам индекса.
+
+    Враги и водовороты хранятся как кандидаты (тип, x, y): их пропускают
+    через состояние мира (позиция игрока, лимит водоворотов) при коммите.
+    """
+
+    def __init__(self, index, start_y, end_y):
+        self.index = index
+        self.start_y = start_y
+        self.end_y = end_y
+        self.left_shore = None
+        self.right_shore = None
+        self.islands = []
+        self.whirlpool_candidates = []   # (x, y)
+        self.enemy_candidates = []       # ('simple' | 'hard', x, y)
+        self.flow_field = None           # FlowField по берегам и островам
+        self.below_flow_field = None     # поле предыдущего сегмента с островами этого у границы
+        self.flow_indexes = []           # индексы, по которым строилось flow_field
+        self.spatial_index = WorldSpatialIndex()
+
+
+def _nearby_islands(indexes, x, y, radius):
+    for index in indexes:
+        yield from index.nearby(x, y, radius, (LAYER_ISLANDS,))
+
+
+def _is_position_clear(indexes, x, y, radius=SPAWN_CLEARANCE_RADIUS):
+    """Проверка свободности позиции по индексам сегмента и предыдущего сегмента"""
+    if x < SHORE_EDGE_MARGIN or x > SCREEN_WIDTH - SHORE_EDGE_MARGIN:
+        return False
+
+    search_radius = ISLAND_MAX_RADIUS + radius + ENEMY_CLEARANCE_EXTRA
+    for island in _nearby_islands(indexes, x, y, search_radius):
+        dx = island.x - x
+        dy = island.y - y
+        dist = math.sqrt(dx*dx + dy*dy)
+        if dist < island.radius + radius + ENEMY_CLEARANCE_EXTRA:
+            return False
+
+    for index in indexes:
+        if index.collides_circle(x, y, radius, (LAYER_SHORES,)):
+            return False
+
+    return True
+
+
+def build_segment(index, origin_top, world_seed, previous=None):
+    """Генерация сегмента index (0 - первый над origin_top).
+
+    Зависит только от seed и предыдущего сегмента (острова у границы),
+    поэтому может выполняться в любом потоке.
+    """
+    rng = random.Random(segment_seed(world_seed, index))
+    segment_end = origin_top - index * WORLD_SEGMENT_HEIGHT
+    segment_start = segment_end - WORLD_SEGMENT_HEIGHT
+    segment = WorldSegment(index, segment_start, segment_end)
+
+    own_index = segment.spatial_index
+    indexes = [own_index] if previous is None else [own_index, previous.spatial_index]
+
+    # Берега
+    segment.left_shore = Shore('left', segment_start, segment_end, rng)
+    segment.right_shore = Shore('right', segment_start, segment_end, rng)
+    own_index.insert(segment.left_shore, LAYER_SHORES)
+    own_index.insert(segment.right_shore, LAYER_SHORES)
+
+    # Острова и кандидаты в водовороты
+    current_y = segment_start
+    while current_y < segment_end:
+        if rng.random() < WORLD_ISLAND_SPAWN_CHANCE:
+            x = rng.randint(SHORE_WIDTH, SCREEN_WIDTH - SHORE_WIDTH)
+
+            too_close = False
+            for island in _nearby_islands(indexes, x, current_y, WORLD_ISLAND_MIN_SPACING):
+                dist = math.sqrt((island.x - x)**2 + (island.y - current_y)**2)
+                if dist < WORLD_ISLAND_MIN_SPACING:
+                    too_close = True
+                    break
+
+            if not too_close:
+                island = Island(x, current_y, rng.randint(0, 1000000))
+                segment.islands.append(island)
+                own_index.insert(island, LAYER_ISLANDS)
+
+        if rng.random() < WHIRLPOOL_SPAWN_CHANCE:
+            x = rng.randint(WHIRLPOOL_EDGE_MARGIN, SCREEN_WIDTH - WHIRLPOOL_EDGE_MARGIN)
+            segment.whirlpool_candidates.append((x, current_y))
+
+        current_y += rng.randint(WORLD_ISLAND_STEP_MIN, WORLD_ISLAND_STEP_MAX)
+
+    # Кандидаты во враги (позиции уже проверены на острова и берега)
+    current_y = segment_start
+    while current_y < segment_end:
+        if rng.random() < ENEMY_SIMPLE_SPAWN_CHANCE:
+            for _ in range(10):
+                x = rng.randint(250, SCREEN_WIDTH - 250)
+                if _is_position_clear(indexes, x, current_y, COLLISION_RADIUS_ENEMY_SIMPLE):
+                    segment.enemy_candidates.append(('simple', x, current_y))
+                    break
+
+        if rng.random() < ENEMY_HARD_SPAWN_CHANCE:
+            for _ in range(10):
+                x = rng.randint(300, SCREEN_WIDTH - 300)
+                if _is_position_clear(indexes, x, current_y, COLLISION_RADIUS_ENEMY_HARD):
+                    segment.enemy_candidates.append(('hard', x, current_y))
+                    break
+
+        current_y += rng.randint(WORLD_ENEMY_STEP_MIN, WORLD_ENEMY_STEP_MAX)
+
+    # Поле течения для врагов - один раз на сегмент. Острова следующего
+    # сегмента заходят в верх этого поля: поле пересоберётся вместе с ним
+    segment.flow_indexes = indexes
+    segment.flow_field = build_flow_field(segment, indexes)
+    if previous is not None:
+        segment.below_flow_field = build_flow_field(previous, previous.flow_indexes + [own_index])
+
+    return segment
+
+
+class SegmentGenerator:
+    """Очередь сегментов, которые строятся заранее в фоновом потоке.
+
+    Сегменты строятся строго по порядку (каждый смотрит на предыдущий),
+    take() отдаёт следующий. Если поток не успел, take() ждёт его, а без
+    потока (background=False) строит сегмент сразу - результат тот же.
+    Исключение при постройке поток передаёт через очередь, и take()
+    поднимает его заново; take() после stop() или гибели потока - тоже
+    исключение, а не вечное ожидание.
+    """
+
+    def __init__(self, origin_top, world_seed, background=True, ahead=WORLD_PREGENERATE_SEGMENTS):
+        self.origin_top = origin_top
+        self.world_seed = world_seed
+        self.ahead = ahead
+        self.background = background
+
+        self.next_to_take = 0
+        self.next_to_request = 0
+        self._previous = None
+
+        # Статистика
+        self.segments_built = 0
+        self.waits = 0   # сколько раз take() пришлось ждать поток
+
+        self._requests = queue.Queue()
+        self._ready = queue.Queue()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._worker, name="SegmentGenerator", daemon=True)
+            self._thread.start()
+            self._request_ahead()
+
+    def _build_next(self, index):
+        segment = build_segment(index, self.origin_top, self.world_seed, self._previous)
+        self._previous = segment
+        self.segments_built += 1
+        return segment
+
+    def _worker(self):
+        """Фоновый поток: строит сегменты по номерам из очереди заявок"""
+        while True:
+            index = self._requests.get()
+            if index is None:
+                return
+            try:
+                segment = self._build_next(index)
+            except Exception as e:
+                # Без сегмента следующие строить не из чего - поток завершается
+                self._ready.put(e)
+                return
+            self._ready.put(segment)
+
+    def _request_ahead(self):
+        """Держать в работе не меньше ahead сегментов после следующего"""
+        while self.next_to_request < self.next_to_take + self.ahead + 1:
+            self._requests.put(self.next_to_request)
+            self.next_to_request += 1
+
+    def take(self):
+        """Следующий по порядку готовый сегмент"""
+        if self.background:
+            if self._ready.empty():
+                self.waits += 1
+            segment = self._wait_ready()
+            if isinstance(segment, Exception):
+                raise segment
+        else:
+            segment = self._build_next(self.next_to_take)
+
+        self.next_to_take += 1
+        if self.background:
+            self._request_ahead()
+        return segment
+
+    def _wait_ready(self):
+        """Сегмент (или исключение) из очереди готовых; поток остановлен или умер - RuntimeError"""
+        while True:
+            thread = self._thread
+            if thread is None:
+                raise RuntimeError("SegmentGenerator остановлен")
+            try:
+                return self._ready.get(timeout=WORLD_GENERATOR_POLL_INTERVAL)
+            except queue.Empty:
+                if not thread.is_alive():
+                    # Поток мог положить результат перед завершением
+                    try:
+                        return self._ready.get_nowait()
+                    except queue.Empty:
+                        raise RuntimeError("Поток SegmentGenerator завершился без сегмента") from None
+
+    def stop(self):
+        """Остановка фонового потока"""
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join(timeout=1.0)
+            self._thread = None